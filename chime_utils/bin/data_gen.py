@@ -6,11 +6,15 @@ import click
 from chime_utils.bin.base import cli
 from chime_utils.dgen import (
     data_check,
+    export_columnar,
     gen_chime6,
     gen_dipco,
     gen_mixer6,
     gen_notsofar1,
+    shard_lhotse_manifests,
 )
+from chime_utils.dgen.shard import SHARD_AUDIO_FORMATS
+from chime_utils.dgen.utils import LINK_MODES
 
 logging.basicConfig(
     format=(
@@ -21,6 +25,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+link_mode_option = click.option(
+    "--link-mode",
+    "-l",
+    type=click.Choice(LINK_MODES),
+    default="symlink",
+    show_default=True,
+    help=(
+        "How audio files are placed in the output directory. "
+        "'symlink' points to the original corpus, 'hardlink', 'reflink' and 'copy' "
+        "produce a self-contained directory that can be moved around "
+        "(hardlink and reflink fall back to copy when not supported)."
+    ),
+)
+
+compact_json_option = click.option(
+    "--compact-json",
+    is_flag=True,
+    default=False,
+    help=(
+        "Write the JSON annotations without indentation (smaller and faster "
+        "to load). Note that `chime-utils dgen checksum` will then fail "
+        "for the JSON files."
+    ),
+)
+
 
 @cli.group()
 def dgen():
@@ -108,8 +137,17 @@ def checksum_data(data_folder, check_eval, checksum_json, forgive_missing, creat
         "dev and eval and the text normalization used."
     ),
 )
+@link_mode_option
+@compact_json_option
 def gen_all_dasr(
-    download_dir, mixer6_dir, dasr_dir, download, part, challenge="chime8"
+    download_dir,
+    mixer6_dir,
+    dasr_dir,
+    download,
+    part,
+    challenge="chime8",
+    link_mode="symlink",
+    compact_json=False,
 ):
     """
     This script downloads and prepares all DASR data for the four core scenarios:
@@ -129,6 +167,8 @@ def gen_all_dasr(
             download if i == 0 else False,
             c_part,
             challenge,
+            link_mode,
+            compact_json,
         )
 
         gen_dipco(
@@ -137,17 +177,31 @@ def gen_all_dasr(
             download if i == 0 else False,
             c_part,
             challenge,
+            link_mode,
+            compact_json,
         )
 
         if c_part.startswith("train"):
             for mixer_part in ["train_call", "train_intv", "train"]:
                 gen_mixer6(
-                    os.path.join(dasr_dir, "mixer6"), mixer6_dir, mixer_part, challenge
+                    os.path.join(dasr_dir, "mixer6"),
+                    mixer6_dir,
+                    mixer_part,
+                    challenge,
+                    link_mode,
+                    compact_json,
                 )
 
         else:
             # dev or eval
-            gen_mixer6(os.path.join(dasr_dir, "mixer6"), mixer6_dir, c_part, challenge)
+            gen_mixer6(
+                os.path.join(dasr_dir, "mixer6"),
+                mixer6_dir,
+                c_part,
+                challenge,
+                link_mode,
+                compact_json,
+            )
 
         gen_notsofar1(
             os.path.join(dasr_dir, "notsofar1"),
@@ -155,6 +209,8 @@ def gen_all_dasr(
             download,
             c_part,
             challenge,
+            link_mode,
+            compact_json,
         )
         logging.info(f"NOTSOFAR1 {c_part} set generated successfully.")
 
@@ -194,7 +250,9 @@ def gen_all_dasr(
         "dev and eval and the text normalization used."
     ),
 )
-def chime6(corpus_dir, output_dir, download, part, challenge):
+@link_mode_option
+@compact_json_option
+def chime6(corpus_dir, output_dir, download, part, challenge, link_mode, compact_json):
     """
     This script prepares the CHiME-6 dataset in a suitable manner as used in
     CHiME-6, CHiME-7 DASR and CHiME-8 DASR challenges.
@@ -203,7 +261,9 @@ def chime6(corpus_dir, output_dir, download, part, challenge):
         exist it will be downloaded to this folder.\n
     OUTPUT_DIR: Path to where the final prepared dataset will be stored.
     """
-    gen_chime6(output_dir, corpus_dir, download, part, challenge)
+    gen_chime6(
+        output_dir, corpus_dir, download, part, challenge, link_mode, compact_json
+    )
 
 
 @dgen.command(name="dipco")
@@ -242,7 +302,9 @@ def chime6(corpus_dir, output_dir, download, part, challenge):
         " and eval and the text normalization used."
     ),
 )
-def dipco(corpus_dir, output_dir, download, part, challenge):
+@link_mode_option
+@compact_json_option
+def dipco(corpus_dir, output_dir, download, part, challenge, link_mode, compact_json):
     """
     This script prepares the DiPCo dataset in a suitable manner as used in
     CHiME-7 DASR and CHiME-8 DASR challenges.
@@ -250,7 +312,9 @@ def dipco(corpus_dir, output_dir, download, part, challenge):
         exist it will be downloaded to this folder.\n
     OUTPUT_DIR: Path to where the final prepared dataset will be stored.
     """
-    gen_dipco(output_dir, corpus_dir, download, part, challenge)
+    gen_dipco(
+        output_dir, corpus_dir, download, part, challenge, link_mode, compact_json
+    )
 
 
 @dgen.command(name="mixer6")
@@ -279,7 +343,9 @@ def dipco(corpus_dir, output_dir, download, part, challenge):
         "and eval and the text normalization used."
     ),
 )
-def mixer6(corpus_dir, output_dir, part, challenge):
+@link_mode_option
+@compact_json_option
+def mixer6(corpus_dir, output_dir, part, challenge, link_mode, compact_json):
     """
     This script prepares the Mixer 6 Speech dataset in a suitable manner as used in
     CHiME-7 DASR and CHiME-8 DASR challenges.\n
@@ -287,7 +353,7 @@ def mixer6(corpus_dir, output_dir, part, challenge):
         obtained through LDC, please refer to https://www.chimechallenge.org/current/task1/data\n
     OUTPUT_DIR: Path to where the final prepared dataset will be stored.
     """
-    gen_mixer6(output_dir, corpus_dir, part, challenge)
+    gen_mixer6(output_dir, corpus_dir, part, challenge, link_mode, compact_json)
 
 
 @dgen.command(name="notsofar1")
@@ -313,8 +379,169 @@ def mixer6(corpus_dir, output_dir, part, challenge):
         "You can choose multiple by using commas e.g. 'train,dev,eval'."
     ),
 )
-def notsofar1(corpus_dir, output_dir, download, part):
+@link_mode_option
+@compact_json_option
+def notsofar1(corpus_dir, output_dir, download, part, link_mode, compact_json):
     parts = part.split(",")
     for p in parts:
-        gen_notsofar1(output_dir, corpus_dir, download, p)
+        gen_notsofar1(
+            output_dir,
+            corpus_dir,
+            download,
+            p,
+            link_mode=link_mode,
+            compact_json=compact_json,
+        )
         logging.info(f"NOTSOFAR1 {p} set generated successfully.")
+
+
+@dgen.command(name="shard")
+@click.argument("manifests-dir", type=click.Path(exists=True))
+@click.argument("output-dir", type=click.Path(exists=False))
+@click.option(
+    "--corpus-name",
+    "-c",
+    type=click.Choice(["chime6", "dipco", "mixer6", "notsofar1"]),
+    required=True,
+    help="Which scenario the lhotse manifests belong to.",
+)
+@click.option(
+    "--dset-part",
+    "-d",
+    type=str,
+    default="train",
+    show_default=True,
+    help=(
+        "Which part of the dataset you want to shard. "
+        "You can choose multiple by using commas e.g. 'train,dev'."
+    ),
+)
+@click.option(
+    "--mic",
+    "-m",
+    type=str,
+    default="mdm",
+    show_default=True,
+    help="Which microphone setting, e.g. 'ihm' or 'mdm' or 'ihm,mdm' for both.",
+)
+@click.option(
+    "--unit",
+    "-u",
+    type=click.Choice(["segments", "sessions"]),
+    default="segments",
+    show_default=True,
+    help=(
+        "Store one cut per supervision segment or whole sessions "
+        "(with all their supervisions)."
+    ),
+)
+@click.option(
+    "--shard-size",
+    "-s",
+    type=int,
+    default=1000,
+    show_default=True,
+    help="Number of cuts in each shard.",
+)
+@click.option(
+    "--audio-format",
+    "-f",
+    type=click.Choice(SHARD_AUDIO_FORMATS),
+    default="flac",
+    show_default=True,
+    help="Audio encoding used inside the shards.",
+)
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of shards written in parallel.",
+)
+def shard(
+    manifests_dir,
+    output_dir,
+    corpus_name,
+    dset_part,
+    mic,
+    unit,
+    shard_size,
+    audio_format,
+    jobs,
+):
+    """
+    This script packs the lhotse manifests prepared with `chime-utils lhotse-prep`
+    into lhotse Shar shards, which can be read sequentially during training
+    (see lhotse.CutSet.from_shar).\n
+    MANIFESTS_DIR: Path to the lhotse manifests for one scenario.\n
+    OUTPUT_DIR: Path to where the shards will be stored, one sub-folder for
+    each partition and microphone setting.
+    """
+    for d in dset_part.split(","):
+        for m in mic.split(","):
+            shard_lhotse_manifests(
+                manifests_dir,
+                os.path.join(output_dir, f"{corpus_name}-{m}_{d}"),
+                corpus_name,
+                d,
+                m,
+                unit,
+                shard_size,
+                audio_format,
+                jobs,
+            )
+            logging.info(f"{corpus_name} {d} set shards generated for {m} mic.")
+
+
+@dgen.command(name="export-columnar")
+@click.argument("dasr-root", type=click.Path(exists=True))
+@click.argument("output-dir", type=click.Path(exists=False))
+@click.option(
+    "--corpus-name",
+    "-c",
+    type=str,
+    default=None,
+    help=(
+        "Which scenarios to export e.g. 'chime6' or 'chime6,dipco', "
+        "all the ones found in DASR_ROOT by default."
+    ),
+)
+@click.option(
+    "--dset-part",
+    "-d",
+    type=str,
+    default=None,
+    help=(
+        "Which parts of the dataset to export e.g. 'train' or 'train,dev', "
+        "all the ones found by default."
+    ),
+)
+@click.option(
+    "--txt-norm",
+    "-t",
+    type=str,
+    default="chime8",
+    show_default=True,
+    help=(
+        "Text normalization used for the words_norm column. "
+        "Choose between 'None', 'chime6', 'chime7' and 'chime8'."
+    ),
+)
+def export_columnar_cli(dasr_root, output_dir, corpus_name, dset_part, txt_norm):
+    """
+    This script exports all the transcriptions of a generated DASR dataset
+    to Parquet tables (requires pyarrow), with typed start/end times, speaker,
+    session, words and normalized words columns.
+    The tables are partitioned as
+    OUTPUT_DIR/<transcriptions|transcriptions_scoring>/corpus=<name>/split=<part>/
+    and can be read back e.g. with chime_utils.dgen.columnar.load_columnar.\n
+    DASR_ROOT: Path to the DASR root generated with `chime-utils dgen`.\n
+    OUTPUT_DIR: Path to where the Parquet tables will be stored.
+    """
+    export_columnar(
+        dasr_root,
+        output_dir,
+        txt_norm,
+        corpus_name.split(",") if corpus_name is not None else None,
+        dset_part.split(",") if dset_part is not None else None,
+    )
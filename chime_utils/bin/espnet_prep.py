@@ -96,6 +96,14 @@ def espnet_prep():
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
 def chime6(
     corpus_dir: str,
     output_dir: str,
@@ -104,6 +112,7 @@ def chime6(
     json_dir=None,
     use_problematic: bool = False,
     txt_norm: str = "chime8",
+    jobs: int = 1,
 ):
     """
     This function prepares CHiME-6 data to ESPNet/Kaldi manifest format.\n
@@ -122,6 +131,7 @@ def chime6(
                 json_dir,
                 use_problematic,
                 txt_norm,
+                jobs,
             )
 
 
@@ -182,6 +192,14 @@ def chime6(
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
 def dipco(
     corpus_dir: str,
     output_dir: str,
@@ -189,6 +207,7 @@ def dipco(
     mic: str,
     json_dir=None,
     txt_norm: str = "chime8",
+    jobs: int = 1,
 ):
     """
     This function prepares DiPCo data to Kaldi manifest format.\n
@@ -199,7 +218,7 @@ def dipco(
     mic = mic.split(",")
     for d in dset_part:
         for m in mic:
-            prepare_dipco(corpus_dir, output_dir, d, m, json_dir, txt_norm)
+            prepare_dipco(corpus_dir, output_dir, d, m, json_dir, txt_norm, jobs)
 
 
 @espnet_prep.command(name="mixer6")
@@ -258,6 +277,14 @@ def dipco(
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
 def mixer6(
     corpus_dir: str,
     output_dir: str,
@@ -265,6 +292,7 @@ def mixer6(
     mic: str,
     json_dir=None,
     txt_norm: str = "chime8",
+    jobs: int = 1,
 ):
     """
     This function prepares Mixer 6 Speech data to Kaldi manifest format.\n
@@ -275,7 +303,7 @@ def mixer6(
     mic = mic.split(",")
     for d in dset_part:
         for m in mic:
-            prepare_mixer6(corpus_dir, output_dir, d, m, json_dir, txt_norm)
+            prepare_mixer6(corpus_dir, output_dir, d, m, json_dir, txt_norm, jobs)
 
 
 @espnet_prep.command(name="notsofar1")
@@ -334,6 +362,14 @@ def mixer6(
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
 def notsofar1(
     corpus_dir: str,
     output_dir: str,
@@ -341,6 +377,7 @@ def notsofar1(
     mic: str,
     json_dir=None,
     txt_norm: str = "chime8",
+    jobs: int = 1,
 ):
     """
     This function prepares NOTSOFAR1 data to Kaldi manifest format.\n
@@ -351,4 +388,4 @@ def notsofar1(
     mic = mic.split(",")
     for d in dset_part:
         for m in mic:
-            prepare_notsofar1(corpus_dir, output_dir, d, m, json_dir, txt_norm)
+            prepare_notsofar1(corpus_dir, output_dir, d, m, json_dir, txt_norm, jobs)
@@ -14,7 +14,8 @@ from chime_utils.dprep.lhotse import (
     prepare_mixer6,
     prepare_notsofar1,
 )
-from chime_utils.text_norm import get_txt_norm
+from chime_utils.dprep.manifest_transforms import transform_manifests
+from chime_utils.dprep.mmap_store import mmap_store_manifest
 
 logging.basicConfig(
     format=(
@@ -102,6 +103,23 @@ def lhotse_prep():
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
+@click.option(
+    "--streaming",
+    is_flag=True,
+    default=False,
+    help=(
+        "Fix, normalize and write the manifests session by session, "
+        "keeping memory bounded by the largest session."
+    ),
+)
 def chime6(
     corpus_dir: str,
     output_dir: str,
@@ -110,6 +128,8 @@ def chime6(
     json_dir=None,
     use_problematic: bool = False,
     txt_norm: str = "chime8",
+    jobs: int = 1,
+    streaming: bool = False,
 ):
     """
     This function prepares CHiME-6 data to lhotse manifest format.\n
@@ -128,6 +148,8 @@ def chime6(
                 json_dir,
                 use_problematic,
                 txt_norm,
+                jobs,
+                streaming,
             )
             logging.info(
                 f"CHiME-6 {d} set lhotse manifests generated successfully for {m} mic."
@@ -190,6 +212,23 @@ def chime6(
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
+@click.option(
+    "--streaming",
+    is_flag=True,
+    default=False,
+    help=(
+        "Fix, normalize and write the manifests session by session, "
+        "keeping memory bounded by the largest session."
+    ),
+)
 def dipco(
     corpus_dir: str,
     output_dir: str,
@@ -197,6 +236,8 @@ def dipco(
     mic: str,
     json_dir=None,
     txt_norm: str = "chime8",
+    jobs: int = 1,
+    streaming: bool = False,
 ):
     """
     This function prepares DiPCo data to lhotse manifest format.\n
@@ -207,7 +248,9 @@ def dipco(
     mic = mic.split(",")
     for d in dset_part:
         for m in mic:
-            prepare_dipco(corpus_dir, output_dir, d, m, json_dir, txt_norm)
+            prepare_dipco(
+                corpus_dir, output_dir, d, m, json_dir, txt_norm, jobs, streaming
+            )
             logging.info(
                 f"DiPCo {d} set lhotse manifests generated successfully for {m} mic."
             )
@@ -268,6 +311,23 @@ def dipco(
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
+@click.option(
+    "--streaming",
+    is_flag=True,
+    default=False,
+    help=(
+        "Fix, normalize and write the manifests session by session, "
+        "keeping memory bounded by the largest session."
+    ),
+)
 def mixer6(
     corpus_dir: str,
     output_dir: str,
@@ -275,6 +335,8 @@ def mixer6(
     mic: str,
     json_dir=None,
     txt_norm: str = "chime8",
+    jobs: int = 1,
+    streaming: bool = False,
 ):
     """
     This function prepares Mixer 6 Speech data to lhotse manifest format.\n
@@ -285,7 +347,9 @@ def mixer6(
     mic = mic.split(",")
     for d in dset_part:
         for m in mic:
-            prepare_mixer6(corpus_dir, output_dir, d, m, json_dir, txt_norm)
+            prepare_mixer6(
+                corpus_dir, output_dir, d, m, json_dir, txt_norm, jobs, streaming
+            )
             logging.info(
                 f"Mixer 6 {d} set lhotse manifests generated successfully for {m} mic."
             )
@@ -345,6 +409,23 @@ def mixer6(
         "Choose between 'None', 'chime6', 'chime7' and 'chime8'"
     ),
 )
+@click.option(
+    "--jobs",
+    type=int,
+    required=False,
+    default=1,
+    show_default=True,
+    help="Number of sessions prepared in parallel.",
+)
+@click.option(
+    "--streaming",
+    is_flag=True,
+    default=False,
+    help=(
+        "Fix, normalize and write the manifests session by session, "
+        "keeping memory bounded by the largest session."
+    ),
+)
 def notsofar1(
     corpus_dir: str,
     output_dir: str,
@@ -352,6 +433,8 @@ def notsofar1(
     mic: str,
     json_dir=None,
     txt_norm: str = "chime8",
+    jobs: int = 1,
+    streaming: bool = False,
 ):
     """
     This function prepares NOTSOFAR1 data to lhotse manifest format.\n
@@ -362,7 +445,9 @@ def notsofar1(
     mic = mic.split(",")
     for d in dset_part:
         for m in mic:
-            prepare_notsofar1(corpus_dir, output_dir, d, m, json_dir, txt_norm)
+            prepare_notsofar1(
+                corpus_dir, output_dir, d, m, json_dir, txt_norm, jobs, streaming
+            )
             logging.info(
                 f"NOTSOFAR1 {d} set lhotse manifests generated successfully for {m} mic."
             )
@@ -386,25 +471,23 @@ def notsofar1(
     default="*.jsonl.gz",
     help="Glob pattern to apply for finding the manifests to normalize.",
 )
-def text_normalize(input_dir, output_dir, txt_norm="chime8", regex="*.jsonl.gz"):
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of manifests processed in parallel.",
+)
+def text_normalize(
+    input_dir, output_dir, txt_norm="chime8", regex="*.jsonl.gz", jobs=1
+):
     """
     This function can be used to apply text normalization to lhotse manifests.\n
     INPUT_DIR: Path to the manifests parent dir.\n
     OUTPUT_DIR: Path to the output directory where the text normalized lhotse manifests will be stored.
     """
-    txt_normalizer = get_txt_norm(txt_norm)
-    os.makedirs(output_dir, exist_ok=True)
-
-    def convert_single(input_sup, output_sup, normalizer):
-        original_manifest = lhotse.load_manifest(input_sup)
-        if not isinstance(original_manifest, lhotse.RecordingSet):
-            original_manifest = original_manifest.transform_text(normalizer)
-        original_manifest.to_file(output_sup)
-
     manifests = glob.glob(os.path.join(input_dir, regex))
-    for man in manifests:
-        name = Path(man).stem + Path(man).suffix
-        convert_single(man, os.path.join(output_dir, name), txt_normalizer)
+    transform_manifests(manifests, output_dir, txt_norm=txt_norm, num_jobs=jobs)
 
 
 @lhotse_prep.command(name="discard-length")
@@ -428,31 +511,131 @@ def text_normalize(input_dir, output_dir, txt_norm="chime8", regex="*.jsonl.gz")
     default="*.jsonl.gz",
     help="Glob pattern to apply for finding the manifests to normalize.",
 )
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of manifests processed in parallel.",
+)
 def discard_length(
-    input_dir, output_dir, min_len=0.0, max_len=np.inf, regex="*.jsonl.gz"
+    input_dir, output_dir, min_len=0.0, max_len=np.inf, regex="*.jsonl.gz", jobs=1
 ):
     """
-    This function can be used to apply text normalization to lhotse manifests.\n
+    This function can be used to discard lhotse supervisions based on their length.\n
     INPUT_DIR: Path to the manifests parent dir.\n
-    OUTPUT_DIR: Path to the output directory where the text normalized lhotse manifests will be stored.
+    OUTPUT_DIR: Path to the output directory where the filtered lhotse manifests will be stored.
     """
+    manifests = glob.glob(os.path.join(input_dir, regex))
+    transform_manifests(
+        manifests, output_dir, min_len=min_len, max_len=max_len, num_jobs=jobs
+    )
 
-    def discard_single(input_sup, output_sup):
-        original_manifest = lhotse.load_manifest(input_sup)
-        if not isinstance(original_manifest, lhotse.RecordingSet):
-            orig_length = len(original_manifest)
-            original_manifest = original_manifest.filter(
-                lambda s: s.duration >= min_len and s.duration <= max_len
-            )
-            final_length = len(original_manifest)
-            logger.info(
-                f"Discarded {orig_length - final_length} supervisions from {input_sup} because longer than {max_len} or shorter than {min_len}. "
-                f"Original length: {orig_length}, New length: {final_length}."
-            )
-        original_manifest.to_file(output_sup)
 
+@lhotse_prep.command(name="transform")
+@click.argument("input_dir", type=click.Path(exists=True))
+@click.argument("output_dir", type=click.Path(exists=False), required=True)
+@click.option(
+    "--txt-norm",
+    type=str,
+    default=None,
+    help=(
+        "Which text normalization you want to apply (if any). "
+        "Choose between 'chime7', 'chime6' and 'chime8'"
+    ),
+)
+@click.option(
+    "--min-len",
+    type=float,
+    default=0.0,
+    help=("Minimum length for lhotse supervisions. Shorter will be discarded."),
+)
+@click.option(
+    "--max-len",
+    type=float,
+    default=np.inf,
+    help=("Max length for lhotse supervisions. Longer will be discarded."),
+)
+@click.option(
+    "--speakers",
+    type=str,
+    default=None,
+    help=(
+        "Keep only supervisions from these speakers, "
+        "use commas for multiple speakers e.g. 'P01,P02'."
+    ),
+)
+@click.option(
+    "--regex",
+    type=str,
+    default="*.jsonl.gz",
+    help="Glob pattern to apply for finding the manifests to transform.",
+)
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of manifests processed in parallel.",
+)
+def transform(
+    input_dir,
+    output_dir,
+    txt_norm=None,
+    min_len=0.0,
+    max_len=np.inf,
+    speakers=None,
+    regex="*.jsonl.gz",
+    jobs=1,
+):
+    """
+    This function applies text normalization, length and speaker filtering
+    to lhotse supervisions manifests in a single streaming pass.\n
+    INPUT_DIR: Path to the manifests parent dir.\n
+    OUTPUT_DIR: Path to the output directory where the new lhotse manifests will be stored.
+    """
+    manifests = glob.glob(os.path.join(input_dir, regex))
+    transform_manifests(
+        manifests,
+        output_dir,
+        txt_norm=txt_norm,
+        min_len=min_len,
+        max_len=max_len,
+        speakers=speakers.split(",") if speakers is not None else None,
+        num_jobs=jobs,
+    )
+
+
+@lhotse_prep.command(name="mmap-store")
+@click.argument("input_dir", type=click.Path(exists=True))
+@click.argument("output_dir", type=click.Path(exists=False), required=True)
+@click.option(
+    "--regex",
+    type=str,
+    default="*.jsonl.gz",
+    help="Glob pattern to apply for finding the manifests to convert.",
+)
+def mmap_store(input_dir, output_dir, regex="*.jsonl.gz"):
+    """
+    This function packs the audio of lhotse recordings manifests into
+    memory-mappable .c8mm files (one per recording, all channels interleaved)
+    and writes new recordings manifests pointing at them.
+    Supervisions manifests are copied as they are.\n
+    Call chime_utils.dprep.mmap_store.register_mmap_backend()
+    before loading audio from the new manifests.\n
+    INPUT_DIR: Path to the manifests parent dir.\n
+    OUTPUT_DIR: Path to the output directory where the .c8mm files and the new lhotse manifests will be stored.
+    """
     os.makedirs(output_dir, exist_ok=True)
     manifests = glob.glob(os.path.join(input_dir, regex))
     for man in manifests:
         name = Path(man).stem + Path(man).suffix
-        discard_single(man, os.path.join(output_dir, name))
+        original_manifest = lhotse.load_manifest(man)
+        if not isinstance(original_manifest, lhotse.RecordingSet):
+            original_manifest.to_file(os.path.join(output_dir, name))
+            continue
+        mmap_store_manifest(
+            man,
+            os.path.join(output_dir, "audio", name.split(".")[0]),
+            os.path.join(output_dir, name),
+        )
@@ -6,11 +6,17 @@ import os
 from pathlib import Path
 
 import click
-import numpy as np
 
 from chime_utils.bin.base import cli
 from chime_utils.dgen.mixer6 import read_list_file
-from chime_utils.text_norm import get_txt_norm
+from chime_utils.dprep.stats import (
+    dataset_stats,
+    sessions_activity_stats,
+    write_dataset_stats,
+)
+from chime_utils.dprep.utils import DasrIndex
+from chime_utils.json_backend import load_json
+from chime_utils.text_norm.consistency import check_norm_consistency
 
 logging.basicConfig(
     format=(
@@ -51,7 +57,7 @@ def gen_sess_spk_map_chime8(corpus_dir, output_file, corpus_name):
         spk_set = set()
         for j in json_files:
             with open(j, "r") as f:
-                annotation = json.load(f)
+                annotation = load_json(f)
 
             if corpus_name == "dipco":
                 [spk_set.add(x["speaker_id"]) for x in annotation]
@@ -62,7 +68,7 @@ def gen_sess_spk_map_chime8(corpus_dir, output_file, corpus_name):
 
     def load_prev_mapfile(json_file):
         with open(json_file, "r") as f:
-            mapping = json.load(f)
+            mapping = load_json(f)
         all_sessions = []
         all_spk = []
         for corp in mapping["sessions_map"].keys():
@@ -179,13 +185,13 @@ def gen_sess_spk_map_chime8(corpus_dir, output_file, corpus_name):
             for meet_dir in split_dir.iterdir():
                 # load gtfile
                 with open(os.path.join(meet_dir, "gt_transcription.json")) as f:
-                    c_gt = json.load(f)
+                    c_gt = load_json(f)
                 for utt in c_gt:
                     all_speakers.add(utt["speaker_id"])
 
                 # load devices file
                 with open(os.path.join(meet_dir, "devices.json")) as f:
-                    devices_info = json.load(f)
+                    devices_info = load_json(f)
 
                 mc_devices = [
                     x
@@ -248,65 +254,49 @@ def gen_sess_spk_map_chime8(corpus_dir, output_file, corpus_name):
     default="chime6",
     help="Name of corpus, e.g. chime6,dipco etc.",
 )
-def compute_stats(dasr_root, corpus_name):  # compute speech stats from JSONs
-    def compute_stats_helper(segments, resolution=1000):
-        spk2indx = {
-            x: indx for indx, x in enumerate(list(set([x[0] for x in segments])))
-        }
-        n_speakers = len(spk2indx.keys())
-        last_seg = sorted(segments, key=lambda x: x[-1], reverse=True)[0]
-        first_seg = sorted(segments, key=lambda x: x[-2], reverse=False)[0]
-
-        length = int(np.ceil((last_seg[-1] - first_seg[-2]) * resolution))
-        activations = np.zeros((n_speakers, length), dtype="uint8")
-
-        for seg in segments:
-            start = int((seg[1] - first_seg[-2]) * resolution)
-            stop = int((seg[-1] - first_seg[-2]) * resolution)
-            activations[spk2indx[seg[0]], start:stop] = True
-
-        # here we can compute some statistics
-        flattened = np.sum(activations, 0)
-        speech_stats = []
-        for stat in range(n_speakers + 1):
-            tmp = np.sum(flattened == stat)
-            speech_stats.append(tmp)
-
-        speech_stats = [(x / resolution) for x in speech_stats]
-
-        return speech_stats, list(spk2indx.keys()), last_seg[-1]
-
-    transcriptions_folder = os.path.join(dasr_root, corpus_name, "transcriptions")
-    # fetch splits
-    for split_dir in Path(transcriptions_folder).iterdir():
-        split_name = split_dir.stem
-        # fetch all .json annotation
-        annotations = glob.glob(os.path.join(split_dir, "*.json"))
-
-        split_stats = [0 for x in range(10)]
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of sessions processed in parallel.",
+)
+def compute_stats(dasr_root, corpus_name, jobs):  # compute speech stats from JSONs
+    index = DasrIndex.load(dasr_root)
+    split_sessions = {}
+    for split_name in index.splits(corpus_name):
+        sess_names = list(index.transcription_files(split_name, corpus_name).keys())
+        if len(sess_names) == 0:
+            logger.warning(
+                f"No transcriptions for {corpus_name} {split_name}, skipping it."
+            )
+            continue
+        split_sessions[split_name] = sess_names
+    # all sessions of all splits go through the same pool
+    sessions = [(x, y) for x, names in split_sessions.items() for y in names]
+    segments = [index.segments(x, y, corpus_name) for x, y in sessions]
+    all_stats = sessions_activity_stats(segments, num_jobs=jobs)
+
+    for split_name, sess_names in split_sessions.items():
+        split_indices = [i for i, (x, _) in enumerate(sessions) if x == split_name]
+        # seconds with 0, 1, 2, ... active speakers
+        split_stats = [0, 0]
         tot_speakers = set()
-        tot_utts = 0
+        tot_utts = sum(len(segments[i]) for i in split_indices)
         tot_duration = 0
-        for ann in annotations:
-            with open(ann, "r") as f:
-                c_segs = json.load(f)
-
-            tmp = []
-            for utt in c_segs:
-                tmp.append(
-                    [utt["speaker"], float(utt["start_time"]), float(utt["end_time"])]
-                )
-            c_segs = tmp
-            tot_utts += len(c_segs)
-
-            current_stats = compute_stats_helper(c_segs)
+        for current_stats in [all_stats[i] for i in split_indices]:
             tot_speakers.update(set(current_stats[1]))
             tot_duration += current_stats[-1]
             for indx in range(len(current_stats[0])):
+                if indx >= len(split_stats):
+                    split_stats.append(0)
                 split_stats[indx] += current_stats[0][indx]
+        if tot_duration == 0:
+            logger.warning(f"{corpus_name} {split_name} has no duration, skipping it.")
+            continue
 
         print(
-            f"DATASET {corpus_name}, SPLIT {split_name}. SESSIONS {len(annotations)} TOT_SPK {len(tot_speakers)}\n"
+            f"DATASET {corpus_name}, SPLIT {split_name}. SESSIONS {len(sess_names)} TOT_SPK {len(tot_speakers)}\n"
             f"TOT_DURATION {str(datetime.timedelta(seconds=tot_duration))} TOT UTTS {tot_utts} \n"
             f"TOT SIL {split_stats[0] / tot_duration}, TOT_SPEECH {sum(split_stats[1:]) / tot_duration}, TOT 1 SPK {split_stats[1] / tot_duration}, "
             f"TOT OVL {sum(split_stats[2:]) / tot_duration}"
@@ -315,6 +305,71 @@ def compute_stats(dasr_root, corpus_name):  # compute speech stats from JSONs
         print(f"SPEAKERS: {tot_speakers}")
 
 
+@org_tools.command(name="dataset-stats")
+@click.argument("dasr-root", type=click.Path(exists=True))
+@click.argument("output", type=click.Path(exists=False))
+@click.option(
+    "--corpus-name",
+    "-c",
+    type=str,
+    default=None,
+    help=(
+        "Which scenarios to include e.g. 'chime6' or 'chime6,dipco', "
+        "all the ones found in DASR_ROOT by default."
+    ),
+)
+@click.option(
+    "--dset-part",
+    "-d",
+    type=str,
+    default=None,
+    help="Which splits to include e.g. 'dev' or 'train,dev', all by default.",
+)
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(["json", "parquet"]),
+    default="json",
+    show_default=True,
+    help="Output format, parquet requires pyarrow.",
+)
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of sessions processed in parallel.",
+)
+def dataset_stats_cli(dasr_root, output, corpus_name, dset_part, output_format, jobs):
+    """
+    Computes per-session, per-speaker and per-device statistics
+    (speaking time, overlap degree distribution, segment length histogram,
+    words per second and UEM coverage) plus a summary for each split.\n
+    DASR_ROOT: Path to the DASR root generated with `chime-utils dgen`.\n
+    OUTPUT: JSON file for --format json, folder with sessions.parquet and
+    speakers.parquet for --format parquet.
+    """
+    stats = dataset_stats(
+        dasr_root,
+        corpus_name.split(",") if corpus_name is not None else None,
+        dset_part.split(",") if dset_part is not None else None,
+        jobs,
+    )
+    write_dataset_stats(stats, output, output_format)
+    for scenario, splits in stats.items():
+        for split, c_split in splits.items():
+            summary = c_split["summary"]
+            logger.info(
+                f"{scenario} {split}: {summary['n_sessions']} sessions, "
+                f"{summary['n_speakers']} speakers, "
+                f"{datetime.timedelta(seconds=round(summary['duration']))} "
+                f"({summary['uem_coverage']:.1%} speech, "
+                f"{summary['overlap'] / max(summary['speech'], 1e-9):.1%} "
+                f"of speech overlapped)."
+            )
+
+
 @org_tools.command(name="test-norm-consistency")  # refactor to do one at a time
 @click.argument("dasr-root", type=click.Path(exists=True))
 @click.option(
@@ -324,34 +379,62 @@ def compute_stats(dasr_root, corpus_name):  # compute speech stats from JSONs
     default="chime8",
     help="Which text norm, chime8, chime6, chime7 or none",
 )
-def test_norm_consistency(dasr_root, text_norm="chime8"):
+@click.option(
+    "--jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Number of parallel workers used for the normalization.",
+)
+@click.option(
+    "--max-report",
+    type=int,
+    default=50,
+    show_default=True,
+    help="Maximum number of inconsistent utterances printed.",
+)
+def test_norm_consistency(dasr_root, text_norm="chime8", jobs=1, max_report=50):
     """
     Christoph's idea:
     fetch all utterances and check if applying two times the normalizer
     something changes.
     Normalization should always be consistent.
+    Every unique utterance is normalized once, all the inconsistent ones
+    are reported.
     """
 
-    std = get_txt_norm(text_norm)
     # fetch all possible transcriptions
-    json_files = glob.glob(os.path.join(dasr_root, "**/*.json"), recursive=True)
-
+    index = DasrIndex.load(dasr_root)
     json_transcripts = [
-        x for x in json_files if Path(x).parent.parent.stem == "transcriptions"
+        file
+        for scenario in index.scenarios.keys()
+        for split in index.splits(scenario)
+        for file in index.transcription_files(split, scenario).values()
     ]
     assert len(json_transcripts) > 0
 
+    utt2file = {}
     for elem in json_transcripts:
         with open(elem, "r") as f:
-            c_sess = json.load(f)
-
+            c_sess = load_json(f)
         for utt in c_sess:
-            first = std(utt["words"])
-            second = std(first)
-            if first != second:
-                raise RuntimeError(
-                    "Text normalization is not consistent !\n"
-                    f"Original: {utt['words']}\n"
-                    f"First application: {first}\n"
-                    f"Second application: {second}"
-                )
+            utt2file.setdefault(utt["words"], elem)
+
+    inconsistent = check_norm_consistency(utt2file.keys(), text_norm, jobs)
+    logger.info(
+        f"Checked {len(utt2file)} unique utterances from "
+        f"{len(json_transcripts)} files, {len(inconsistent)} are not consistent."
+    )
+    for c_ex in inconsistent[:max_report]:
+        print(
+            f"File: {utt2file[c_ex['original']]}\n"
+            f"Original: {c_ex['original']}\n"
+            f"First application: {c_ex['first']}\n"
+            f"Second application: {c_ex['second']}\n"
+            f"Diff: {c_ex['diff']}\n"
+        )
+    if len(inconsistent) > 0:
+        raise RuntimeError(
+            f"Text normalization is not consistent for {len(inconsistent)} "
+            f"unique utterances !"
+        )
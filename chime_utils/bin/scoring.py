@@ -1,12 +1,12 @@
 import logging
 import pathlib
-import textwrap
-import traceback
 
 import click
 
 from chime_utils.bin.base import cli
-from chime_utils.scoring.meeteval import _wer
+from chime_utils.scoring.convert import CONVERSION_FORMATS, convert_seglst_tree
+from chime_utils.scoring.meeteval import _merge_shards, _report, _wer
+from chime_utils.scoring.results import DETAILS_FORMATS
 
 logging.basicConfig(
     format=(
@@ -18,6 +18,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _parse_shard(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        index, num_shards = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise click.BadParameter("must be i/N, e.g. 2/4.")
+    if not 1 <= index <= num_shards:
+        raise click.BadParameter(f"i must be between 1 and N, got {value}.")
+    return index, num_shards
+
+
 @cli.group(name="score")
 def score():
     """General utilities for scoring or manifest/annotation manipulation."""
@@ -31,32 +43,33 @@ def score():
 @click.argument(
     "output-dir", type=click.Path(exists=False, file_okay=False, path_type=pathlib.Path)
 )
-def seglst2ctm(input_dir, output_dir):
-    import meeteval
-
-    for file in input_dir.rglob("*.json"):
-        try:
-            for speaker, ctm in (
-                meeteval.io.CTMGroup.new(
-                    meeteval.wer.wer.time_constrained.get_pseudo_word_level_timings(
-                        meeteval.io.SegLST.load(file), "character_based"
-                    ),
-                    channel="1",
-                )
-                .grouped_by_speaker_id()
-                .items()
-            ):
-                out = (
-                    output_dir
-                    / file.with_suffix("").relative_to(input_dir)
-                    / f"{speaker}.ctm"
-                )
-                out.parent.mkdir(exist_ok=True, parents=True)
-                ctm.dump(out)
-                print(f"Wrote {out}")
-        except Exception:
-            print(f"Failed to convert {file}. Ignore it.")
-            print(textwrap.indent(traceback.format_exc(), " | "))
+@click.option(
+    "--combine",
+    help="Combine all the JSON files in a folder (e.g. one per session) "
+    "into a single output named after the folder (e.g. the scenario).",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--jobs",
+    help="Number of files converted in parallel.",
+    default=1,
+    type=int,
+    show_default=True,
+)
+@click.option(
+    "-f",
+    "--output-format",
+    help="Output format.",
+    type=click.Choice(list(CONVERSION_FORMATS.keys())),
+    required=True,
+)
+def convert(input_dir, output_dir, output_format, combine=False, jobs=1):
+    """
+    Converts all the SegLST JSON files in INPUT_DIR (searched recursively)
+    to another format, keeping the folder structure.
+    """
+    convert_seglst_tree(input_dir, output_dir, output_format, combine, jobs)
 
 
 @score.command()
@@ -66,18 +79,25 @@ def seglst2ctm(input_dir, output_dir):
 @click.argument(
     "output-dir", type=click.Path(exists=False, file_okay=False, path_type=pathlib.Path)
 )
-def seglst2rttm(input_dir, output_dir):
-    import meeteval
-
-    for file in input_dir.rglob("*.json"):
-        try:
-            out = output_dir / file.with_suffix(".rttm").relative_to(input_dir)
-            out.parent.mkdir(exist_ok=True, parents=True)
-            meeteval.io.RTTM.new(meeteval.io.SegLST.load(file)).dump(out)
-            print(f"Wrote {out}")
-        except Exception:
-            print(f"Failed to convert {file}. Ignore it.")
-            print(textwrap.indent(traceback.format_exc(), " | "))
+@click.option(
+    "--combine",
+    help="Combine all the JSON files in a folder (e.g. one per session) "
+    "into a single output named after the folder (e.g. the scenario).",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--jobs",
+    help="Number of files converted in parallel.",
+    default=1,
+    type=int,
+    show_default=True,
+)
+def seglst2ctm(input_dir, output_dir, combine=False, jobs=1):
+    """
+    Same as `convert -f ctm`.
+    """
+    convert_seglst_tree(input_dir, output_dir, "ctm", combine, jobs)
 
 
 @score.command()
@@ -87,18 +107,53 @@ def seglst2rttm(input_dir, output_dir):
 @click.argument(
     "output-dir", type=click.Path(exists=False, file_okay=False, path_type=pathlib.Path)
 )
-def seglst2stm(input_dir, output_dir):
-    import meeteval
+@click.option(
+    "--combine",
+    help="Combine all the JSON files in a folder (e.g. one per session) "
+    "into a single output named after the folder (e.g. the scenario).",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--jobs",
+    help="Number of files converted in parallel.",
+    default=1,
+    type=int,
+    show_default=True,
+)
+def seglst2rttm(input_dir, output_dir, combine=False, jobs=1):
+    """
+    Same as `convert -f rttm`.
+    """
+    convert_seglst_tree(input_dir, output_dir, "rttm", combine, jobs)
 
-    for file in input_dir.rglob("*.json"):
-        try:
-            out = output_dir / file.with_suffix(".stm").relative_to(input_dir)
-            out.parent.mkdir(exist_ok=True, parents=True)
-            meeteval.io.RTTM.new(meeteval.io.SegLST.load(file)).dump(out)
-            print(f"Wrote {out}")
-        except Exception:
-            print(f"Failed to convert {file}. Ignore it.")
-            print(textwrap.indent(traceback.format_exc(), " | "))
+
+@score.command()
+@click.argument(
+    "input-dir", type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path)
+)
+@click.argument(
+    "output-dir", type=click.Path(exists=False, file_okay=False, path_type=pathlib.Path)
+)
+@click.option(
+    "--combine",
+    help="Combine all the JSON files in a folder (e.g. one per session) "
+    "into a single output named after the folder (e.g. the scenario).",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--jobs",
+    help="Number of files converted in parallel.",
+    default=1,
+    type=int,
+    show_default=True,
+)
+def seglst2stm(input_dir, output_dir, combine=False, jobs=1):
+    """
+    Same as `convert -f stm`.
+    """
+    convert_seglst_tree(input_dir, output_dir, "stm", combine, jobs)
 
 
 @score.command()
@@ -134,7 +189,7 @@ def seglst2stm(input_dir, output_dir):
     "--text-norm",
     help="Text normalization that is applied to the words.",
     default="chime8",
-    type=click.Choice(["chime6", "chime7", "chime8", None, "none"]),
+    type=click.Choice(["chime6", "chime7", "chime8", "none"]),
     show_default=True,
 )
 @click.option(
@@ -145,6 +200,52 @@ def seglst2stm(input_dir, output_dir):
     is_flag=True,
     show_default=True,
 )
+@click.option(
+    "--jobs",
+    help="Number of sessions scored in parallel (across all scenarios).",
+    default=1,
+    type=int,
+    show_default=True,
+)
+@click.option(
+    "--ref-cache-dir",
+    help="Where the prepared (loaded and normalized) references are cached, "
+    "defaults to ~/.cache/chime_utils/references. "
+    "The cache is invalidated when the reference or UEM files change.",
+    default=None,
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--no-ref-cache",
+    help="Always prepare the references from scratch and do not cache them.",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--shard",
+    help="Score only the i-th of N deterministic subsets of the sessions, "
+    "e.g. 2/4, and write the partial details to the output folder. "
+    "Combine them with `chime-utils score merge`.",
+    default=None,
+    callback=_parse_shard,
+)
+@click.option(
+    "--session-cache",
+    help="Keep the per-session error rates in a hidden cache file in the output "
+    "folder, sessions whose hypothesis and reference did not change since "
+    "the last run with --session-cache are not scored again.",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--details-format",
+    help="How the per-session details are written: all in "
+    "<metric>_per_session.json, or only the counts there and the full details "
+    "(e.g. speaker assignments) in a gzip'd JSON-lines <metric>_details.jsonl.gz.",
+    default="json",
+    type=click.Choice(DETAILS_FORMATS),
+    show_default=True,
+)
 def tcpwer(
     hyp_folder,
     dasr_root,
@@ -152,6 +253,12 @@ def tcpwer(
     output_folder=None,
     text_norm="chime8",
     ignore_missing=False,
+    jobs=1,
+    ref_cache_dir=None,
+    no_ref_cache=False,
+    shard=None,
+    session_cache=False,
+    details_format="json",
 ):
     for c_part in dset_part.split(","):
         _wer(
@@ -162,6 +269,12 @@ def tcpwer(
             text_norm,
             ignore_missing,
             "tcpWER",
+            jobs,
+            not no_ref_cache,
+            ref_cache_dir,
+            shard,
+            session_cache,
+            details_format,
         )
 
 
@@ -198,7 +311,7 @@ def tcpwer(
     "--text-norm",
     help="Text normalization that is applied to the words.",
     default="chime8",
-    type=click.Choice(["chime6", "chime7", "chime8", None]),
+    type=click.Choice(["chime6", "chime7", "chime8", "none"]),
     show_default=True,
 )
 @click.option(
@@ -209,6 +322,52 @@ def tcpwer(
     is_flag=True,
     show_default=True,
 )
+@click.option(
+    "--jobs",
+    help="Number of sessions scored in parallel (across all scenarios).",
+    default=1,
+    type=int,
+    show_default=True,
+)
+@click.option(
+    "--ref-cache-dir",
+    help="Where the prepared (loaded and normalized) references are cached, "
+    "defaults to ~/.cache/chime_utils/references. "
+    "The cache is invalidated when the reference or UEM files change.",
+    default=None,
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--no-ref-cache",
+    help="Always prepare the references from scratch and do not cache them.",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--shard",
+    help="Score only the i-th of N deterministic subsets of the sessions, "
+    "e.g. 2/4, and write the partial details to the output folder. "
+    "Combine them with `chime-utils score merge`.",
+    default=None,
+    callback=_parse_shard,
+)
+@click.option(
+    "--session-cache",
+    help="Keep the per-session error rates in a hidden cache file in the output "
+    "folder, sessions whose hypothesis and reference did not change since "
+    "the last run with --session-cache are not scored again.",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--details-format",
+    help="How the per-session details are written: all in "
+    "<metric>_per_session.json, or only the counts there and the full details "
+    "(e.g. speaker assignments) in a gzip'd JSON-lines <metric>_details.jsonl.gz.",
+    default="json",
+    type=click.Choice(DETAILS_FORMATS),
+    show_default=True,
+)
 def cpwer(
     hyp_folder,
     dasr_root,
@@ -216,6 +375,12 @@ def cpwer(
     output_folder=None,
     text_norm="chime8",
     ignore_missing=False,
+    jobs=1,
+    ref_cache_dir=None,
+    no_ref_cache=False,
+    shard=None,
+    session_cache=False,
+    details_format="json",
 ):
     for c_part in dset_part.split(","):
         _wer(
@@ -226,4 +391,248 @@ def cpwer(
             text_norm,
             ignore_missing,
             "cpWER",
+            jobs,
+            not no_ref_cache,
+            ref_cache_dir,
+            shard,
+            session_cache,
+            details_format,
+        )
+
+
+@score.command()
+@click.option(
+    "-s",
+    "--hyp-folder",
+    help="Folder containing the JSON files relative to the system output. "
+    "One file for each scenario: chime6.json, dipco.json and mixer6.json. "
+    "These should contain all sessions in e.g. eval set.",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "-r",
+    "--dasr-root",
+    help="Folder containing the main folder of CHiME-8 DASR dataset.",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "-d",
+    "--dset-part",
+    help="which part do you want to score choose between 'dev' and 'eval', or 'dev,eval' for both.",
+    default="dev",
+    type=str,
+    show_default=True,
+)
+@click.option(
+    "-o",
+    "--output-folder",
+    help="Path for the output folder where we dump all logs and useful statistics.",
+    type=click.Path(exists=False, file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--collar",
+    help="Seconds around each reference speaker boundary that are not scored "
+    "(half before, half after).",
+    default=0.0,
+    type=float,
+    show_default=True,
+)
+@click.option(
+    "-i",
+    "--ignore-missing",
+    help="Ignore missing datasets e.g. skip scoring CHiME-6 if the .json is not found.",
+    default=False,
+    is_flag=True,
+    show_default=True,
+)
+@click.option(
+    "--jobs",
+    help="Number of sessions scored in parallel (across all scenarios).",
+    default=1,
+    type=int,
+    show_default=True,
+)
+@click.option(
+    "--ref-cache-dir",
+    help="Where the prepared (loaded and normalized) references are cached, "
+    "defaults to ~/.cache/chime_utils/references. "
+    "The cache is invalidated when the reference or UEM files change.",
+    default=None,
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--no-ref-cache",
+    help="Always prepare the references from scratch and do not cache them.",
+    default=False,
+    is_flag=True,
+)
+@click.option(
+    "--details-format",
+    help="How the per-session details are written: all in "
+    "<metric>_per_session.json, or only the counts there and the full details "
+    "(e.g. speaker assignments) in a gzip'd JSON-lines <metric>_details.jsonl.gz.",
+    default="json",
+    type=click.Choice(DETAILS_FORMATS),
+    show_default=True,
+)
+def der(
+    hyp_folder,
+    dasr_root,
+    dset_part,
+    output_folder=None,
+    collar=0.0,
+    ignore_missing=False,
+    jobs=1,
+    ref_cache_dir=None,
+    no_ref_cache=False,
+    details_format="json",
+):
+    """
+    Diarization error rate (DER) and Jaccard error rate (JER) of the
+    hypotheses, computed within the UEMs of the reference.
+    """
+    from chime_utils.scoring.diarization import _der
+
+    for c_part in dset_part.split(","):
+        _der(
+            hyp_folder,
+            dasr_root,
+            c_part,
+            output_folder,
+            ignore_missing,
+            collar,
+            jobs,
+            not no_ref_cache,
+            ref_cache_dir,
+            details_format,
         )
+
+
+@score.command()
+@click.argument(
+    "shards",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, path_type=pathlib.Path),
+)
+@click.option(
+    "-o",
+    "--output-folder",
+    help="Path to a folder where the merged per-session and per-scenario "
+    "details are written.",
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+    default=None,
+)
+@click.option(
+    "--details-format",
+    help="How the per-session details are written: all in "
+    "<metric>_per_session.json, or only the counts there and the full details "
+    "(e.g. speaker assignments) in a gzip'd JSON-lines <metric>_details.jsonl.gz.",
+    default="json",
+    type=click.Choice(DETAILS_FORMATS),
+    show_default=True,
+)
+def merge(shards, output_folder=None, details_format="json"):
+    """
+    Combines the partial results of `score tcpwer/cpwer --shard i/N` and
+    prints the same tables as unsharded scoring.
+    SHARDS are the partial JSON files, or folders containing them.
+    """
+    shard_files = []
+    for shard in shards:
+        if shard.is_dir():
+            shard_files.extend(shard.glob("*_per_session.shard-*-of-*.json"))
+        else:
+            shard_files.append(shard)
+    metric, details = _merge_shards(shard_files)
+    _report(details, metric, output_folder, details_format)
+
+
+@score.command()
+@click.option(
+    "-r",
+    "--dasr-root",
+    help="Folder containing the main folder of CHiME-8 DASR dataset.",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    required=True,
+)
+@click.option(
+    "-d",
+    "--dset-part",
+    help="which parts are kept in memory, e.g. 'dev' or 'dev,eval'.",
+    default="dev",
+    type=str,
+    show_default=True,
+)
+@click.option(
+    "--text-norm",
+    help="Text normalization that is applied to the words.",
+    default="chime8",
+    type=click.Choice(["chime6", "chime7", "chime8", "none"]),
+    show_default=True,
+)
+@click.option(
+    "--host",
+    help="Address the server binds to.",
+    default="127.0.0.1",
+    type=str,
+    show_default=True,
+)
+@click.option(
+    "--port",
+    help="Port the server listens on.",
+    default=8000,
+    type=int,
+    show_default=True,
+)
+@click.option(
+    "--jobs",
+    help="Number of sessions scored in parallel (across all scenarios).",
+    default=1,
+    type=int,
+    show_default=True,
+)
+@click.option(
+    "--ref-cache-dir",
+    help="Where the prepared references are cached, "
+    "defaults to ~/.cache/chime_utils/references.",
+    default=None,
+    type=click.Path(file_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--no-ref-cache",
+    help="Always prepare the references from scratch and do not cache them.",
+    default=False,
+    is_flag=True,
+)
+def serve(
+    dasr_root,
+    dset_part,
+    text_norm="chime8",
+    host="127.0.0.1",
+    port=8000,
+    jobs=1,
+    ref_cache_dir=None,
+    no_ref_cache=False,
+):
+    """
+    Keeps references, UEMs and text normalizers in memory and scores
+    hypotheses sent over HTTP.\n
+    GET /health lists the loaded references.\n
+    POST /score with a JSON body {"metric": "tcpWER" or "cpWER",
+    "dset_part": "dev", "hyp_folder": "/path/to/hyps"} or with
+    {"hypotheses": {"chime6": [segments], ...}} instead of "hyp_folder".
+    Returns per-session, per-scenario and macro error rates.
+    """
+    from chime_utils.scoring.server import ScoringService
+    from chime_utils.scoring.server import serve as serve_http
+
+    service = ScoringService(
+        dasr_root,
+        dset_part.split(","),
+        text_norm,
+        jobs,
+        ref_cache_dir,
+        not no_ref_cache,
+    )
+    serve_http(service, host, port)
@@ -1,5 +1,7 @@
 from chime_utils.dgen.chime6 import gen_chime6
+from chime_utils.dgen.columnar import export_columnar, load_columnar
 from chime_utils.dgen.dipco import gen_dipco
 from chime_utils.dgen.mixer6 import gen_mixer6
 from chime_utils.dgen.notsofar1 import gen_notsofar1
+from chime_utils.dgen.shard import shard_lhotse_manifests
 from chime_utils.dgen.utils import data_check
@@ -1,5 +1,4 @@
 import glob
-import json
 import logging
 import os
 import tarfile
@@ -11,7 +10,8 @@ import soundfile as sf
 from lhotse.recipes.chime6 import TimeFormatConverter
 from lhotse.utils import Pathlike, resumable_download
 
-from chime_utils.dgen.utils import DoneFile, symlink, tar_strip_members
+from chime_utils.dgen.utils import DoneFile, link_files, tar_strip_members
+from chime_utils.json_backend import dump_json, load_json
 from chime_utils.text_norm import get_txt_norm
 
 CORPUS_URL = "https://us.openslr.org/resources/150/"
@@ -83,7 +83,13 @@ def download_chime6(
 
 
 def gen_chime6(
-    output_dir, corpus_dir, download=False, dset_part="train,dev", challenge="chime8"
+    output_dir,
+    corpus_dir,
+    download=False,
+    dset_part="train,dev",
+    challenge="chime8",
+    link_mode="symlink",
+    compact_json=False,
 ):
     """
     :param output_dir: Pathlike, path to output directory where the prepared data is saved.
@@ -97,6 +103,12 @@ def gen_chime6(
         You can choose multiple ones by using commas e.g. 'train,dev,eval'.
     :param challenge: str, This option controls the text normalization used.
         Choose between 'chime7' and 'chime8'.
+    :param link_mode: str, how audio files are placed in output_dir,
+        choose between 'symlink', 'hardlink', 'reflink' and 'copy'.
+        Use anything but 'symlink' to get a self-contained output_dir.
+    :param compact_json: bool, write the JSON annotations without indentation.
+        Smaller and faster to load, but the files will not match the
+        checksums used by `chime-utils dgen checksum`.
     """
     scoring_txt_normalization = get_txt_norm(challenge)
     corpus_dir = Path(corpus_dir).resolve()  # allow for relative path
@@ -196,12 +208,13 @@ def gen_chime6(
             with open(
                 os.path.join(output_dir, "devices", split, c_sess + ".json"), "w"
             ) as f:
-                json.dump(devices_json, f, indent=4)
+                dump_json(devices_json, f, compact_json)
 
         # for each json file
+        to_link = []
         for j_file in ann_json:
             with open(j_file, "r") as f:
-                annotation = json.load(f)
+                annotation = load_json(f)
             sess_name = Path(j_file).stem
 
             annotation, scoring_annotation = normalize_chime6(
@@ -215,9 +228,11 @@ def gen_chime6(
                     "dev",
                 ]:
                     continue
-                symlink(
-                    x,
-                    os.path.join(output_dir, "audio", split, Path(x).stem) + ".wav",
+                to_link.append(
+                    (
+                        x,
+                        os.path.join(output_dir, "audio", split, Path(x).stem) + ".wav",
+                    )
                 )
 
             if split not in ["eval"]:
@@ -227,7 +242,7 @@ def gen_chime6(
                     ),
                     "w",
                 ) as f:
-                    json.dump(annotation, f, indent=4)
+                    dump_json(annotation, f, compact_json)
                 # retain original annotation but dump also the scoring one
                 with open(
                     os.path.join(
@@ -238,7 +253,7 @@ def gen_chime6(
                     ),
                     "w",
                 ) as f:
-                    json.dump(scoring_annotation, f, indent=4)
+                    dump_json(scoring_annotation, f, compact_json)
 
             first = sorted([float(x["start_time"]) for x in annotation])[0]
             end = max([sf.SoundFile(x).frames for x in sess2audio[sess_name]])
@@ -249,6 +264,8 @@ def gen_chime6(
             )
             all_uem[split].append(c_uem)
 
+        link_files(to_link, link_mode)
+
     for k in all_uem.keys():
         c_uem = all_uem[k]
         if len(c_uem) > 0:
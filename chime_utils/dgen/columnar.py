@@ -0,0 +1,146 @@
+"""
+Columnar (Parquet) export of the DASR transcriptions.
+All the segments of a scenario and split end up in a single table with typed
+columns, partitioned as <annotation>/corpus=<scenario>/split=<split>/ so that
+statistics and filtering become vectorized scans instead of parsing
+thousands of JSON files.
+"""
+
+import logging
+from pathlib import Path
+
+from lhotse.utils import Pathlike
+
+from chime_utils.dprep.utils import DasrIndex
+from chime_utils.json_backend import load_json
+from chime_utils.text_norm import get_txt_norm
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d]" " %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+COLUMNAR_ANNOTATIONS = ["transcriptions", "transcriptions_scoring"]
+COLUMNAR_FILE = "segments.parquet"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "The columnar export needs pyarrow, "
+            "install it with `pip install pyarrow`."
+        )
+    return pa, pq
+
+
+def _schema(pa):
+    return pa.schema(
+        [
+            ("session", pa.string()),
+            ("speaker", pa.string()),
+            ("start", pa.float64()),
+            ("end", pa.float64()),
+            ("words", pa.string()),
+            ("words_norm", pa.string()),
+        ]
+    )
+
+
+def sessions_to_table(json_files, txt_norm="chime8"):
+    """
+    Reads CHiME-style JSON transcriptions into a single pyarrow Table.
+    :param json_files: dict, session name -> path of its JSON transcription.
+    :param txt_norm: str, text normalization used for the words_norm column,
+        choose between 'chime6', 'chime7', 'chime8' or None (no normalization).
+    :return: pyarrow Table with session, speaker, start, end, words
+        and words_norm columns, sorted by session and start.
+    """
+    pa, _ = _import_pyarrow()
+    txt_normalizer = get_txt_norm(txt_norm)
+    columns = {k: [] for k in _schema(pa).names}
+    for sess_name in sorted(json_files.keys()):
+        with open(json_files[sess_name], "r") as f:
+            segments = load_json(f)
+        for seg in sorted(segments, key=lambda x: float(x["start_time"])):
+            words = seg.get("words", "")
+            columns["session"].append(sess_name)
+            columns["speaker"].append(str(seg["speaker"]))
+            columns["start"].append(float(seg["start_time"]))
+            columns["end"].append(float(seg["end_time"]))
+            columns["words"].append(words)
+            columns["words_norm"].append(
+                txt_normalizer(words) if txt_normalizer is not None else words
+            )
+    return pa.table(columns, schema=_schema(pa))
+
+
+def export_columnar(
+    dasr_root: Pathlike,
+    output_dir: Pathlike,
+    txt_norm: str = "chime8",
+    scenarios=None,
+    dset_parts=None,
+):
+    """
+    Exports the transcriptions and transcriptions_scoring of a DASR root
+    to Parquet, one file for each annotation, scenario and split:
+    output_dir/<annotation>/corpus=<scenario>/split=<split>/segments.parquet
+    :param dasr_root: Pathlike, the DASR root as created by `chime-utils dgen`.
+    :param output_dir: Pathlike, where to write the Parquet tables.
+    :param txt_norm: str, text normalization used for the words_norm column.
+    :param scenarios: list, scenarios to export, all of them if None.
+    :param dset_parts: list, splits to export, all of them if None.
+    :return: list, paths of the Parquet files written.
+    """
+    _, pq = _import_pyarrow()
+    index = DasrIndex.load(dasr_root)
+    output_dir = Path(output_dir)
+    written = []
+    for scenario in index.scenarios.keys():
+        if scenarios is not None and scenario not in scenarios:
+            continue
+        for split in index.splits(scenario):
+            if dset_parts is not None and split not in dset_parts:
+                continue
+            for ann in COLUMNAR_ANNOTATIONS:
+                json_files = index.transcription_files(
+                    split, scenario, scoring=ann == "transcriptions_scoring"
+                )
+                if len(json_files) == 0:
+                    continue
+                table = sessions_to_table(json_files, txt_norm)
+                c_dir = output_dir / ann / f"corpus={scenario}" / f"split={split}"
+                c_dir.mkdir(parents=True, exist_ok=True)
+                pq.write_table(table, c_dir / COLUMNAR_FILE)
+                logger.info(
+                    f"Exported {table.num_rows} {scenario} {split} {ann} segments "
+                    f"to {c_dir / COLUMNAR_FILE}."
+                )
+                written.append(c_dir / COLUMNAR_FILE)
+    return written
+
+
+def load_columnar(columnar_dir: Pathlike, annotation="transcriptions", filter=None):
+    """
+    Loads the tables written by export_columnar as a single pyarrow Table,
+    corpus and split are added as columns from the partitioning.
+    :param columnar_dir: Pathlike, output_dir of export_columnar.
+    :param annotation: str, 'transcriptions' or 'transcriptions_scoring'.
+    :param filter: pyarrow.compute.Expression, optional row filter,
+        e.g. pc.field("corpus") == "chime6".
+    :return: pyarrow Table.
+    """
+    _import_pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        Path(columnar_dir, annotation), format="parquet", partitioning="hive"
+    )
+    return dataset.to_table(filter=filter)
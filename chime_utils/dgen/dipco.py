@@ -1,5 +1,4 @@
 import glob
-import json
 import logging
 import os
 import os.path
@@ -12,7 +11,8 @@ from typing import Optional
 import soundfile as sf
 from lhotse.utils import Pathlike, resumable_download
 
-from chime_utils.dgen.utils import DoneFile, get_mappings, symlink, tar_strip_members
+from chime_utils.dgen.utils import DoneFile, get_mappings, link_files, tar_strip_members
+from chime_utils.json_backend import dump_json, load_json
 from chime_utils.text_norm import get_txt_norm
 
 logging.basicConfig(
@@ -76,13 +76,19 @@ def download_dipco(
 
 
 def gen_dipco(
-    output_dir, corpus_dir, download=False, dset_part="train,dev", challenge="chime8"
+    output_dir,
+    corpus_dir,
+    download=False,
+    dset_part="train,dev",
+    challenge="chime8",
+    link_mode="symlink",
+    compact_json=False,
 ):
     """
     :param output_dir: Pathlike,
         the path of the dir to storage the final dataset
-        (note that we will use symbolic links to the original dataset where
-        possible to minimize storage requirements).
+        (note that by default we will use symbolic links to the original dataset
+        where possible to minimize storage requirements).
     :param corpus_dir: Pathlike, the original path to DiPCo root folder.
     :param download: bool, whether to download the dataset or not (you may have
         it already in storage).
@@ -91,6 +97,11 @@ def gen_dipco(
     :param challenge: str, choose between chime7 and chime8, it controls the
         choice of the text normalization and possibly how sessions are split
         between dev and eval.
+    :param link_mode: str, how audio files are placed in output_dir,
+        choose between 'symlink', 'hardlink', 'reflink' and 'copy'.
+    :param compact_json: bool, write the JSON annotations without indentation.
+        Smaller and faster to load, but the files will not match the
+        checksums used by `chime-utils dgen checksum`.
     """
     corpus_dir = Path(corpus_dir).resolve()  # allow for relative path
     mapping = get_mappings(challenge)
@@ -192,9 +203,10 @@ def gen_dipco(
 
         # for each json file
         to_uem = []
+        to_link = []
         for j_file in ann_json:
             with open(j_file, "r") as f:
-                annotation = json.load(f)
+                annotation = load_json(f)
             sess_name = Path(j_file).stem
             if dipco_c8_sess2split[sess_name] != dest_split:
                 continue
@@ -241,11 +253,13 @@ def gen_dipco(
                     dest_split in ["eval", "dev"]
                     and Path(x).stem.split("_")[-1].startswith("P")
                 ):
-                    symlink(
-                        x,
-                        os.path.join(
-                            output_dir, "audio", dest_split, filename + ".wav"
-                        ),
+                    to_link.append(
+                        (
+                            x,
+                            os.path.join(
+                                output_dir, "audio", dest_split, filename + ".wav"
+                            ),
+                        )
                     )
 
             devices_info = dict(sorted(devices_info.items(), key=lambda x: x[0]))
@@ -256,7 +270,7 @@ def gen_dipco(
                 ),
                 "w",
             ) as f:
-                json.dump(devices_info, f, indent=4)
+                dump_json(devices_info, f, compact_json)
 
             if dest_split not in ["eval"]:
                 with open(
@@ -268,7 +282,7 @@ def gen_dipco(
                     ),
                     "w",
                 ) as f:
-                    json.dump(annotation, f, indent=4)
+                    dump_json(annotation, f, compact_json)
                 with open(
                     os.path.join(
                         output_dir,
@@ -278,7 +292,7 @@ def gen_dipco(
                     ),
                     "w",
                 ) as f:
-                    json.dump(scoring_annotation, f, indent=4)
+                    dump_json(scoring_annotation, f, compact_json)
 
             uem_start = 0
             uem_end = max([sf.SoundFile(x).frames for x in sess2audio[sess_name]])
@@ -289,6 +303,8 @@ def gen_dipco(
             )
             to_uem.append(c_uem)
 
+        link_files(to_link, link_mode)
+
         if len(to_uem) > 0:
             Path(os.path.join(output_dir, "uem", dest_split)).mkdir(
                 parents=True, exist_ok=True
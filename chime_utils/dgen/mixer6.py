@@ -1,5 +1,4 @@
 import glob
-import json
 import logging
 import os
 from copy import deepcopy
@@ -7,7 +6,8 @@ from pathlib import Path
 
 import soundfile as sf
 
-from chime_utils.dgen.utils import get_mappings, symlink
+from chime_utils.dgen.utils import get_mappings, link_files
+from chime_utils.json_backend import dump_json, load_json
 from chime_utils.text_norm import get_txt_norm
 
 c8_mixer6_sess2split = {
@@ -378,7 +378,7 @@ def check_not_old_dev(ann_jsons):
     # read now this one
     assert len(ann_jsons) == 1
     with open(ann_jsons[0], "r") as f:
-        utts = json.load(f)
+        utts = load_json(f)
 
     utts = sorted(utts, key=lambda x: float(x["start_time"]))[-1]
     if not utts["words"] == "it says participant screen off":
@@ -395,12 +395,14 @@ def gen_mixer6(
     corpus_dir,
     dset_part="train_call,train_intv,dev",
     challenge="chime8",
+    link_mode="symlink",
+    compact_json=False,
 ):
     """
     :param output_dir: Pathlike,
         the path of the dir to storage the final dataset
-        (note that we will use symbolic links to the original dataset where
-        possible to minimize storage requirements).
+        (note that by default we will use symbolic links to the original dataset
+        where possible to minimize storage requirements).
     :param corpus_dir: Pathlike,
         the original path to Mixer 6 Speech root folder.
     :param download: bool, whether to download the dataset or not (you may have
@@ -410,6 +412,11 @@ def gen_mixer6(
     'train_intv,train_call' for both.
     :param challenge: str, choose between chime7 and chime8, it controls the
         choice of the text normalization.
+    :param link_mode: str, how audio files are placed in output_dir,
+        choose between 'symlink', 'hardlink', 'reflink' and 'copy'.
+    :param compact_json: bool, write the JSON annotations without indentation.
+        Smaller and faster to load, but the files will not match the
+        checksums used by `chime-utils dgen checksum`.
     """
     corpus_dir = Path(corpus_dir).resolve()  # allow for relative path
     mapping = get_mappings(challenge)
@@ -435,6 +442,7 @@ def gen_mixer6(
         output_dir,
         interviewer_name,
         subject_name,
+        to_link,
     ):
         # we also create a JSON that describes each device
         devices_json = {}
@@ -444,9 +452,11 @@ def gen_mixer6(
             if channel_num <= 3 and split in ["eval", "dev"]:
                 continue
             new_name = "{}_CH{:02d}".format(tgt_sess_name, channel_num)
-            symlink(
-                c_audio,
-                os.path.join(output_dir, "audio", split, new_name + ".flac"),
+            to_link.append(
+                (
+                    c_audio,
+                    os.path.join(output_dir, "audio", split, new_name + ".flac"),
+                )
             )
             if channel_num <= 3:
                 c_spk_mic_name = (
@@ -476,7 +486,7 @@ def gen_mixer6(
 
         if split not in ["dummy"]:
             with open(out_json, "w") as f:
-                json.dump(devices_json, f, indent=4)
+                dump_json(devices_json, f, compact_json)
 
     splits = dset_part.split(",")
     audio_files = glob.glob(
@@ -532,9 +542,10 @@ def gen_mixer6(
 
         sess2subintv = read_list_file(list_file)
         to_uem = []
+        to_link = []
         for j_file in ann_json:
             with open(j_file, "r") as f:
-                annotation = json.load(f)
+                annotation = load_json(f)
             sess_name = Path(j_file).stem
             # add session name
             # retrieve speakers from .list file
@@ -557,6 +568,7 @@ def gen_mixer6(
                 output_dir,
                 spk_map[interviewer],
                 spk_map[subject],
+                to_link,
             )
 
             if dest_split not in ["eval"]:
@@ -569,7 +581,7 @@ def gen_mixer6(
                     ),
                     "w",
                 ) as f:
-                    json.dump(annotation, f, indent=4)
+                    dump_json(annotation, f, compact_json)
                 with open(
                     os.path.join(
                         output_dir,
@@ -579,7 +591,7 @@ def gen_mixer6(
                     ),
                     "w",
                 ) as f:
-                    json.dump(annotation_scoring, f, indent=4)
+                    dump_json(annotation_scoring, f, compact_json)
 
             # no uem for train_intv and train call
             if dest_split in ["dev", "train"]:
@@ -605,6 +617,8 @@ def gen_mixer6(
                 )
                 to_uem.append(c_uem)
 
+        link_files(to_link, link_mode)
+
         if len(to_uem) > 0:
             Path(os.path.join(output_dir, "uem", dest_split)).mkdir(
                 parents=True, exist_ok=True
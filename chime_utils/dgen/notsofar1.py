@@ -1,5 +1,4 @@
 import glob
-import json
 import logging
 import os
 from copy import deepcopy
@@ -8,7 +7,8 @@ from pathlib import Path
 import soundfile as sf
 
 from chime_utils.dgen.azure_storage import download_meeting_subset
-from chime_utils.dgen.utils import get_mappings, symlink
+from chime_utils.dgen.utils import get_mappings, link_files
+from chime_utils.json_backend import dump_json, load_json
 from chime_utils.text_norm import get_txt_norm
 
 logging.basicConfig(
@@ -86,6 +86,8 @@ def convert2chime(
     txt_normalization,
     output_root,
     is_sc=False,
+    link_mode="symlink",
+    compact_json=False,
 ):
     output_audio_f = os.path.join(output_root, "audio", c_split)
     os.makedirs(output_audio_f, exist_ok=True)
@@ -106,7 +108,7 @@ def convert2chime(
         with open(
             os.path.join(Path(audio_dir).parent, "gt_meeting_metadata.json"), "r"
         ) as f:
-            metadata = json.load(f)
+            metadata = load_json(f)
 
         device2spk = {
             e: spk_map[k] for k, e in metadata["ParticipantAliasToCtDevice"].items()
@@ -114,6 +116,7 @@ def convert2chime(
 
     far_field_audio = glob.glob(os.path.join(audio_dir, "*.wav"))
     devices_info = {}
+    to_link = []
     for elem in far_field_audio:
         # create symbolic link
         filename = Path(elem).stem
@@ -123,7 +126,7 @@ def convert2chime(
             output_audio_f,
             "{}.wav".format(device_name),
         )
-        symlink(elem, tgt_name)
+        to_link.append((elem, tgt_name))
         dev_type = "circular_array" if not is_sc else "array_after_acoustic_frontend"
         d_type = {
             "is_close_talk": False,
@@ -135,9 +138,10 @@ def convert2chime(
         devices_info[device_name] = d_type
 
     if c_split not in ["train", "train_sc", "dev"]:
+        link_files(to_link, link_mode)
         devices_info = dict(sorted(devices_info.items(), key=lambda x: x[0]))
         with open(os.path.join(output_devices_info, f"{session_name}.json"), "w") as f:
-            json.dump(devices_info, f, indent=4)
+            dump_json(devices_info, f, compact_json)
         return  # no close talk and transcriptions
 
     # generate all other infos
@@ -152,7 +156,7 @@ def convert2chime(
             output_audio_f,
             "{}_{}.wav".format(session_name, device2spk[filename]),
         )
-        symlink(elem, tgt_name)
+        to_link.append((elem, tgt_name))
         d_type = {
             "is_close_talk": True,
             "speaker": device2spk[filename],
@@ -161,29 +165,36 @@ def convert2chime(
             "device_type": "close_talk_lapel",
         }
         devices_info[f"{session_name}_{device2spk[filename]}"] = d_type
+    link_files(to_link, link_mode)
 
     # load now transcription JSON and make some modifications
     with open(os.path.join(Path(audio_dir).parent, "gt_transcription.json"), "r") as f:
-        transcriptions = json.load(f)
+        transcriptions = load_json(f)
 
     output, output_normalized = normalize_notsofar1_annotation(
         transcriptions, session_name, txt_normalization, spk_map
     )
 
     with open(os.path.join(output_txt_f, f"{session_name}.json"), "w") as f:
-        json.dump(output, f, indent=4)
+        dump_json(output, f, compact_json)
 
     with open(os.path.join(output_txt_f_norm, f"{session_name}.json"), "w") as f:
-        json.dump(output_normalized, f, indent=4)
+        dump_json(output_normalized, f, compact_json)
 
     devices_info = dict(sorted(devices_info.items(), key=lambda x: x[0]))
 
     with open(os.path.join(output_devices_info, f"{session_name}.json"), "w") as f:
-        json.dump(devices_info, f, indent=4)
+        dump_json(devices_info, f, compact_json)
 
 
 def gen_notsofar1(
-    output_dir, corpus_dir, download=False, dset_part="dev", challenge="chime8"
+    output_dir,
+    corpus_dir,
+    download=False,
+    dset_part="dev",
+    challenge="chime8",
+    link_mode="symlink",
+    compact_json=False,
 ):
     corpus_dir = Path(corpus_dir).resolve()  # allow for relative path
     mapping = get_mappings(challenge)
@@ -220,7 +231,7 @@ def gen_notsofar1(
         orig_sess_name = Path(device_j).parent.stem
 
         with open(device_j, "r") as f:
-            devices_info = json.load(f)
+            devices_info = load_json(f)
 
         mc_devices = [
             x
@@ -247,6 +258,8 @@ def gen_notsofar1(
                 spk_map,
                 text_normalization,
                 output_dir,
+                link_mode=link_mode,
+                compact_json=compact_json,
             )
 
             # use close talk 0 to get UEM
@@ -276,7 +289,7 @@ def gen_notsofar1(
         orig_sess_name = Path(device_j).parent.stem
 
         with open(device_j, "r") as f:
-            devices_info = json.load(f)
+            devices_info = load_json(f)
 
         # also dump single channel as train_sc
         sc_devices = [
@@ -306,6 +319,8 @@ def gen_notsofar1(
                 text_normalization,
                 output_dir,
                 is_sc=True,
+                link_mode=link_mode,
+                compact_json=compact_json,
             )
 
             ct_audio = glob.glob(
@@ -0,0 +1,135 @@
+"""
+Packs the DASR data into large sequential shards (lhotse Shar format).
+Random access over thousands of per-channel audio files is slow on network
+storage, while Shar tarfiles can be read sequentially during training.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from lhotse import CutSet, SupervisionSet, load_manifest_lazy
+from lhotse.utils import Pathlike
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d]" " %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+SHARD_AUDIO_FORMATS = ["flac", "wav", "mp3"]
+# libsndfile does not support FLAC with more channels than this
+FLAC_MAX_CHANNELS = 8
+
+
+def shard_lhotse_manifests(
+    manifests_dir: Pathlike,
+    output_dir: Pathlike,
+    corpus_name: str,
+    dset_part: str = "train",
+    mic: str = "mdm",
+    unit: str = "segments",
+    shard_size: int = 1000,
+    audio_format: str = "flac",
+    num_jobs: int = 1,
+):
+    """
+    Packs the lhotse manifests created by `chime-utils lhotse-prep` into
+    lhotse Shar shards, plus an index.json describing them.
+    :param manifests_dir: Pathlike, folder with the lhotse manifests,
+        e.g. chime6-mdm_recordings_train.jsonl.gz and
+        chime6-mdm_supervisions_train.jsonl.gz.
+    :param output_dir: Pathlike, where the shards will be stored.
+    :param corpus_name: str, one between 'chime6', 'dipco', 'mixer6' and 'notsofar1'.
+    :param dset_part: str, which partition to shard e.g. 'train'.
+    :param mic: str, which microphone setting e.g. 'mdm' or 'ihm'.
+    :param unit: str, 'segments' to store one cut per supervision (only the
+        audio inside the segment is stored) or 'sessions' to store whole
+        recordings with all their supervisions.
+    :param shard_size: int, number of cuts in each shard.
+    :param audio_format: str, audio encoding in the shards,
+        choose between 'flac', 'wav' and 'mp3'.
+    :param num_jobs: int, number of shards written in parallel.
+    :return: dict, the content of index.json.
+    """
+    assert unit in ["segments", "sessions"], "unit must be 'segments' or 'sessions'"
+    assert audio_format in SHARD_AUDIO_FORMATS
+    manifests_dir = Path(manifests_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    recordings = load_manifest_lazy(
+        manifests_dir / f"{corpus_name}-{mic}_recordings_{dset_part}.jsonl.gz"
+    )
+    max_channels = max(r.num_channels for r in recordings)
+    if audio_format == "flac" and max_channels > FLAC_MAX_CHANNELS:
+        logger.warning(
+            f"{corpus_name} {mic} recordings have up to {max_channels} channels, "
+            f"FLAC supports at most {FLAC_MAX_CHANNELS}. Using wav instead."
+        )
+        audio_format = "wav"
+
+    # the lazy cut creation needs the supervisions in the recordings order,
+    # only the supervisions are kept in memory, the cuts are streamed
+    by_recording = {}
+    for sup in load_manifest_lazy(
+        manifests_dir / f"{corpus_name}-{mic}_supervisions_{dset_part}.jsonl.gz"
+    ):
+        by_recording.setdefault(sup.recording_id, []).append(sup)
+    supervisions = SupervisionSet.from_segments(
+        [
+            sup
+            for r in recordings
+            for sup in sorted(by_recording.pop(r.id, []), key=lambda x: x.start)
+        ]
+    )
+    del by_recording
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        cuts = CutSet.from_manifests(
+            recordings=recordings,
+            supervisions=supervisions,
+            output_path=Path(tmp_dir) / "cuts.jsonl.gz",
+            lazy=True,
+        )
+        if unit == "segments":
+            cuts = cuts.trim_to_supervisions(keep_overlapping=False)
+
+        logger.info(
+            f"Writing {corpus_name} {dset_part} {mic} cuts "
+            f"to shards in {output_dir}."
+        )
+        shards = cuts.to_shar(
+            output_dir,
+            fields={"recording": audio_format},
+            shard_size=shard_size,
+            num_jobs=num_jobs,
+            verbose=True,
+        )
+        num_cuts, duration = 0, 0.0
+        for c in cuts:
+            num_cuts += 1
+            duration += c.duration
+
+    index = {
+        "corpus_name": corpus_name,
+        "dset_part": dset_part,
+        "mic": mic,
+        "unit": unit,
+        "audio_format": audio_format,
+        "num_cuts": num_cuts,
+        "duration": duration,
+        "shards": {
+            field: [os.path.relpath(x, output_dir) for x in sorted(paths)]
+            for field, paths in shards.items()
+        },
+    }
+    with open(output_dir / "index.json", "w") as f:
+        json.dump(index, f, indent=4)
+
+    return index
@@ -1,8 +1,12 @@
+import errno
 import glob
 import hashlib
 import json
 import logging
 import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import tqdm
@@ -154,6 +158,204 @@ def symlink(source, link_name):
             )
 
 
+LINK_MODES = ["symlink", "hardlink", "reflink", "copy"]
+# Linux FICLONE ioctl, clones the extents of a file on CoW filesystems
+# (e.g. btrfs, xfs, bcachefs)
+_FICLONE = 0x40049409
+# errors meaning "this operation is not supported here", we fall back on these
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EMLINK,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+}
+_warned_fallbacks = set()
+
+
+def _warn_fallback(link_mode, fallback, err):
+    if (link_mode, fallback) not in _warned_fallbacks:
+        _warned_fallbacks.add((link_mode, fallback))
+        logger.warning(
+            f"Link mode '{link_mode}' is not supported here ({err}), "
+            f"falling back to '{fallback}'."
+        )
+
+
+def copy_file(source, dest):
+    """
+    Copy source to dest doing the copy in kernel space where possible.
+    It uses os.copy_file_range (which can also share extents on some filesystems),
+    then os.sendfile and finally shutil.copyfileobj if neither is available.
+    """
+    with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(infd).st_size
+        copied = 0
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    n_bytes = os.copy_file_range(infd, outfd, size - copied)
+                    if n_bytes == 0:
+                        break
+                    copied += n_bytes
+            except OSError as err:
+                if err.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+        if copied < size and hasattr(os, "sendfile") and sys.platform != "darwin":
+            try:
+                while copied < size:
+                    n_bytes = os.sendfile(outfd, infd, copied, size - copied)
+                    if n_bytes == 0:
+                        break
+                    copied += n_bytes
+            except OSError as err:
+                if err.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+        if copied < size:
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    shutil.copymode(source, dest)
+
+
+def reflink_file(source, dest):
+    """
+    Create a copy-on-write clone of source at dest (like "cp --reflink=always").
+    Raises OSError if the filesystem (or the platform) does not support it.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+
+    with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dest)
+            raise
+    shutil.copymode(source, dest)
+
+
+def _copy_stamp(file):
+    st = os.stat(file)
+    return st.st_size, st.st_mtime_ns
+
+
+def link_file(source, link_name, link_mode="symlink"):
+    """
+    Materialize source at link_name using link_mode.
+    Choose link_mode between "symlink", "hardlink", "reflink" and "copy".
+
+    Special properties:
+     - symlink: same as symlink() below.
+     - hardlink: falls back to copy if source is on another filesystem
+        or the filesystem does not support hard links.
+     - reflink: falls back to copy if the filesystem does not support clones.
+     - copy and reflink are written to a temporary file first, thus link_name
+        is never left half-written.
+     - except link_name already is source (same inode) or a previous copy of it
+        (same size and modification time, copies keep the one of source): pass
+     - except link_name is a symlink to source (e.g. from a previous run in
+        "symlink" mode): replaced with the new link.
+     - except link_name exists and is something else: FileExistsError
+
+    :return: the link mode that has been actually used.
+    """
+    assert link_mode in LINK_MODES, f"link_mode must be one of {LINK_MODES}"
+    if link_mode == "symlink":
+        symlink(source, link_name)
+        return link_mode
+
+    link_name = Path(link_name)
+    if link_name.is_symlink():
+        if os.readlink(link_name) != str(source):
+            raise FileExistsError(
+                "File exist.\n"
+                f"Try:       {source} -> {link_name}\n"
+                f"Currently: {os.readlink(link_name)} -> {link_name}"
+            )
+        link_name.unlink()
+    elif link_name.exists():
+        if os.path.samefile(source, link_name):
+            return link_mode
+        if _copy_stamp(source) == _copy_stamp(link_name):
+            # already copied in a previous run
+            return link_mode
+        raise FileExistsError(
+            f"File exist.\nTry:       {source} -> {link_name}\n"
+            f"Currently: {link_name} is a different file."
+        )
+    elif not link_name.parent.exists():
+        raise FileNotFoundError(
+            f"The parent directory of the dst {link_name} does not exist"
+        )
+
+    if link_mode == "hardlink":
+        try:
+            os.link(source, link_name)
+            return link_mode
+        except OSError as err:
+            if err.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            _warn_fallback(link_mode, "copy", err)
+
+    tmp_name = link_name.with_name(f".{link_name.name}.tmp")
+    try:
+        used_mode = "copy"
+        if link_mode == "reflink":
+            try:
+                reflink_file(source, tmp_name)
+                used_mode = link_mode
+            except OSError as err:
+                if err.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                _warn_fallback(link_mode, "copy", err)
+        if used_mode == "copy":
+            copy_file(source, tmp_name)
+        # the stamp identifies the copy in the next runs
+        st = os.stat(source)
+        os.utime(tmp_name, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_name, link_name)
+    finally:
+        if tmp_name.exists():
+            tmp_name.unlink()
+    return used_mode
+
+
+def link_files(sources_and_links, link_mode="symlink", num_workers=8):
+    """
+    Batched version of link_file().
+    :param sources_and_links: list of (source, link_name) tuples.
+    :param link_mode: str, one of LINK_MODES.
+    :param num_workers: int, number of threads used when the data has to be
+        actually written (copy and reflink), which is I/O bound.
+    """
+    sources_and_links = list(sources_and_links)
+    if len(sources_and_links) == 0:
+        return
+    # create all destination folders once
+    for parent in set(Path(x[1]).parent for x in sources_and_links):
+        parent.mkdir(parents=True, exist_ok=True)
+
+    if link_mode in ["symlink", "hardlink"] or num_workers <= 1:
+        for source, link_name in sources_and_links:
+            link_file(source, link_name, link_mode)
+    else:
+        with ThreadPoolExecutor(num_workers) as executor:
+            # consume the iterator so that exceptions are re-raised here
+            list(
+                executor.map(
+                    lambda x: link_file(x[0], x[1], link_mode), sources_and_links
+                )
+            )
+
+
 class DoneFile:
     def __init__(self, file):
         from pathlib import Path
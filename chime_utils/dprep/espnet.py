@@ -1,12 +1,135 @@
 import os
+from pathlib import Path
 from typing import Dict, Optional, Union
 
 from lhotse.audio import RecordingSet
-from lhotse.kaldi import export_to_kaldi
+from lhotse.kaldi import make_wavscp_channel_string_map, save_kaldi_text_mapping
 from lhotse.supervision import SupervisionSet
-from lhotse.utils import Pathlike
+from lhotse.utils import Pathlike, to_list
 
-import chime_utils.dprep.lhotse as lhotse_prep
+from chime_utils.dprep.lhotse import iter_lhotse_sessions
+
+KALDI_FILES = ["wav.scp", "segments", "reco2dur", "text", "utt2spk", "utt2dur"]
+
+
+def _kaldi_entries(rec_set, sup_set, single_channel, map_underscores_to="-"):
+    """
+    yields the (Kaldi file, key, value) entries of one session,
+    as lhotse export_to_kaldi: single channel recordings without channel affix.
+    """
+    for rec in rec_set:
+        wav_entries = []
+        for source in rec.sources:
+            wav_map = make_wavscp_channel_string_map(
+                source, sampling_rate=rec.sampling_rate, transforms=rec.transforms
+            )
+            wav_entries.extend((c, wav_map[c]) for c in source.channels)
+        if single_channel:
+            yield "wav.scp", rec.id, wav_entries[-1][1]
+            yield "reco2dur", rec.id, rec.duration
+            continue
+        for c, wav in wav_entries:
+            yield "wav.scp", f"{rec.id}_{c}", wav
+            yield "reco2dur", f"{rec.id}_{c}", rec.duration
+    for sup in sup_set:
+        utt_id = sup.id.replace("_", map_underscores_to)
+        speaker = sup.speaker.replace("_", map_underscores_to)
+        if single_channel:
+            keys = [(utt_id, sup.recording_id)]
+        else:
+            keys = [
+                (f"{utt_id}-{c}", f"{sup.recording_id}_{c}")
+                for c in to_list(sup.channel)
+            ]
+        for key, rec_id in keys:
+            yield "segments", key, f"{rec_id} {sup.start} {sup.end}"
+            yield "text", key, sup.text
+            yield "utt2spk", key, speaker
+            yield "utt2dur", key, sup.duration
+
+
+def write_kaldi_dir(sessions, output_dir: Pathlike, map_underscores_to="-"):
+    """
+    Writes a Kaldi data directory session by session, producing the same files
+    as lhotse export_to_kaldi(prefix_spk_id=False) but without building and
+    walking again the lhotse manifests of the whole partition.
+    The entries of each session are appended to temporary files as the session
+    arrives, each file is sorted at the end, one at a time.
+    As the channel affix depends on all the recordings being single channel,
+    both layouts are written until a multi-channel recording shows up.
+    :param sessions: iterable of (RecordingSet, SupervisionSet) pairs,
+        one for each session e.g. from iter_lhotse_sessions.
+    :param output_dir: Pathlike, the Kaldi data directory.
+    :param map_underscores_to: str, replaces underscores in utterance
+        and speaker ids.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def tmp_file(name, single_channel):
+        layout = "single" if single_channel else "multi"
+        return output_dir / f".{name}.{layout}.tmp"
+
+    files = {
+        (name, single_channel): open(tmp_file(name, single_channel), "w")
+        for name in KALDI_FILES
+        for single_channel in [True, False]
+    }
+    all_single_channel = True
+    try:
+        for rec_set, sup_set in sessions:
+            if all_single_channel and any(r.num_channels != 1 for r in rec_set):
+                all_single_channel = False
+                for name in KALDI_FILES:
+                    files.pop((name, True)).close()
+            for single_channel in [True, False] if all_single_channel else [False]:
+                for name, key, value in _kaldi_entries(
+                    rec_set, sup_set, single_channel, map_underscores_to
+                ):
+                    print(key, value, file=files[name, single_channel])
+    finally:
+        for f in files.values():
+            f.close()
+
+    for name in KALDI_FILES:
+        # as save_kaldi_text_mapping: sorted, the last entry of a key wins
+        with open(tmp_file(name, all_single_channel)) as f:
+            entries = dict(line.rstrip("\n").split(" ", 1) for line in f)
+        save_kaldi_text_mapping(data=entries, path=output_dir / name)
+        del entries
+    for name in KALDI_FILES:
+        for single_channel in [True, False]:
+            tmp_file(name, single_channel).unlink(missing_ok=True)
+
+
+def prepare_kaldi_shared(
+    corpus_dir: Pathlike,
+    output_dir: Pathlike,
+    dset_part: str = "dev",
+    mic: str = "mdm",
+    corpus_name: str = "chime6",
+    json_dir: Optional[Pathlike] = None,
+    txt_norm: Optional[str] = "chime8",
+    discard_problematic: bool = False,
+    num_jobs: int = 1,
+):
+    """
+    shared func to handle all Kaldi/ESPNet preparation, the data directory
+    is written to output_dir/dset_part.
+    See the espnet prep functions for the actual datasets for what the args are for.
+    """
+    assert mic in ["ihm", "mdm"], "mic must be one of 'ihm' or 'mdm'"
+    sessions = iter_lhotse_sessions(
+        corpus_dir,
+        dset_part,
+        mic,
+        corpus_name,
+        json_dir,
+        txt_norm,
+        discard_problematic,
+        num_jobs=num_jobs,
+    )
+    write_kaldi_dir(sessions, os.path.join(output_dir, dset_part))
 
 
 def prepare_chime6(
@@ -19,6 +142,7 @@ def prepare_chime6(
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     discard_problematic: Optional[bool] = True,
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Creates Kaldi-style manifests for CHiME-6.
@@ -39,21 +163,19 @@ def prepare_chime6(
         see https://chimechallenge.github.io/chime6/track1_data.html)
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
     """
-    manifests = lhotse_prep.prepare_chime6(
-        corpus_dir, None, dset_part, mic, json_dir, discard_problematic, txt_norm
+    prepare_kaldi_shared(
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "chime6",
+        json_dir,
+        txt_norm,
+        discard_problematic=discard_problematic,
+        num_jobs=num_jobs,
     )
-    # now we need to convert manifests to kaldi format via lhotse
-    for k in manifests.keys():
-        c_out_dir = os.path.join(output_dir, k)
-        os.makedirs(c_out_dir, exist_ok=True)
-        export_to_kaldi(
-            manifests[k]["recordings"],
-            manifests[k]["supervisions"],
-            c_out_dir,
-            prefix_spk_id=False,  # already appended
-            map_underscores_to="-",
-        )
 
 
 def prepare_dipco(
@@ -65,6 +187,7 @@ def prepare_dipco(
         Pathlike
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Creates Kaldi-style manifests for DiPCo.
@@ -82,24 +205,21 @@ def prepare_dipco(
          https://github.com/chimechallenge/CHiME7_DASR_falign.
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
     :return dict: Dict whose key is the dataset part
         ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
     """
-    manifests = lhotse_prep.prepare_dipco(
-        corpus_dir, None, dset_part, mic, json_dir, txt_norm
+    prepare_kaldi_shared(
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "dipco",
+        json_dir,
+        txt_norm,
+        num_jobs=num_jobs,
     )
-    # now we need to convert manifests to kaldi format via lhotse
-    for k in manifests.keys():
-        c_out_dir = os.path.join(output_dir, k)
-        os.makedirs(c_out_dir, exist_ok=True)
-        export_to_kaldi(
-            manifests[k]["recordings"],
-            manifests[k]["supervisions"],
-            c_out_dir,
-            prefix_spk_id=False,  # already appended
-            map_underscores_to="-",
-        )
 
 
 def prepare_mixer6(
@@ -111,6 +231,7 @@ def prepare_mixer6(
         Pathlike
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Creates Kaldi-style manifests for Mixer6.
@@ -122,24 +243,21 @@ def prepare_mixer6(
         For MDM, there are 11 channels.
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
     :return dict: Dict whose key is the dataset part
     ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
     """
-    manifests = lhotse_prep.prepare_mixer6(
-        corpus_dir, None, dset_part, mic, json_dir, txt_norm
+    prepare_kaldi_shared(
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "mixer6",
+        json_dir,
+        txt_norm,
+        num_jobs=num_jobs,
     )
-    # now we need to convert manifests to kaldi format via lhotse
-    for k in manifests.keys():
-        c_out_dir = os.path.join(output_dir, k)
-        os.makedirs(c_out_dir, exist_ok=True)
-        export_to_kaldi(
-            manifests[k]["recordings"],
-            manifests[k]["supervisions"],
-            c_out_dir,
-            prefix_spk_id=False,  # already appended
-            map_underscores_to="-",
-        )
 
 
 def prepare_notsofar1(
@@ -151,6 +269,7 @@ def prepare_notsofar1(
         Pathlike
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Creates Kaldi-style manifests for NOTSOFAR1.
@@ -162,21 +281,18 @@ def prepare_notsofar1(
         For MDM, there are 11 channels.
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
     :return dict: Dict whose key is the dataset part
     ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
     """
-    manifests = lhotse_prep.prepare_notsofar1(
-        corpus_dir, None, dset_part, mic, json_dir, txt_norm
+    prepare_kaldi_shared(
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "notsofar1",
+        json_dir,
+        txt_norm,
+        num_jobs=num_jobs,
     )
-    # now we need to convert manifests to kaldi format via lhotse
-    for k in manifests.keys():
-        c_out_dir = os.path.join(output_dir, k)
-        os.makedirs(c_out_dir, exist_ok=True)
-        export_to_kaldi(
-            manifests[k]["recordings"],
-            manifests[k]["supervisions"],
-            c_out_dir,
-            prefix_spk_id=False,  # already appended
-            map_underscores_to="-",
-        )
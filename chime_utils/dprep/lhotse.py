@@ -5,10 +5,12 @@ Plus lhotse parsing recipe for NOTSOFAR1.
 """
 
 
-import json
 import logging
 import os.path
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Dict, Optional, Union
 
@@ -18,7 +20,13 @@ from lhotse.audio import AudioSource, Recording, RecordingSet
 from lhotse.supervision import SupervisionSegment, SupervisionSet
 from lhotse.utils import Pathlike
 
-from chime_utils.dprep.utils import read_uem
+from chime_utils.dprep.utils import (
+    CHIME6_PROBLEMATIC,
+    DasrIndex,
+    get_ihm_device_index,
+    read_devices,
+)
+from chime_utils.json_backend import load_json
 from chime_utils.text_norm import get_txt_norm
 
 logging.basicConfig(
@@ -44,6 +52,8 @@ def prepare_chime6(
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     discard_problematic: Optional[bool] = True,
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
+    streaming: bool = False,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Returns the Lhotse speech
@@ -65,6 +75,9 @@ def prepare_chime6(
         see https://chimechallenge.github.io/chime6/track1_data.html)
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
+    :param streaming: bool, write the manifests session by session
+        to bound memory usage, the returned manifests are lazily loaded.
     :return dict: Dict whose key is the dataset part
         ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
@@ -80,6 +93,8 @@ def prepare_chime6(
         json_dir,
         txt_norm,
         discard_problematic,
+        num_jobs=num_jobs,
+        streaming=streaming,
     )
     return manifests
 
@@ -93,6 +108,8 @@ def prepare_dipco(
         Pathlike
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
+    streaming: bool = False,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Returns the manifests which consist of the Recordings and Supervisions
@@ -109,6 +126,9 @@ def prepare_dipco(
         created with forced alignment.
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
+    :param streaming: bool, write the manifests session by session
+        to bound memory usage, the returned manifests are lazily loaded.
     :return dict: Dict whose key is the dataset part
         ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
@@ -117,7 +137,15 @@ def prepare_dipco(
     assert mic in ["ihm", "mdm"], "mic must be one of 'ihm' or 'mdm'"
 
     manifests = prep_lhotse_shared(
-        corpus_dir, output_dir, dset_part, mic, "dipco", json_dir, txt_norm
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "dipco",
+        json_dir,
+        txt_norm,
+        num_jobs=num_jobs,
+        streaming=streaming,
     )
     return manifests
 
@@ -131,6 +159,8 @@ def prepare_mixer6(
         Pathlike
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
+    streaming: bool = False,
 ) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
     """
     Returns the manifests which consist of the Recordings and Supervisions
@@ -142,6 +172,9 @@ def prepare_mixer6(
         For MDM, there are 11 channels.
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
+    :param streaming: bool, write the manifests session by session
+        to bound memory usage, the returned manifests are lazily loaded.
     :return dict: Dict whose key is the dataset part
     ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
@@ -150,7 +183,15 @@ def prepare_mixer6(
     assert mic in ["ihm", "mdm"], "mic must be one of 'ihm' or 'mdm'"
 
     manifests = prep_lhotse_shared(
-        corpus_dir, output_dir, dset_part, mic, "mixer6", json_dir, txt_norm
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "mixer6",
+        json_dir,
+        txt_norm,
+        num_jobs=num_jobs,
+        streaming=streaming,
     )
     return manifests
 
@@ -164,6 +205,8 @@ def prepare_notsofar1(
         Pathlike
     ] = None,  # alternative annotation e.g. from non-oracle diarization
     txt_norm: Optional[str] = "chime8",
+    num_jobs: int = 1,
+    streaming: bool = False,
 ):
     """
     Returns the manifests which consist of the Recordings and Supervisions
@@ -177,22 +220,43 @@ def prepare_notsofar1(
         created with forced alignment.
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :param num_jobs: int, number of sessions prepared in parallel.
+    :param streaming: bool, write the manifests session by session
+        to bound memory usage, the returned manifests are lazily loaded.
     :return dict: Dict whose key is the dataset part
         ("train", "dev" and "eval"), and the
         value is Dicts with the keys 'recordings' and 'supervisions'.
     """
     assert mic in ["ihm", "mdm"], "mic must be one of 'ihm' or 'mdm'"
     manifests = prep_lhotse_shared(
-        corpus_dir, output_dir, dset_part, mic, "notsofar1", json_dir, txt_norm
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "notsofar1",
+        json_dir,
+        txt_norm,
+        num_jobs=num_jobs,
+        streaming=streaming,
     )
     return manifests
 
 
 def get_sess_audio(
-    corpus_dir, corpus_name, dset_part, sess_name, mic, discard_problematic=False
+    corpus_dir,
+    corpus_name,
+    dset_part,
+    sess_name,
+    mic,
+    discard_problematic=False,
+    ihm_index=None,
+    device_info=None,
 ):
     """
     used for shared_lhotse prep to parse audio files in recordings.
+    For ihm, ihm_index is the session close-talk device index
+    (see chime_utils.dprep.utils.get_ihm_device_index), computed if None.
+    device_info is the session devices JSON content, read if None.
     """
     audio_dir = os.path.join(corpus_dir, "audio", dset_part)
     all_audio_files = [x for x in Path(audio_dir).iterdir()]
@@ -205,47 +269,21 @@ def get_sess_audio(
             )
 
     recordings = []
-    with open(
-        os.path.join(corpus_dir, "devices", dset_part, sess_name + ".json"), "r"
-    ) as f:
-        device_info = json.load(f)
-
     if mic == "ihm":
-        spk2rec = {}
-        for device_name, c_device in device_info.items():
-            suffix = ".wav" if corpus_name != "mixer6" else ".flac"
-            file_path = os.path.join(audio_dir, device_name) + suffix
-
-            if not file_path:
-                logger.error(f"{device_name} not found in {file_path}")
-
-            if not c_device["is_close_talk"]:
-                continue
-
-            spk_id = c_device["speaker"]
-            assert spk_id is not None
-            channels = [0, 1] if corpus_name == "chime6" else [0]
-            if spk_id not in spk2rec.keys():
-                spk2rec[spk_id] = []
-            spk2rec[spk_id].append(
-                AudioSource(type="file", channels=channels, source=file_path)
+        if ihm_index is None:
+            ihm_index = get_ihm_device_index(
+                corpus_dir, corpus_name, dset_part, sess_name, device_info
             )
-
-        for spk_id, c_src in spk2rec.items():
-            if len(c_src) == 2:
-                # override channels
-                assert corpus_name == "mixer6"
-                c_src = [
-                    AudioSource(type="file", channels=[idx], source=str(x.source))
-                    for idx, x in enumerate(c_src)
-                ]
-            sources = sorted(c_src, key=lambda x: Path(x.source).stem)
+        for spk_id, c_spk in ihm_index.items():
+            sources = [
+                AudioSource(type="file", channels=channels, source=file_path)
+                for file_path, channels in c_spk["sources"]
+            ]
             sf_info = sf.SoundFile(str(sources[0].source))
-            recid = "{}-{}".format(sess_name, spk_id)
 
             recordings.append(
                 Recording(
-                    id=recid,
+                    id=c_spk["recording_id"],
                     sources=sources,
                     sampling_rate=int(sf_info.samplerate),
                     num_samples=sf_info.frames,
@@ -253,6 +291,9 @@ def get_sess_audio(
                 )
             )
     else:
+        if device_info is None:
+            device_info = read_devices(corpus_dir, dset_part, sess_name)
+
         sources = []
         for device_name, c_device in device_info.items():
             suffix = ".wav" if corpus_name != "mixer6" else ".flac"
@@ -264,7 +305,7 @@ def get_sess_audio(
                 continue
 
             if discard_problematic and corpus_name == "chime6":
-                if device_name in ["S12_U05", "S24_U06", "S18_U06"]:
+                if device_name.split(".")[0] in CHIME6_PROBLEMATIC:
                     logger.warning(
                         f"Skipping {device_name} as it is problematic in {corpus_name}, {sess_name}."
                     )
@@ -298,133 +339,340 @@ def get_sess_audio(
     return recordings
 
 
-def prep_lhotse_shared(
+def get_sess_supervisions(
+    corpus_dir,
+    corpus_name,
+    dset_part,
+    sess_name,
+    mic,
+    c_recs,
+    transcriptions_dir,
+    ihm_index=None,
+):
+    """
+    used for shared_lhotse prep to parse the supervisions of one session.
+    For ihm, ihm_index is the session close-talk device index
+    (see chime_utils.dprep.utils.get_ihm_device_index).
+    """
+    if mic != "ihm":
+        assert (
+            len(c_recs) == 1
+        ), "If mic is mdm then there is one recording for each session, containing all far-field arrays."
+    elif ihm_index is None:
+        ihm_index = get_ihm_device_index(corpus_dir, corpus_name, dset_part, sess_name)
+
+    with open(os.path.join(transcriptions_dir, sess_name + ".json"), "r") as f:
+        c_ann = load_json(f)
+
+    supervisions = []
+    for idx, utt in enumerate(c_ann):
+        spk_id = utt["speaker"]
+        start = float(utt["start_time"])
+        end = float(utt["end_time"])
+        if mic != "ihm":
+            channels = list(range(len(c_recs[0].sources)))
+            rec_id = sess_name
+        else:
+            if spk_id in ihm_index.keys():
+                rec_id = ihm_index[spk_id]["recording_id"]
+                channels = ihm_index[spk_id]["channels"]
+            else:
+                # no close-talk for this speaker, dropped by fix_manifests
+                rec_id = "{}-{}".format(sess_name, spk_id)
+                channels = [0]
+
+            # dump only with
+        ex_id = (
+            f"{spk_id}_{corpus_name}_{sess_name}_{idx}-"
+            f"{round(100 * start):06d}_{round(100 * end):06d}-{mic}"
+        )
+        # spk-first as in kaldi convention
+        supervisions.append(
+            SupervisionSegment(
+                id=ex_id,
+                recording_id=rec_id,
+                start=start,
+                duration=end - start,
+                channel=channels,
+                text=utt["words"],
+                speaker=utt["speaker"],
+            )
+        )
+    return supervisions
+
+
+def prep_lhotse_session(
+    sess_name,
+    corpus_dir,
+    corpus_name,
+    dset_part,
+    mic,
+    discard_problematic,
+    transcriptions_dir,
+    device_info=None,
+):
+    """
+    used for shared_lhotse prep, parses recordings and supervisions
+    (if transcriptions_dir is not None) for one session.
+    device_info is the session devices JSON content, read if None.
+    """
+    if device_info is None:
+        device_info = read_devices(corpus_dir, dset_part, sess_name)
+    ihm_index = None
+    if mic == "ihm":
+        ihm_index = get_ihm_device_index(
+            corpus_dir, corpus_name, dset_part, sess_name, device_info
+        )
+    c_recs = get_sess_audio(
+        corpus_dir,
+        corpus_name,
+        dset_part,
+        sess_name,
+        mic,
+        discard_problematic,
+        ihm_index,
+        device_info,
+    )
+    c_sups = None
+    if transcriptions_dir is not None:
+        c_sups = get_sess_supervisions(
+            corpus_dir,
+            corpus_name,
+            dset_part,
+            sess_name,
+            mic,
+            c_recs,
+            transcriptions_dir,
+            ihm_index,
+        )
+    return c_recs, c_sups
+
+
+def get_dummy_supervision(sess_name, uem):
+    """
+    used for shared_lhotse prep when ground truth is not available.
+    """
+    return SupervisionSegment(
+        id=sess_name,
+        recording_id=sess_name,
+        start=uem[sess_name][0],
+        duration=uem[sess_name][-1] - uem[sess_name][0],
+        channel=[0],
+        text="this is a dummy supervisions manifests as the ground truth was not available when it was created."
+        "this is fine for inference on evaluation or development.",
+        speaker="speaker",
+    )
+
+
+def iter_sessions(prep_session, sess_args, num_jobs=1):
+    """
+    used for shared_lhotse prep, yields prep_session(**kwargs) results following
+    sess_args order (a list of kwargs dicts). With num_jobs > 1 sessions are processed in parallel,
+    keeping at most 2 * num_jobs of them in flight.
+    """
+    if num_jobs <= 1:
+        for kwargs in sess_args:
+            yield prep_session(**kwargs)
+        return
+
+    with ProcessPoolExecutor(num_jobs) as ex:
+        pending = deque()
+        for kwargs in sess_args:
+            pending.append(ex.submit(prep_session, **kwargs))
+            if len(pending) >= 2 * num_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_raw_sessions(
     corpus_dir: Pathlike,
-    output_dir: Optional[Pathlike] = None,
     dset_part: Optional[str] = "dev",
     mic: Optional[str] = "mdm",
     corpus_name="dipco",
     ann_dir: Optional[Pathlike] = None,
-    txt_norm: Optional[str] = "chime8",
     discard_problematic=False,
     discard_sess_regex=None,
-) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
+    num_jobs: int = 1,
+):
     """
-    shared func to handle all lhotse preparation.
-    See the lhotse_prep functions for the actual datasets for what the args are for.
+    used for shared_lhotse prep, yields following the UEM order the session name
+    and the lists of Recording and SupervisionSegment for each session
+    (a dummy supervision if the ground truth is not available).
     """
     corpus_dir = Path(corpus_dir).resolve()
-
-    if output_dir is not None:
-        output_dir = Path(output_dir).resolve()
-        output_dir.mkdir(parents=True, exist_ok=True)
     assert corpus_dir.is_dir(), f"No such directory: {corpus_dir}"
-    txt_normalizer = get_txt_norm(txt_norm)
 
-    uem_file = os.path.join(corpus_dir, "uem", dset_part, "all.uem")
-    uem = read_uem(uem_file)
+    index = DasrIndex.load(corpus_dir)
+    uem = index.uem(dset_part)
 
     logger.info(
         f"Found {len(uem.keys())} sessions for {corpus_dir.stem}, {dset_part} set."
     )
 
-    sess2rec = {}
-    recordings = []
     for sess_name in uem.keys():
         if discard_sess_regex is not None and re.match(discard_sess_regex, sess_name):
             logger.warning(
                 f"Skipping {sess_name}, it will not be included in the final manifest."
             )
         # do not skip, getting the audio files
-        c_recs = get_sess_audio(
-            corpus_dir, corpus_name, dset_part, sess_name, mic, discard_problematic
-        )
-        if sess_name not in sess2rec.keys():
-            sess2rec[sess_name] = []
-        sess2rec[sess_name].extend(c_recs)
-        recordings.extend(c_recs)
 
     # now prepare supervisions if possible
     transcriptions_dir = os.path.join(corpus_dir, "transcriptions", dset_part)
-    if ann_dir is not None or os.path.exists(transcriptions_dir):
-        if ann_dir is not None:
-            logger.warning(f"Using alternative annotation in {ann_dir}.")
-            transcriptions_dir = ann_dir
-        supervisions = []
-        for sess_name in uem.keys():
-            c_recs = sess2rec[sess_name]
-            if mic != "ihm":
-                assert (
-                    len(c_recs) == 1
-                ), "If mic is mdm then there is one recording for each session, containing all far-field arrays."
-
-            with open(os.path.join(transcriptions_dir, sess_name + ".json"), "r") as f:
-                c_ann = json.load(f)
-
-            for idx, utt in enumerate(c_ann):
-                spk_id = utt["speaker"]
-                start = float(utt["start_time"])
-                end = float(utt["end_time"])
-                if mic != "ihm":
-                    channels = list(range(len(c_recs[0].sources)))
-                    rec_id = sess_name
-                else:
-                    rec_id = "{}-{}".format(sess_name, spk_id)
-
-                    if corpus_name == "mixer6":
-                        with open(
-                            os.path.join(
-                                corpus_dir, "devices", dset_part, sess_name + ".json"
-                            ),
-                            "r",
-                        ) as f:
-                            c_devices = json.load(f)
-
-                        dev2spk = [
-                            1 for k, v in c_devices.items() if v["speaker"] == spk_id
-                        ]
-                        channels = list(range(len(dev2spk)))
-                        assert channels in [[0], [0, 1]]
-                    else:
-                        channels = [0, 1] if corpus_name == "chime6" else [0]
-
-                    # dump only with
-                ex_id = (
-                    f"{spk_id}_{corpus_name}_{sess_name}_{idx}-"
-                    f"{round(100 * start):06d}_{round(100 * end):06d}-{mic}"
-                )
-                # spk-first as in kaldi convention
-                supervisions.append(
-                    SupervisionSegment(
-                        id=ex_id,
-                        recording_id=rec_id,
-                        start=start,
-                        duration=end - start,
-                        channel=channels,
-                        text=utt["words"],
-                        speaker=utt["speaker"],
-                    )
-                )
-
-        # using regular annotation
-    else:
+    if ann_dir is not None:
+        logger.warning(f"Using alternative annotation in {ann_dir}.")
+        transcriptions_dir = ann_dir
+    elif not os.path.exists(transcriptions_dir):
+        transcriptions_dir = None
+
+    prep_session = partial(
+        prep_lhotse_session,
+        corpus_dir=corpus_dir,
+        corpus_name=corpus_name,
+        dset_part=dset_part,
+        mic=mic,
+        discard_problematic=discard_problematic,
+        transcriptions_dir=transcriptions_dir,
+    )
+    if transcriptions_dir is None:
         logger.warning(
             "Oracle ground truth transcriptions are not available. A dummy supervisions manifest will be created !"
         )
-        supervisions = []
-        for sess_name in uem.keys():
-            supervisions.append(
-                SupervisionSegment(
-                    id=sess_name,
-                    recording_id=sess_name,
-                    start=uem[sess_name][0],
-                    duration=uem[sess_name][-1] - uem[sess_name][0],
-                    channel=[0],
-                    text="this is a dummy supervisions manifests as the ground truth was not available when it was created."
-                    "this is fine for inference on evaluation or development.",
-                    speaker="speaker",
-                )
+
+    sess_args = [
+        {"sess_name": x, "device_info": index.devices(dset_part, x)} for x in uem.keys()
+    ]
+    per_session = iter_sessions(prep_session, sess_args, num_jobs)
+    for sess_name, (c_recs, c_sups) in zip(uem.keys(), per_session):
+        if c_sups is None:
+            c_sups = [get_dummy_supervision(sess_name, uem)]
+        yield sess_name, c_recs, c_sups
+
+
+def iter_lhotse_sessions(
+    corpus_dir: Pathlike,
+    dset_part: Optional[str] = "dev",
+    mic: Optional[str] = "mdm",
+    corpus_name="dipco",
+    ann_dir: Optional[Pathlike] = None,
+    txt_norm: Optional[str] = "chime8",
+    discard_problematic=False,
+    discard_sess_regex=None,
+    num_jobs: int = 1,
+):
+    """
+    used for streaming lhotse prep, yields following the UEM order the
+    RecordingSet and SupervisionSet of each session, already fixed,
+    text normalized and validated.
+    Sessions left without recordings or supervisions are skipped.
+    """
+    txt_normalizer = get_txt_norm(txt_norm)
+    for sess_name, c_recs, c_sups in iter_raw_sessions(
+        corpus_dir,
+        dset_part,
+        mic,
+        corpus_name,
+        ann_dir,
+        discard_problematic,
+        discard_sess_regex,
+        num_jobs,
+    ):
+        if not set(r.id for r in c_recs).intersection(s.recording_id for s in c_sups):
+            logger.warning(
+                f"No supervisions left for {sess_name} recordings, skipping it."
             )
+            continue
+        c_rec_set, c_sup_set = fix_manifests(
+            RecordingSet.from_recordings(c_recs),
+            SupervisionSet.from_segments(c_sups),
+        )
+        if txt_normalizer is not None:
+            c_sup_set = c_sup_set.transform_text(txt_normalizer)
+        validate_recordings_and_supervisions(c_rec_set, c_sup_set)
+        yield c_rec_set, c_sup_set
+
+
+def prep_lhotse_shared(
+    corpus_dir: Pathlike,
+    output_dir: Optional[Pathlike] = None,
+    dset_part: Optional[str] = "dev",
+    mic: Optional[str] = "mdm",
+    corpus_name="dipco",
+    ann_dir: Optional[Pathlike] = None,
+    txt_norm: Optional[str] = "chime8",
+    discard_problematic=False,
+    discard_sess_regex=None,
+    num_jobs: int = 1,
+    streaming: bool = False,
+) -> Dict[str, Dict[str, Union[RecordingSet, SupervisionSet]]]:
+    """
+    shared func to handle all lhotse preparation.
+    See the lhotse_prep functions for the actual datasets for what the args are for.
+    Sessions are parsed in parallel with num_jobs processes,
+    results are merged following the UEM session order.
+    With streaming=True each session is fixed, normalized, validated and written
+    on its own, so memory is bounded by the largest session, the manifests
+    returned are lazily opened from output_dir (which is then required).
+    """
+    if streaming and output_dir is None:
+        raise ValueError(
+            "streaming lhotse prep writes to output_dir, it can't be None."
+        )
+    recordings_file = None
+    supervisions_file = None
+    if output_dir is not None:
+        output_dir = Path(output_dir).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        recordings_file = os.path.join(
+            output_dir, f"{corpus_name}-{mic}_recordings_{dset_part}.jsonl.gz"
+        )
+        supervisions_file = os.path.join(
+            output_dir, f"{corpus_name}-{mic}_supervisions_{dset_part}.jsonl.gz"
+        )
+
+    if streaming:
+        # fix, normalize, validate and write one session at a time
+        with RecordingSet.open_writer(
+            recordings_file
+        ) as rec_writer, SupervisionSet.open_writer(supervisions_file) as sup_writer:
+            for c_rec_set, c_sup_set in iter_lhotse_sessions(
+                corpus_dir,
+                dset_part,
+                mic,
+                corpus_name,
+                ann_dir,
+                txt_norm,
+                discard_problematic,
+                discard_sess_regex,
+                num_jobs,
+            ):
+                for rec in c_rec_set:
+                    rec_writer.write(rec)
+                for sup in c_sup_set:
+                    sup_writer.write(sup)
+        manifests = {
+            f"{dset_part}": {
+                "recordings": rec_writer.open_manifest(),
+                "supervisions": sup_writer.open_manifest(),
+            }
+        }
+        return manifests
+
+    txt_normalizer = get_txt_norm(txt_norm)
+    recordings = []
+    supervisions = []
+    for _, c_recs, c_sups in iter_raw_sessions(
+        corpus_dir,
+        dset_part,
+        mic,
+        corpus_name,
+        ann_dir,
+        discard_problematic,
+        discard_sess_regex,
+        num_jobs,
+    ):
+        recordings.extend(c_recs)
+        supervisions.extend(c_sups)
 
     recording_set, supervision_set = fix_manifests(
         RecordingSet.from_recordings(recordings),
@@ -435,16 +683,8 @@ def prep_lhotse_shared(
         supervision_set = supervision_set.transform_text(txt_normalizer)
     validate_recordings_and_supervisions(recording_set, supervision_set)
     if output_dir is not None:
-        supervision_set.to_file(
-            os.path.join(
-                output_dir, f"{corpus_name}-{mic}_supervisions_{dset_part}.jsonl.gz"
-            )
-        )
-        recording_set.to_file(
-            os.path.join(
-                output_dir, f"{corpus_name}-{mic}_recordings_{dset_part}.jsonl.gz"
-            )
-        )
+        supervision_set.to_file(supervisions_file)
+        recording_set.to_file(recordings_file)
 
     manifests = {
         f"{dset_part}": {"recordings": recording_set, "supervisions": supervision_set}
@@ -0,0 +1,131 @@
+"""
+Streaming transforms for lhotse jsonl(.gz) manifests.
+Manifests are rewritten line by line, so memory does not grow with their size,
+and multiple manifest files can be processed in parallel.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from chime_utils.text_norm import get_txt_norm
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s "
+        "[%(filename)s:%(lineno)d]"
+        " %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _is_supervision(item):
+    return "recording_id" in item.keys() and "sources" not in item.keys()
+
+
+def transform_manifest(
+    input_manifest,
+    output_manifest,
+    txt_norm=None,
+    min_len=0.0,
+    max_len=np.inf,
+    speakers=None,
+):
+    """
+    Streams a lhotse manifest applying, in this order, text normalization,
+    length filtering and speaker filtering to its supervisions.
+    Items that are not supervisions (e.g. recordings) are copied unchanged.
+    :param input_manifest: Pathlike, lhotse .jsonl or .jsonl.gz manifest.
+    :param output_manifest: Pathlike, where to write the new manifest.
+    :param txt_norm: str, which text normalization to apply,
+        choose between 'chime6', 'chime7', 'chime8' or None.
+    :param min_len: float, supervisions shorter than this are discarded.
+    :param max_len: float, supervisions longer than this are discarded.
+    :param speakers: list, if not None supervisions from other speakers are discarded.
+    :return: tuple, number of supervisions read and number of supervisions written.
+    """
+    txt_normalizer = get_txt_norm(txt_norm)
+    speakers = set(speakers) if speakers is not None else None
+    n_in = 0
+    n_out = 0
+    with _open(input_manifest, "r") as f_in, _open(output_manifest, "w") as f_out:
+        for line in f_in:
+            item = json.loads(line)
+            if not _is_supervision(item):
+                f_out.write(line)
+                continue
+            n_in += 1
+            if txt_normalizer is not None and item.get("text") is not None:
+                item["text"] = txt_normalizer(item["text"])
+            if item["duration"] < min_len or item["duration"] > max_len:
+                continue
+            if speakers is not None and item.get("speaker") not in speakers:
+                continue
+            n_out += 1
+            print(json.dumps(item, ensure_ascii=False), file=f_out)
+    return n_in, n_out
+
+
+def transform_manifests(
+    manifests,
+    output_dir,
+    txt_norm=None,
+    min_len=0.0,
+    max_len=np.inf,
+    speakers=None,
+    num_jobs=1,
+):
+    """
+    Applies transform_manifest to multiple manifests in parallel, the
+    new manifests are written to output_dir with the same file name.
+    Recordings manifests (*recordings*) are copied as they are.
+    See transform_manifest for the other arguments.
+    :param manifests: list, paths to the lhotse manifests.
+    :param output_dir: Pathlike, output directory.
+    :param num_jobs: int, number of manifests processed in parallel.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    to_transform = []
+    for man in manifests:
+        name = Path(man).stem + Path(man).suffix
+        if "recordings" in name:
+            shutil.copyfile(man, os.path.join(output_dir, name))
+            continue
+        to_transform.append((man, os.path.join(output_dir, name)))
+
+    transform = partial(
+        transform_manifest,
+        txt_norm=txt_norm,
+        min_len=min_len,
+        max_len=max_len,
+        speakers=speakers,
+    )
+    if num_jobs > 1 and len(to_transform) > 1:
+        with ProcessPoolExecutor(num_jobs) as ex:
+            futures = [ex.submit(transform, *x) for x in to_transform]
+            results = [f.result() for f in futures]
+    else:
+        results = [transform(*x) for x in to_transform]
+
+    for (man, _), (n_in, n_out) in zip(to_transform, results):
+        if n_in != n_out:
+            logger.info(
+                f"Discarded {n_in - n_out} supervisions from {man}. "
+                f"Original length: {n_in}, New length: {n_out}."
+            )
@@ -0,0 +1,260 @@
+"""
+Consolidated memory-mappable audio store for multi-channel sessions.
+Each recording is packed into a single .c8mm file: a small JSON header
+followed by interleaved int16 samples (num_samples x num_channels), so reading
+a multi-channel segment is a single contiguous slice with no decoding.
+"""
+
+import json
+import logging
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+from lhotse import RecordingSet, load_manifest
+from lhotse.audio import AudioSource, Recording
+from lhotse.audio.backend import (
+    AudioBackend,
+    CompositeAudioBackend,
+    LibsndfileCompatibleAudioInfo,
+    get_current_audio_backend,
+    set_current_audio_backend,
+)
+from lhotse.utils import Pathlike, Seconds, compute_num_samples
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d]" " %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+MMAP_SUFFIX = ".c8mm"
+MMAP_MAGIC = b"C8MM"
+MMAP_VERSION = 1
+# samples start on a page boundary
+MMAP_ALIGN = 4096
+# "<4sII": magic, format version, header length
+_PREAMBLE = struct.Struct("<4sII")
+_CHUNK_SAMPLES = 16000 * 60
+
+
+def _data_offset(header_len):
+    return -(-(_PREAMBLE.size + header_len) // MMAP_ALIGN) * MMAP_ALIGN
+
+
+@lru_cache(maxsize=4096)
+def _read_header(path, mtime):
+    with open(path, "rb") as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MMAP_MAGIC:
+            raise ValueError(f"{path} is not a {MMAP_SUFFIX} session store.")
+        if version != MMAP_VERSION:
+            raise ValueError(
+                f"{path} has version {version}, only {MMAP_VERSION} is supported."
+            )
+        header = json.loads(f.read(header_len))
+    header["data_offset"] = _data_offset(header_len)
+    return header
+
+
+def read_mmap_header(path: Pathlike) -> dict:
+    """
+    Reads the JSON header of a .c8mm file.
+    :param path: Pathlike, path to the .c8mm file.
+    :return: dict, with sampling_rate, num_samples, num_channels, dtype,
+        layout, channel_sources and data_offset (in bytes).
+    """
+    path = str(path)
+    return _read_header(path, os.path.getmtime(path))
+
+
+def read_mmap_audio(
+    path: Pathlike, offset: Seconds = 0.0, duration: Optional[Seconds] = None
+) -> Tuple[np.ndarray, int]:
+    """
+    Reads a segment of a .c8mm file.
+    :param path: Pathlike, path to the .c8mm file.
+    :param offset: float, start of the segment in seconds.
+    :param duration: float, duration of the segment in seconds,
+        if None reads until the end of the recording.
+    :return: tuple, float32 array in [-1, 1] with shape (num_channels, num_samples)
+        and the sampling rate.
+    """
+    header = read_mmap_header(path)
+    fs = header["sampling_rate"]
+    start = compute_num_samples(offset, fs)
+    stop = (
+        header["num_samples"]
+        if duration is None
+        else min(start + compute_num_samples(duration, fs), header["num_samples"])
+    )
+    data = np.memmap(
+        path,
+        dtype=np.int16,
+        mode="r",
+        offset=header["data_offset"],
+        shape=(header["num_samples"], header["num_channels"]),
+    )
+    samples = data[start:stop].T.astype(np.float32) / 32768.0
+    return samples, fs
+
+
+class MmapSessionBackend(AudioBackend):
+    """
+    lhotse audio backend reading .c8mm session stores,
+    use register_mmap_backend() to enable it.
+    """
+
+    def read_audio(
+        self,
+        path_or_fd,
+        offset: Seconds = 0.0,
+        duration: Optional[Seconds] = None,
+        force_opus_sampling_rate: Optional[int] = None,
+    ) -> Tuple[np.ndarray, int]:
+        return read_mmap_audio(path_or_fd, offset, duration)
+
+    def handles_special_case(self, path_or_fd) -> bool:
+        return self.is_applicable(path_or_fd)
+
+    def is_applicable(self, path_or_fd) -> bool:
+        return isinstance(path_or_fd, (str, Path)) and str(path_or_fd).endswith(
+            MMAP_SUFFIX
+        )
+
+    def supports_info(self) -> bool:
+        return True
+
+    def info(self, path, force_opus_sampling_rate=None, force_read_audio=False):
+        header = read_mmap_header(path)
+        return LibsndfileCompatibleAudioInfo(
+            channels=header["num_channels"],
+            frames=header["num_samples"],
+            samplerate=header["sampling_rate"],
+            duration=header["num_samples"] / header["sampling_rate"],
+        )
+
+
+def register_mmap_backend():
+    """
+    Makes lhotse able to load recordings stored as .c8mm files,
+    other files are still read with the current audio backend.
+    """
+    current = get_current_audio_backend()
+    if isinstance(current, MmapSessionBackend):
+        return
+    if isinstance(current, CompositeAudioBackend):
+        if any(isinstance(b, MmapSessionBackend) for b in current.backends):
+            return
+        backends = current.backends
+    else:
+        backends = [current]
+    set_current_audio_backend(
+        CompositeAudioBackend([MmapSessionBackend()] + list(backends))
+    )
+
+
+def write_mmap_store(recording: Recording, output_file: Pathlike) -> Recording:
+    """
+    Packs all the channels of a lhotse Recording into a single .c8mm file.
+    :param recording: lhotse Recording, with only "file" audio sources.
+    :param output_file: Pathlike, where to write the .c8mm file.
+    :return: lhotse Recording with the same id and channel ids,
+        pointing at the .c8mm file.
+    """
+    channel_ids = sorted(recording.channel_ids)
+    ch2col = {c: idx for idx, c in enumerate(channel_ids)}
+    num_samples = recording.num_samples
+    header = {
+        "recording_id": recording.id,
+        "sampling_rate": recording.sampling_rate,
+        "num_samples": num_samples,
+        "num_channels": len(channel_ids),
+        "dtype": "int16",
+        "layout": "interleaved",
+        "channel_ids": channel_ids,
+    }
+    channel_sources = [None] * len(channel_ids)
+    for src in recording.sources:
+        if src.type != "file":
+            raise ValueError(
+                f"Recording {recording.id} has a '{src.type}' audio source, "
+                f"only 'file' sources can be packed into a {MMAP_SUFFIX} file."
+            )
+        for c in src.channels:
+            channel_sources[ch2col[c]] = str(src.source)
+    header["channel_sources"] = channel_sources
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_offset = _data_offset(len(header_bytes))
+    output_file = Path(output_file)
+    tmp_file = output_file.parent / f".{output_file.name}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(_PREAMBLE.pack(MMAP_MAGIC, MMAP_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.truncate(data_offset + num_samples * len(channel_ids) * 2)
+
+    data = np.memmap(
+        tmp_file,
+        dtype=np.int16,
+        mode="r+",
+        offset=data_offset,
+        shape=(num_samples, len(channel_ids)),
+    )
+    for src in recording.sources:
+        cols = [ch2col[c] for c in src.channels]
+        with sf.SoundFile(str(src.source)) as audio:
+            assert audio.samplerate == recording.sampling_rate
+            for start in range(0, num_samples, _CHUNK_SAMPLES):
+                chunk = audio.read(
+                    min(_CHUNK_SAMPLES, num_samples - start),
+                    dtype="int16",
+                    always_2d=True,
+                )
+                data[start : start + chunk.shape[0], cols] = chunk[:, : len(cols)]
+    data.flush()
+    del data
+    os.replace(tmp_file, output_file)
+
+    return Recording(
+        id=recording.id,
+        sources=[
+            AudioSource(
+                type="file", channels=channel_ids, source=str(output_file.resolve())
+            )
+        ],
+        sampling_rate=recording.sampling_rate,
+        num_samples=num_samples,
+        duration=recording.duration,
+    )
+
+
+def mmap_store_manifest(
+    recordings_manifest: Pathlike, output_dir: Pathlike, output_manifest: Pathlike
+) -> RecordingSet:
+    """
+    Packs every recording in a lhotse recordings manifest into .c8mm files
+    and writes a new recordings manifest pointing at them.
+    :param recordings_manifest: Pathlike, lhotse recordings manifest
+        e.g. as created by `chime-utils lhotse-prep`.
+    :param output_dir: Pathlike, where the .c8mm files will be stored.
+    :param output_manifest: Pathlike, the new recordings manifest.
+    :return: lhotse RecordingSet pointing at the .c8mm files.
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    recordings = load_manifest(recordings_manifest)
+    packed = []
+    for rec in recordings:
+        output_file = Path(output_dir, rec.id + MMAP_SUFFIX)
+        logger.info(f"Packing {rec.num_channels} channels of {rec.id} in {output_file}")
+        packed.append(write_mmap_store(rec, output_file))
+    packed = RecordingSet.from_recordings(packed)
+    packed.to_file(output_manifest)
+    return packed
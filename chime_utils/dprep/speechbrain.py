@@ -1,4 +1,3 @@
-import glob
 import json
 import logging
 import os
@@ -7,6 +6,8 @@ from typing import Optional
 
 from lhotse.utils import Pathlike
 
+from chime_utils.dprep.utils import DasrIndex, get_far_field_index, get_ihm_device_index
+from chime_utils.json_backend import load_json
 from chime_utils.text_norm import get_txt_norm
 
 logging.basicConfig(
@@ -24,11 +25,18 @@ logger = logging.getLogger(__name__)
 CHIME_6_FS = 16000
 DIPCO_FS = 16000
 MIXER6_FS = 16000
+NOTSOFAR1_FS = 16000
+CORPUS_FS = {
+    "chime6": CHIME_6_FS,
+    "dipco": DIPCO_FS,
+    "mixer6": MIXER6_FS,
+    "notsofar1": NOTSOFAR1_FS,
+}
 
 
 def prepare_chime6(
     corpus_dir: Pathlike,
-    output_dir: Optional[Pathlike] = None,
+    output_dir: Pathlike,
     dset_part: str = "dev",
     mic: str = "mdm",
     json_dir: Optional[
@@ -56,119 +64,258 @@ def prepare_chime6(
         see https://chimechallenge.github.io/chime6/track1_data.html)
     :param txt_norm: str, which text normalization preprocessing
         one wishes to use; choose between 'chime7' and 'chime8' or None.
-    :return dict: Dict, see https://arxiv.org/pdf/2106.04624.pdf section
-         4.2. Speechbrain JSON annotation format for long-form audio.
+    :return str: path to the JSON manifest, see https://arxiv.org/pdf/2106.04624.pdf
+        section 4.2. Speechbrain JSON annotation format for long-form audio.
+    """
+    return prep_speechbrain_shared(
+        corpus_dir,
+        output_dir,
+        dset_part,
+        mic,
+        "chime6",
+        json_dir,
+        txt_norm,
+        discard_problematic,
+    )
+
+
+def prepare_dipco(
+    corpus_dir: Pathlike,
+    output_dir: Pathlike,
+    dset_part: str = "dev",
+    mic: str = "mdm",
+    json_dir: Optional[
+        Pathlike
+    ] = None,  # alternative annotation e.g. from non-oracle diarization
+    txt_norm: Optional[str] = "chime8",
+):
+    """
+    Returns the Speechbrain JSON manifests for DiPCo.
+    :param corpus_dir: Pathlike, the path of DiPCo main directory.
+    :param output_dir: Pathlike, the path where to write the manifests.
+    :param mic: str, the microphone type to use,
+    choose from "ihm" (close-talk) or "mdm" (multi-mic array) settings.
+        For MDM, there are 5 array devices with 7
+        channels each, so the resulting recordings will have 35 channels.
+    :param json_dir: Pathlike, override the JSON annotation directory
+        of the current dataset partition (e.g. dev).
+    :param txt_norm: str, which text normalization preprocessing
+        one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :return str: path to the JSON manifest.
+    """
+    return prep_speechbrain_shared(
+        corpus_dir, output_dir, dset_part, mic, "dipco", json_dir, txt_norm
+    )
+
+
+def prepare_mixer6(
+    corpus_dir: Pathlike,
+    output_dir: Pathlike,
+    dset_part: str = "dev",
+    mic: str = "mdm",
+    json_dir: Optional[
+        Pathlike
+    ] = None,  # alternative annotation e.g. from non-oracle diarization
+    txt_norm: Optional[str] = "chime8",
+):
+    """
+    Returns the Speechbrain JSON manifests for Mixer 6 Speech.
+    :param corpus_dir: Pathlike, the path of Mixer 6 Speech main directory.
+    :param output_dir: Pathlike, the path where to write the manifests.
+    :param mic: str, the microphone type to use,
+    choose from "ihm" (close-talk) or "mdm" (multi-mic array) settings.
+        For MDM, there are 11 channels.
+    :param json_dir: Pathlike, override the JSON annotation directory
+        of the current dataset partition (e.g. dev).
+    :param txt_norm: str, which text normalization preprocessing
+        one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :return str: path to the JSON manifest.
+    """
+    return prep_speechbrain_shared(
+        corpus_dir, output_dir, dset_part, mic, "mixer6", json_dir, txt_norm
+    )
+
+
+def prepare_notsofar1(
+    corpus_dir: Pathlike,
+    output_dir: Pathlike,
+    dset_part: str = "dev",
+    mic: str = "mdm",
+    json_dir: Optional[
+        Pathlike
+    ] = None,  # alternative annotation e.g. from non-oracle diarization
+    txt_norm: Optional[str] = "chime8",
+):
+    """
+    Returns the Speechbrain JSON manifests for NOTSOFAR1.
+    :param corpus_dir: Pathlike, the path of NOTSOFAR1 main directory.
+    :param output_dir: Pathlike, the path where to write the manifests.
+    :param mic: str, the microphone type to use,
+    choose from "ihm" (close-talk) or "mdm" (multi-mic array) settings.
+        For MDM, there are 7 channels and one circular array only.
+    :param json_dir: Pathlike, override the JSON annotation directory
+        of the current dataset partition (e.g. dev).
+    :param txt_norm: str, which text normalization preprocessing
+        one wishes to use; choose between 'chime7' and 'chime8' or None.
+    :return str: path to the JSON manifest.
+    """
+    return prep_speechbrain_shared(
+        corpus_dir, output_dir, dset_part, mic, "notsofar1", json_dir, txt_norm
+    )
+
+
+def get_sess_examples(
+    corpus_dir,
+    corpus_name,
+    dset_part,
+    session,
+    mic,
+    transcript,
+    txt_normalizer,
+    discard_problematic=False,
+    device_info=None,
+):
+    """
+    used for shared speechbrain prep, yields the (id, example) pairs
+    of one session, the audio files come from a channel index built once.
+    """
+    fs = CORPUS_FS[corpus_name]
+    if mic == "ihm":
+        ihm_index = get_ihm_device_index(
+            corpus_dir, corpus_name, dset_part, session, device_info
+        )
+    else:
+        c_audios = get_far_field_index(
+            corpus_dir,
+            corpus_name,
+            dset_part,
+            session,
+            discard_problematic,
+            device_info,
+        )
+
+    missing_spk = set()
+    for segment in transcript:
+        spk_id = segment["speaker"]
+        start = float(segment["start_time"])
+        end = float(segment["end_time"])
+
+        c_words = (
+            txt_normalizer(segment["words"])
+            if txt_normalizer is not None
+            else segment["words"]
+        )
+        if len(c_words) == 0:
+            continue
+
+        if start >= end:
+            raise RuntimeError(
+                "Current segment has negative duration ! "
+                "Something is wrong, exiting."
+                f"Current segment info: start: {start} end: "
+                f"{end} session: {session} speaker: {spk_id}"
+            )
+
+        if mic == "ihm":
+            if spk_id not in ihm_index.keys():
+                missing_spk.add(spk_id)
+                continue
+            c_audios = ihm_index[spk_id]["files"]
+            if len(c_audios) == 1:
+                (c_audios,) = c_audios
+
+        ex_id = f"{session}-{spk_id}-{round(start, 3)*100}-{round(end, 3)*100}-{mic}"
+        yield ex_id, {
+            "wav": {
+                "files": c_audios,
+                "start": int(start * fs),
+                "stop": int(end * fs),
+            },
+            "length": end - start,
+            "speaker": spk_id,
+            "words": c_words,
+        }
+
+    for spk_id in sorted(missing_spk):
+        logger.warning(
+            f"No close-talk audio for {spk_id} in {session}, skipping its segments."
+        )
+
+
+def prep_speechbrain_shared(
+    corpus_dir: Pathlike,
+    output_dir: Pathlike,
+    dset_part: str = "dev",
+    mic: str = "mdm",
+    corpus_name: str = "chime6",
+    json_dir: Optional[Pathlike] = None,
+    txt_norm: Optional[str] = "chime8",
+    discard_problematic: bool = False,
+):
+    """
+    shared func to handle all speechbrain preparation.
+    See the speechbrain prep functions for the actual datasets for what the args are for.
+    The manifest is written session by session, it has the same
+    content json.dump(manifest, f, indent=4) would produce.
     """
     txt_normalizer = get_txt_norm(txt_norm)
     assert mic in ["ihm", "mdm"], "mic must be either 'ihm' or 'mdm'."
 
     transcriptions_dir = (
-        os.path.join(corpus_dir, "transcriptions_scoring")
+        os.path.join(corpus_dir, "transcriptions_scoring", dset_part)
         if json_dir is None
         else json_dir
     )
+    if not os.path.exists(transcriptions_dir):
+        logger.error(
+            f"{transcriptions_dir} does not exist, "
+            f"speechbrain manifests need the ground truth transcriptions."
+        )
+        return
 
-    if output_dir:
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
+    index = DasrIndex.load(corpus_dir)
     all_sessions = [
-        Path(x).stem
-        for x in glob.glob(os.path.join(transcriptions_dir, dset_part, "*.json"))
+        x
+        for x in index.sessions(dset_part)
+        if os.path.exists(os.path.join(transcriptions_dir, f"{x}.json"))
     ]
 
-    manifest = {}
-    # utt_id will be like
-    for session in all_sessions:
-        with open(os.path.join(transcriptions_dir, dset_part, f"{session}.json")) as f:
-            transcript = json.load(f)
-            for idx, segment in enumerate(transcript):
-                spk_id = segment["speaker"]
-                start = float(segment["start_time"])
-                end = float(segment["end_time"])
-
-                c_words = txt_normalizer(segment["words"])
-                if len(c_words) == 0:
-                    continue
-
-                if start >= end:
-                    raise RuntimeError(
-                        "Current segment has negative duration ! "
-                        "Something is wrong, exiting."
-                        f"Current segment info: start: {start} end: "
-                        f"{end} session: {session} speaker: {spk_id}"
-                    )
-
-                if mic == "ihm":
-                    c_audio = os.path.join(
-                        corpus_dir,
-                        "audio",
-                        dset_part,
-                        f"{session}_{spk_id}.wav",
-                    )
-                    ex_id = (
-                        f"{session}-{spk_id}-"
-                        f"{round(start, 3)*100}-{round(end, 3)*100}-ihm"
-                    )
-                    manifest[ex_id] = {
-                        "wav": {
-                            "files": c_audio,
-                            "start": int(start * CHIME_6_FS),
-                            "stop": int(end * CHIME_6_FS),
-                        },
-                        "length": end - start,
-                        "speaker": spk_id,
-                        "words": c_words,
-                    }
-                elif mic == "mdm":
-                    # get all far field microphones.
-                    # we need to iterate on those
-                    c_audios = glob.glob(
-                        os.path.join(
-                            corpus_dir,
-                            "audio",
-                            dset_part,
-                            f"{session}_U0*.CH*.wav",
-                        )
-                    )
-
-                    # discard problematic here
-                    if discard_problematic and session == "S12":
-                        c_audios = [
-                            x
-                            for x in c_audios
-                            if not Path(x).stem.startswith("S12_U05")
-                        ]
-                    elif discard_problematic and session == "S24":
-                        c_audios = [
-                            x
-                            for x in c_audios
-                            if not Path(x).stem.startswith("S24_U06")
-                        ]
-                    elif discard_problematic and session == "S18":
-                        c_audios = [
-                            x
-                            for x in c_audios
-                            if not Path(x).stem.startswith("S18_U06")
-                        ]
-
-                    ex_id = (
-                        f"{session}-{spk_id}-"
-                        f"{round(start, 3) * 100}"
-                        f"-{round(end, 3) * 100}-mdm"
-                    )
-                    manifest[ex_id] = {
-                        "wav": {
-                            "files": c_audios,
-                            "start": int(start * CHIME_6_FS),
-                            "stop": int(end * CHIME_6_FS),
-                        },
-                        "length": end - start,
-                        "speaker": spk_id,
-                        "words": c_words,
-                    }
-
-        with open(os.path.join(output_dir, f"chime6-{dset_part}-{mic}.json"), "w") as f:
-            json.dump(manifest, f, indent=4)
-
-        return manifest
+    output_file = os.path.join(output_dir, f"{corpus_name}-{dset_part}-{mic}.json")
+    n_examples = 0
+    with open(output_file, "w") as f:
+        f.write("{")
+        for session in all_sessions:
+            with open(os.path.join(transcriptions_dir, f"{session}.json")) as f_sess:
+                transcript = load_json(f_sess)
+
+            # ids start with the session, duplicates (e.g. repeated segments)
+            # can only be within it: keep the last, as a dict of the whole
+            # partition would
+            examples = dict(
+                get_sess_examples(
+                    corpus_dir,
+                    corpus_name,
+                    dset_part,
+                    session,
+                    mic,
+                    transcript,
+                    txt_normalizer,
+                    discard_problematic,
+                    index.devices(dset_part, session),
+                )
+            )
+            for ex_id, example in examples.items():
+                entry = json.dumps(example, indent=4).replace("\n", "\n    ")
+                f.write("," if n_examples > 0 else "")
+                f.write(f"\n    {json.dumps(ex_id)}: {entry}")
+                n_examples += 1
+        f.write("\n}" if n_examples > 0 else "}")
+
+    logger.info(
+        f"Speechbrain manifest for {corpus_name} {dset_part} {mic} "
+        f"with {n_examples} examples written to {output_file}."
+    )
+    return output_file
@@ -0,0 +1,401 @@
+"""
+Speech activity statistics computed with an event sweep over the sorted
+segment boundaries, in O(segments log segments) time and O(segments) memory,
+instead of filling a dense (speakers x milliseconds) activity matrix.
+dataset_stats() builds per-session, per-speaker and per-device breakdowns
+for a whole DASR root.
+"""
+
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from chime_utils.dprep.utils import DasrIndex, segments_to_array
+from chime_utils.json_backend import dump_json, load_json
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d]" " %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+def _as_columns(segments):
+    if isinstance(segments, np.ndarray) and segments.dtype.names is not None:
+        return (
+            segments["speaker"].astype(str),
+            segments["start"].astype("f8"),
+            segments["end"].astype("f8"),
+        )
+    speakers = np.array([str(x[0]) for x in segments])
+    starts = np.array([float(x[1]) for x in segments], dtype="f8")
+    ends = np.array([float(x[-1]) for x in segments], dtype="f8")
+    return speakers, starts, ends
+
+
+def merge_intervals(starts, ends):
+    """
+    Union of half-open intervals [starts, ends), empty intervals are dropped.
+    :return: tuple of arrays, sorted starts and ends of the disjoint intervals.
+    """
+    keep = starts < ends
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    run_end = np.maximum.accumulate(ends[order])
+    # a new interval begins where the start is past everything seen so far
+    new = starts[1:] > run_end[:-1]
+    return starts[np.r_[True, new]], run_end[np.r_[new, True]]
+
+
+def overlap_histogram(intervals, length, max_degree=None):
+    """
+    Event sweep over per-speaker disjoint intervals.
+    :param intervals: list of (starts, ends) tuples, one for each speaker.
+    :param length: total length, used for the time with no one speaking.
+    :param max_degree: int, length of the histogram - 1,
+        defaults to the number of speakers.
+    :return: numpy array, hist[k] is the time with exactly k active speakers.
+    """
+    max_degree = len(intervals) if max_degree is None else max_degree
+    hist = np.zeros(max_degree + 1, dtype=np.result_type(length, np.int64))
+    starts = np.concatenate([x[0] for x in intervals] + [np.zeros(0, np.int64)])
+    ends = np.concatenate([x[1] for x in intervals] + [np.zeros(0, np.int64)])
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate(
+        [np.ones(len(starts), np.int64), -np.ones(len(ends), np.int64)]
+    )
+    if len(times) > 0:
+        times, inverse = np.unique(times, return_inverse=True)
+        active = np.cumsum(np.bincount(inverse, weights=deltas).astype(np.int64))
+        durations = np.diff(times)
+        np.add.at(hist, active[:-1], durations.astype(hist.dtype))
+    hist[0] = length - hist[1:].sum()
+    return hist
+
+
+def speech_activity_stats(segments, resolution=1000):
+    """
+    Statistics of the speech activity in one session.
+    Boundaries are quantized to 1/resolution seconds, relative to the start of
+    the first segment, and the session spans from the start of the first
+    segment to the end of the last one.
+    :param segments: numpy structured array with speaker, start and end fields
+        (see chime_utils.dprep.utils.segments_to_array) or list of
+        [speaker, start, end] lists.
+    :param resolution: int, number of time steps in each second.
+    :return: tuple, list with the seconds with exactly 0, 1, ..., n_speakers
+        active speakers, list of speakers and the end of the last segment.
+    """
+    speakers, starts, ends = _as_columns(segments)
+    first = starts.min()
+    last = ends.max()
+    length = int(np.ceil((last - first) * resolution))
+    # same truncation int() does, times are positive after removing first
+    q_starts = ((starts - first) * resolution).astype(np.int64)
+    q_ends = ((ends - first) * resolution).astype(np.int64)
+
+    spk_list = list(dict.fromkeys(speakers.tolist()))
+    intervals = [
+        merge_intervals(q_starts[speakers == spk], q_ends[speakers == spk])
+        for spk in spk_list
+    ]
+    hist = overlap_histogram(intervals, length)
+    speech_stats = [x / resolution for x in hist.tolist()]
+    return speech_stats, spk_list, float(last)
+
+
+def sessions_activity_stats(sessions, resolution=1000, num_jobs=1):
+    """
+    Applies speech_activity_stats to multiple sessions, in parallel.
+    :param sessions: list, segments of each session as in speech_activity_stats.
+    :param num_jobs: int, number of sessions processed in parallel.
+    :return: list, speech_activity_stats output for each session.
+    """
+    if num_jobs > 1 and len(sessions) > 1:
+        with ProcessPoolExecutor(num_jobs) as ex:
+            return list(
+                ex.map(
+                    speech_activity_stats,
+                    sessions,
+                    [resolution] * len(sessions),
+                    chunksize=max(1, len(sessions) // (4 * num_jobs)),
+                )
+            )
+    return [speech_activity_stats(x, resolution) for x in sessions]
+
+
+# segment length histogram bin edges, in seconds
+SEGMENT_LENGTH_BINS = [0.0, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, np.inf]
+
+
+def _words_per_second(n_words, duration):
+    return n_words / duration if duration > 0 else 0.0
+
+
+def session_stats(transcription_file, uem=None, devices=None, resolution=1000):
+    """
+    Statistics for one session.
+    :param transcription_file: Pathlike, CHiME-style JSON transcription.
+    :param uem: tuple, (start, stop) of the scored region, if None the session
+        spans from the start of the first segment to the end of the last one.
+    :param devices: dict, content of the devices JSON of the session.
+    :param resolution: int, number of time steps in each second.
+    :return: dict, with the session duration, speech, silence, overlap degree
+        distribution (seconds with exactly 0, 1, 2 ... active speakers),
+        UEM coverage (fraction of the UEM with speech), segment length histogram
+        (see SEGMENT_LENGTH_BINS), words per second and per-speaker and
+        per-device breakdowns.
+    """
+    with open(transcription_file, "r") as f:
+        segments = load_json(f)
+    arr = segments_to_array(segments)
+    n_words = np.array([len(x.get("words", "").split()) for x in segments], dtype=int)
+    seg_durations = arr["end"] - arr["start"]
+    if uem is not None:
+        start, stop = uem
+    elif len(arr) > 0:
+        start, stop = float(arr["start"].min()), float(arr["end"].max())
+    else:
+        start, stop = 0.0, 0.0
+    length = int(np.ceil((stop - start) * resolution))
+    q_starts = np.clip(
+        ((arr["start"] - start) * resolution).astype(np.int64), 0, length
+    )
+    q_ends = np.clip(((arr["end"] - start) * resolution).astype(np.int64), 0, length)
+
+    speakers = {}
+    intervals = []
+    for spk in dict.fromkeys(arr["speaker"].tolist()):
+        mask = arr["speaker"] == spk
+        intervals.append(merge_intervals(q_starts[mask], q_ends[mask]))
+        spk_duration = float(seg_durations[mask].sum())
+        speakers[spk] = {
+            "speaking_time": float((intervals[-1][1] - intervals[-1][0]).sum())
+            / resolution,
+            "n_segments": int(mask.sum()),
+            "n_words": int(n_words[mask].sum()),
+            "words_per_second": _words_per_second(
+                int(n_words[mask].sum()), spk_duration
+            ),
+        }
+    hist = overlap_histogram(intervals, length) / resolution
+    speech = float(hist[1:].sum())
+    duration = stop - start
+    # time covered by segments outside of the UEM
+    outside = np.clip(np.minimum(arr["end"], start) - arr["start"], 0, None) + np.clip(
+        arr["end"] - np.maximum(arr["start"], stop), 0, None
+    )
+
+    c_devices = {}
+    for name, info in (devices or {}).items():
+        device = re.sub(r"\.CH\d+$", "", name)
+        if device in c_devices:
+            c_devices[device]["channels"] += 1
+            continue
+        spk = info.get("speaker")
+        c_devices[device] = {
+            "device_type": info.get("device_type"),
+            "is_close_talk": info.get("is_close_talk"),
+            "speaker": spk,
+            "channels": 1,
+            # far-field devices capture all speakers
+            "speaking_time": speakers.get(spk, {}).get("speaking_time", 0.0)
+            if info.get("is_close_talk")
+            else speech,
+        }
+
+    return {
+        "duration": duration,
+        "n_segments": len(arr),
+        "n_words": int(n_words.sum()),
+        "n_speakers": len(speakers),
+        "segments_duration": float(seg_durations.sum()),
+        "speech": speech,
+        "silence": float(hist[0]),
+        "overlap": float(hist[2:].sum()),
+        "overlap_degrees": hist.tolist(),
+        "uem_coverage": speech / duration if duration > 0 else 0.0,
+        "outside_uem": float(outside.sum()),
+        "segment_length_hist": np.histogram(seg_durations, SEGMENT_LENGTH_BINS)[
+            0
+        ].tolist(),
+        "words_per_second": _words_per_second(
+            int(n_words.sum()), float(seg_durations.sum())
+        ),
+        "speakers": speakers,
+        "devices": c_devices,
+    }
+
+
+def _sum_lists(a, b):
+    out = [0] * max(len(a), len(b))
+    for x in (a, b):
+        for indx, v in enumerate(x):
+            out[indx] += v
+    return out
+
+
+def summarize_sessions(sessions):
+    """
+    Aggregates session_stats outputs, e.g. for a whole split.
+    :param sessions: dict, session name -> session_stats output.
+    :return: dict, same fields as session_stats (devices excluded),
+        speakers are aggregated across sessions.
+    """
+    summary = {
+        "n_sessions": len(sessions),
+        "duration": 0.0,
+        "n_segments": 0,
+        "n_words": 0,
+        "segments_duration": 0.0,
+        "speech": 0.0,
+        "silence": 0.0,
+        "overlap": 0.0,
+        "outside_uem": 0.0,
+        "overlap_degrees": [],
+        "segment_length_hist": [0] * (len(SEGMENT_LENGTH_BINS) - 1),
+    }
+    speakers = {}
+    for c_stats in sessions.values():
+        for k in summary.keys():
+            if k == "n_sessions":
+                continue
+            if isinstance(summary[k], list):
+                summary[k] = _sum_lists(summary[k], c_stats[k])
+            else:
+                summary[k] += c_stats[k]
+        for spk, spk_stats in c_stats["speakers"].items():
+            c_spk = speakers.setdefault(
+                spk, {"speaking_time": 0.0, "n_segments": 0, "n_words": 0}
+            )
+            for k in c_spk.keys():
+                c_spk[k] += spk_stats[k]
+    summary["n_speakers"] = len(speakers)
+    summary["uem_coverage"] = (
+        summary["speech"] / summary["duration"] if summary["duration"] > 0 else 0.0
+    )
+    summary["words_per_second"] = _words_per_second(
+        summary["n_words"], summary["segments_duration"]
+    )
+    summary["speakers"] = speakers
+    return summary
+
+
+def _session_task(args):
+    return session_stats(*args)
+
+
+def dataset_stats(dasr_root, scenarios=None, dset_parts=None, num_jobs=1):
+    """
+    Computes session_stats for every session in a DASR root, in one pass over
+    its DasrIndex, with all scenarios and splits processed in the same pool.
+    :param dasr_root: Pathlike, DASR root or single scenario folder.
+    :param scenarios: list, scenarios to include, all of them if None.
+    :param dset_parts: list, splits to include, all of them if None.
+    :param num_jobs: int, number of sessions processed in parallel.
+    :return: dict, scenario -> split -> {"summary": summarize_sessions output,
+        "sessions": session name -> session_stats output}.
+    """
+    index = DasrIndex.load(dasr_root)
+    keys = []
+    tasks = []
+    for scenario in index.scenarios.keys():
+        if scenarios is not None and scenario not in scenarios:
+            continue
+        for split in index.splits(scenario):
+            if dset_parts is not None and split not in dset_parts:
+                continue
+            uem = index.uem(split, scenario)
+            for sess_name, file in index.transcription_files(split, scenario).items():
+                try:
+                    devices = index.devices(split, sess_name, scenario)
+                except KeyError:
+                    devices = None
+                keys.append((scenario, split, sess_name))
+                tasks.append((file, uem.get(sess_name), devices))
+
+    if num_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(num_jobs) as ex:
+            results = list(
+                ex.map(
+                    _session_task,
+                    tasks,
+                    chunksize=max(1, len(tasks) // (4 * num_jobs)),
+                )
+            )
+    else:
+        results = [_session_task(x) for x in tasks]
+
+    out = {}
+    for (scenario, split, sess_name), c_stats in zip(keys, results):
+        c_split = out.setdefault(scenario, {}).setdefault(split, {"sessions": {}})
+        c_split["sessions"][sess_name] = c_stats
+    for scenario in out.keys():
+        for c_split in out[scenario].values():
+            c_split["summary"] = summarize_sessions(c_split["sessions"])
+    return out
+
+
+def stats_to_tables(stats):
+    """
+    Flattens dataset_stats output into one row per session and
+    one row per (session, speaker).
+    :return: tuple of lists of dicts, session rows and speaker rows.
+    """
+    session_rows = []
+    speaker_rows = []
+    for scenario, splits in stats.items():
+        for split, c_split in splits.items():
+            for sess_name, c_stats in c_split["sessions"].items():
+                row = {"corpus": scenario, "split": split, "session": sess_name}
+                row.update(
+                    {
+                        k: v
+                        for k, v in c_stats.items()
+                        if k not in ["speakers", "devices"]
+                    }
+                )
+                session_rows.append(row)
+                for spk, spk_stats in c_stats["speakers"].items():
+                    speaker_rows.append(
+                        {
+                            "corpus": scenario,
+                            "split": split,
+                            "session": sess_name,
+                            "speaker": spk,
+                            **spk_stats,
+                        }
+                    )
+    return session_rows, speaker_rows
+
+
+def write_dataset_stats(stats, output, output_format="json"):
+    """
+    Writes dataset_stats output.
+    :param stats: dict, dataset_stats output.
+    :param output: Pathlike, output JSON file for 'json', output folder
+        (with sessions.parquet and speakers.parquet) for 'parquet'.
+    :param output_format: str, 'json' or 'parquet' (requires pyarrow).
+    """
+    assert output_format in ["json", "parquet"]
+    if output_format == "json":
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        dump_json(stats, output)
+        return
+
+    from chime_utils.dgen.columnar import _import_pyarrow
+
+    pa, pq = _import_pyarrow()
+    Path(output).mkdir(parents=True, exist_ok=True)
+    session_rows, speaker_rows = stats_to_tables(stats)
+    pq.write_table(pa.Table.from_pylist(session_rows), Path(output, "sessions.parquet"))
+    pq.write_table(pa.Table.from_pylist(speaker_rows), Path(output, "speakers.parquet"))
@@ -1,4 +1,11 @@
+import hashlib
 import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from chime_utils.json_backend import dump_json, load_json
 
 logging.basicConfig(
     format=(
@@ -12,6 +19,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def read_devices(corpus_dir, dset_part, sess_name):
+    """
+    reads the devices JSON of a session.
+    """
+    with open(
+        os.path.join(corpus_dir, "devices", dset_part, sess_name + ".json"), "r"
+    ) as f:
+        return load_json(f)
+
+
 def read_uem(uem_file):
     """
     reads an UEM file into a dict.
@@ -25,6 +42,322 @@ def read_uem(uem_file):
     return out
 
 
+DASR_SCENARIOS = ["chime6", "dipco", "mixer6", "notsofar1"]
+DASR_INDEX_VERSION = 2
+
+
+def _default_index_cache_file(root):
+    # one file per DASR root in the user cache, the root itself may be
+    # shared or read-only
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    key = hashlib.sha1(str(Path(root).resolve()).encode("utf-8")).hexdigest()
+    return Path(cache_home, "chime_utils", "index", f"{key[:16]}.json")
+
+
+class DasrIndex:
+    """
+    Index of a generated DASR root (as created by `chime-utils dgen`),
+    scanned once: UEMs, devices, audio files and transcription files for
+    each scenario, split and session. The segment arrays of a session are
+    parsed from its transcription the first time they are needed.
+    root can be the DASR root (containing chime6/, dipco/ etc.) or a single
+    scenario folder, in which case the scenario is named after the folder.
+    Use DasrIndex.load() to reuse an on-disk JSON cache, which is invalidated
+    as soon as any of the indexed files or folders is modified.
+    """
+
+    def __init__(self, root):
+        self.root = str(Path(root).resolve())
+        self.scenarios = {}
+        self._mtimes = {}
+        self._segments = {}
+        root = Path(self.root)
+        if (root / "uem").is_dir():
+            self._scan_scenario(root.name, root)
+        else:
+            for scenario in DASR_SCENARIOS:
+                if (root / scenario / "uem").is_dir():
+                    self._scan_scenario(scenario, root / scenario)
+
+    def _track(self, path):
+        self._mtimes[str(path)] = os.stat(path).st_mtime_ns
+
+    def _scan_scenario(self, scenario, scenario_dir):
+        splits = {}
+        self._track(scenario_dir / "uem")
+        for uem_dir in sorted((scenario_dir / "uem").iterdir()):
+            uem_file = uem_dir / "all.uem"
+            if not uem_file.exists():
+                continue
+            self._track(uem_dir)
+            self._track(uem_file)
+            split = uem_dir.name
+            c_split = {
+                "uem_file": str(uem_file),
+                "uem": read_uem(uem_file),
+                "devices": {},
+                "audio": {},
+                "transcriptions": {},
+                "transcriptions_scoring": {},
+            }
+            devices_dir = scenario_dir / "devices" / split
+            if devices_dir.is_dir():
+                self._track(devices_dir)
+                for file in sorted(devices_dir.glob("*.json")):
+                    self._track(file)
+                    with open(file, "r") as f:
+                        c_split["devices"][file.stem] = load_json(f)
+            audio_dir = scenario_dir / "audio" / split
+            if audio_dir.is_dir():
+                self._track(audio_dir)
+                c_split["audio"] = {
+                    x.stem: str(x)
+                    for x in sorted(audio_dir.iterdir())
+                    if x.suffix in [".wav", ".flac"]
+                }
+            for ann in ["transcriptions", "transcriptions_scoring"]:
+                ann_dir = scenario_dir / ann / split
+                if not ann_dir.is_dir():
+                    continue
+                self._track(ann_dir)
+                for file in sorted(ann_dir.glob("*.json")):
+                    self._track(file)
+                    c_split[ann][file.stem] = str(file)
+            splits[split] = c_split
+        self.scenarios[scenario] = {"dir": str(scenario_dir), "splits": splits}
+
+    def is_valid(self):
+        """
+        :return: bool, False if any of the indexed files or folders
+            has been modified (or removed) since the scan.
+        """
+        try:
+            return all(
+                os.stat(path).st_mtime_ns == mtime
+                for path, mtime in self._mtimes.items()
+            )
+        except FileNotFoundError:
+            return False
+
+    def to_dict(self):
+        return {
+            "version": DASR_INDEX_VERSION,
+            "root": self.root,
+            "scenarios": self.scenarios,
+            "mtimes": self._mtimes,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        assert data["version"] == DASR_INDEX_VERSION, "DasrIndex version mismatch."
+        index = cls.__new__(cls)
+        index.root = data["root"]
+        index.scenarios = data["scenarios"]
+        index._mtimes = data["mtimes"]
+        index._segments = {}
+        for scenario in index.scenarios.values():
+            for c_split in scenario["splits"].values():
+                c_split["uem"] = {k: tuple(v) for k, v in c_split["uem"].items()}
+        return index
+
+    @classmethod
+    def load(cls, root, cache_file=None, use_cache=True):
+        """
+        Returns the index of root, from the cache if still valid,
+        otherwise scanning root and writing the cache (if it can be written).
+        :param root: Pathlike, DASR root or single scenario folder.
+        :param cache_file: Pathlike, JSON cache, defaults to a file named
+            after root in $XDG_CACHE_HOME/chime_utils/index.
+        :param use_cache: bool, if False always scan root and do not write any cache.
+        """
+        cache_file = (
+            Path(cache_file)
+            if cache_file is not None
+            else _default_index_cache_file(root)
+        )
+        if use_cache and cache_file.exists():
+            try:
+                index = cls.from_dict(load_json(cache_file))
+                if index.root == str(Path(root).resolve()) and index.is_valid():
+                    return index
+            except Exception as e:
+                logger.warning(f"Could not read {cache_file}, scanning again: {e}")
+
+        index = cls(root)
+        if use_cache:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.parent / f".{cache_file.name}.{os.getpid()}.tmp"
+                dump_json(index.to_dict(), tmp_file, compact=True)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                logger.warning(f"Could not write the index cache {cache_file}: {e}")
+        return index
+
+    def _scenario(self, scenario):
+        if scenario is None:
+            assert (
+                len(self.scenarios) == 1
+            ), "scenario must be specified for a DASR root with multiple scenarios."
+            scenario = next(iter(self.scenarios))
+        return self.scenarios[scenario]
+
+    def _split(self, scenario, split):
+        return self._scenario(scenario)["splits"][split]
+
+    def splits(self, scenario=None):
+        return list(self._scenario(scenario)["splits"].keys())
+
+    def has_split(self, split, scenario=None):
+        try:
+            self._split(scenario, split)
+        except KeyError:
+            return False
+        return True
+
+    def sessions(self, split, scenario=None):
+        """
+        :return: list, the sessions in the split UEM, in the same order.
+        """
+        return list(self._split(scenario, split)["uem"].keys())
+
+    def uem(self, split, scenario=None):
+        """
+        :return: dict, session -> (start, stop) as read_uem.
+        """
+        return self._split(scenario, split)["uem"]
+
+    def uem_file(self, split, scenario=None):
+        return self._split(scenario, split)["uem_file"]
+
+    def devices(self, split, session, scenario=None):
+        """
+        :return: dict, the content of devices/<split>/<session>.json.
+        """
+        return self._split(scenario, split)["devices"][session]
+
+    def audio(self, split, scenario=None):
+        """
+        :return: dict, audio file name (without suffix) -> path.
+        """
+        return self._split(scenario, split)["audio"]
+
+    def transcription_files(self, split, scenario=None, scoring=False):
+        """
+        :return: dict, session -> path of transcriptions(_scoring)/<split>/<session>.json.
+        """
+        ann = "transcriptions_scoring" if scoring else "transcriptions"
+        return self._split(scenario, split)[ann]
+
+    def segments(self, split, session, scenario=None):
+        """
+        :return: numpy structured array with speaker, start and end fields
+            for each utterance in the session transcription.
+        """
+        file = self.transcription_files(split, scenario)[session]
+        if file not in self._segments:
+            self._segments[file] = segments_to_array(load_json(file))
+        return self._segments[file]
+
+
+def segments_to_array(segments):
+    """
+    converts CHiME-style JSON utterances to a numpy structured array
+    with speaker, start and end fields.
+    """
+    spk_len = max([len(x["speaker"]) for x in segments], default=1)
+    return np.array(
+        [
+            (x["speaker"], float(x["start_time"]), float(x["end_time"]))
+            for x in segments
+        ],
+        dtype=[("speaker", f"U{spk_len}"), ("start", "f8"), ("end", "f8")],
+    )
+
+
+def get_ihm_device_index(
+    corpus_dir, corpus_name, dset_part, sess_name, device_info=None
+):
+    """
+    reads the devices JSON of a session once and indexes its close-talk devices.
+    device_info is the devices JSON content if already loaded (e.g. from DasrIndex).
+    :return: dict, for each speaker the recording id, the sorted close-talk
+        audio files with the channels each file holds in the recording,
+        and the list of all the speaker recording channels.
+    """
+    audio_dir = os.path.join(corpus_dir, "audio", dset_part)
+    suffix = ".wav" if corpus_name != "mixer6" else ".flac"
+    if device_info is None:
+        device_info = read_devices(corpus_dir, dset_part, sess_name)
+
+    spk2files = {}
+    for device_name, c_device in device_info.items():
+        if not c_device["is_close_talk"]:
+            continue
+        spk_id = c_device["speaker"]
+        assert spk_id is not None
+        if spk_id not in spk2files.keys():
+            spk2files[spk_id] = []
+        spk2files[spk_id].append(
+            (os.path.join(audio_dir, device_name) + suffix, c_device["tot_channels"])
+        )
+
+    index = {}
+    for spk_id, c_files in spk2files.items():
+        c_files = sorted(c_files, key=lambda x: Path(x[0]).stem)
+        sources = []
+        n_channels = 0
+        for file_path, tot_channels in c_files:
+            sources.append(
+                (file_path, list(range(n_channels, n_channels + tot_channels)))
+            )
+            n_channels += tot_channels
+        index[spk_id] = {
+            "recording_id": "{}-{}".format(sess_name, spk_id),
+            "sources": sources,
+            "files": [x[0] for x in sources],
+            "channels": list(range(n_channels)),
+        }
+    return index
+
+
+# CHiME-6 arrays with recording problems in some sessions, see
+# https://chimechallenge.github.io/chime6/track1_data.html
+CHIME6_PROBLEMATIC = ["S12_U05", "S24_U06", "S18_U06"]
+
+
+def get_far_field_index(
+    corpus_dir,
+    corpus_name,
+    dset_part,
+    sess_name,
+    discard_problematic=False,
+    device_info=None,
+):
+    """
+    reads the devices JSON of a session once and lists its far-field audio files,
+    sorted as the channels of the session multi-channel recording.
+    device_info is the devices JSON content if already loaded (e.g. from DasrIndex).
+    """
+    audio_dir = os.path.join(corpus_dir, "audio", dset_part)
+    suffix = ".wav" if corpus_name != "mixer6" else ".flac"
+    if device_info is None:
+        device_info = read_devices(corpus_dir, dset_part, sess_name)
+
+    files = []
+    for device_name, c_device in device_info.items():
+        if c_device["is_close_talk"]:
+            continue
+        if (
+            discard_problematic
+            and corpus_name == "chime6"
+            and device_name.split(".")[0] in CHIME6_PROBLEMATIC
+        ):
+            continue
+        files.append(os.path.join(audio_dir, device_name) + suffix)
+    return sorted(files, key=lambda x: Path(x))
+
+
 def split_partition(
     dasr_dset_folder,
     output_folder,
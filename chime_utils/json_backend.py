@@ -0,0 +1,165 @@
+"""
+JSON reading and writing with the fastest available backend:
+orjson, then ujson, then the standard library json module.
+Canonical output (compact=False) is always written with
+json.dump(obj, f, indent=4) so that generated annotations are byte-exact
+and pass `chime-utils dgen checksum`.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+elif ujson is not None:
+    JSON_BACKEND = "ujson"
+else:
+    JSON_BACKEND = "json"
+
+
+def loads_json(s):
+    """
+    Parses a JSON document (str or bytes).
+    """
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # e.g. integers beyond 64 bit, let the stdlib parse (or fail)
+            pass
+    elif JSON_BACKEND == "ujson":
+        try:
+            return ujson.loads(s)
+        except ValueError:
+            pass
+    return json.loads(s)
+
+
+def load_json(file):
+    """
+    Reads a JSON file.
+    :param file: Pathlike or file object (opened in text or binary mode).
+    """
+    if hasattr(file, "read"):
+        return loads_json(file.read())
+    with open(file, "rb") as f:
+        return loads_json(f.read())
+
+
+def dumps_json(obj, compact=False):
+    """
+    :param obj: object to serialize.
+    :param compact: bool, if False returns the canonical
+        json.dumps(obj, indent=4) output, otherwise the smallest encoding
+        (no whitespace, non-ASCII characters are not escaped).
+    :return: str
+    """
+    if not compact:
+        return json.dumps(obj, indent=4)
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            # e.g. non-str keys or numpy scalars
+            pass
+    elif JSON_BACKEND == "ujson":
+        try:
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def dump_json(obj, file, compact=False):
+    """
+    Writes obj as JSON, see dumps_json.
+    :param obj: object to serialize.
+    :param file: Pathlike or file object opened in text mode.
+    :param compact: bool, whether to use the compact encoding
+        instead of the canonical indent=4 one.
+    """
+    if not hasattr(file, "write"):
+        with open(file, "w", encoding="utf-8") as f:
+            return dump_json(obj, f, compact)
+    if not compact:
+        json.dump(obj, file, indent=4)
+    else:
+        file.write(dumps_json(obj, compact=True))
+
+
+def iter_json_array(file, parse_float=None, chunk_size=1 << 20):
+    """
+    Incrementally parses a JSON file containing a top-level array and yields
+    its items one at a time, so that only one item (plus a read chunk) is in
+    memory at once.
+    :param file: Pathlike or file object opened in text mode.
+    :param parse_float: callable, used for the floats, e.g. decimal.Decimal.
+    :param chunk_size: int, number of characters read at a time.
+    """
+    if not hasattr(file, "read"):
+        with open(file, "r", encoding="utf-8") as f:
+            yield from iter_json_array(f, parse_float, chunk_size)
+        return
+
+    decoder = json.JSONDecoder(parse_float=parse_float)
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def skip_whitespace():
+        # reads more if the buffer is exhausted
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            buffer, pos = file.read(chunk_size), 0
+            eof = len(buffer) == 0
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("Expected a JSON array.")
+    pos += 1
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == "]":
+        return
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+            if isinstance(item, (dict, list, str)) or eof:
+                complete = True
+            else:
+                # a number may continue in the next chunk ("12" of "12.25"),
+                # it is complete once followed by ',' or ']'
+                after = buffer[end:].lstrip()
+                complete = after != "" and after[0] in ",]"
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            chunk = file.read(chunk_size)
+            eof = len(chunk) == 0
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array.")
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] != ",":
+            raise ValueError(f"Expected ',' or ']' but found {buffer[pos]!r}.")
+        pos += 1
+        skip_whitespace()
@@ -0,0 +1,231 @@
+"""
+Conversion of SegLST (CHiME-style JSON) hypothesis/reference trees to other
+formats. Every output format is a small plugin registered in
+CONVERSION_FORMATS, files are converted in parallel with a bounded
+number of pending tasks and a single progress report.
+"""
+
+import logging
+import textwrap
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import tqdm
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+CONVERSION_FORMATS = {}
+
+
+def register_format(name):
+    """
+    Class decorator, registers a conversion format under name.
+    A format has a suffix and a dump(seglst, out) method that writes the
+    SegLST to out (out has no suffix yet) and returns the written paths.
+    """
+
+    def wrapper(cls):
+        CONVERSION_FORMATS[name] = cls()
+        return cls
+
+    return wrapper
+
+
+@register_format("ctm")
+class CTMFormat:
+    """
+    One CTM file for each speaker in the out folder,
+    with pseudo word-level timings.
+    """
+
+    suffix = ""
+
+    def dump(self, seglst, out):
+        import meeteval
+
+        written = []
+        for speaker, ctm in (
+            meeteval.io.CTMGroup.new(
+                meeteval.wer.wer.time_constrained.get_pseudo_word_level_timings(
+                    seglst, "character_based"
+                ),
+                channel="1",
+            )
+            .grouped_by_speaker_id()
+            .items()
+        ):
+            c_out = out / f"{speaker}.ctm"
+            c_out.parent.mkdir(exist_ok=True, parents=True)
+            ctm.dump(c_out)
+            written.append(c_out)
+        return written
+
+
+@register_format("rttm")
+class RTTMFormat:
+    suffix = ".rttm"
+
+    def dump(self, seglst, out):
+        import meeteval
+
+        out = out.with_suffix(self.suffix)
+        meeteval.io.RTTM.new(seglst).dump(out)
+        return [out]
+
+
+@register_format("stm")
+class STMFormat:
+    suffix = ".stm"
+
+    def dump(self, seglst, out):
+        import meeteval
+
+        out = out.with_suffix(self.suffix)
+        meeteval.io.STM.new(seglst).dump(out)
+        return [out]
+
+
+@register_format("seglst")
+class SegLSTFormat:
+    """
+    SegLST JSON again, useful to combine many files into one.
+    """
+
+    suffix = ".json"
+
+    def dump(self, seglst, out):
+        out = out.with_suffix(self.suffix)
+        seglst.dump(out)
+        return [out]
+
+
+@register_format("lhotse")
+class LhotseSupervisionsFormat:
+    """
+    Lhotse SupervisionSet, the session is used as recording id.
+    """
+
+    suffix = ".jsonl.gz"
+
+    def dump(self, seglst, out):
+        from lhotse.supervision import SupervisionSegment, SupervisionSet
+
+        supervisions = []
+        for idx, seg in enumerate(
+            sorted(seglst, key=lambda x: (x["session_id"], x["start_time"]))
+        ):
+            start = float(seg["start_time"])
+            end = float(seg["end_time"])
+            supervisions.append(
+                SupervisionSegment(
+                    id=(
+                        f"{seg['speaker']}_{seg['session_id']}_{idx}-"
+                        f"{round(100 * start):06d}_{round(100 * end):06d}"
+                    ),
+                    recording_id=seg["session_id"],
+                    start=start,
+                    duration=end - start,
+                    channel=0,
+                    text=seg["words"],
+                    speaker=seg["speaker"],
+                )
+            )
+        out = out.with_suffix(self.suffix)
+        SupervisionSet.from_segments(supervisions).to_file(out)
+        return [out]
+
+
+def _convert(fmt, files, out):
+    import meeteval
+
+    try:
+        out.parent.mkdir(exist_ok=True, parents=True)
+        seglst = meeteval.io.SegLST.load(files)
+        return CONVERSION_FORMATS[fmt].dump(seglst, out), None
+    except Exception:
+        return [], traceback.format_exc()
+
+
+def _conversion_tasks(input_dir, output_dir, combine=False):
+    files = sorted(Path(input_dir).rglob("*.json"))
+    if not combine:
+        return [
+            ([f], output_dir / f.with_suffix("").relative_to(input_dir)) for f in files
+        ]
+    # all the files in a folder (e.g. one per session) go to a single file
+    # named after the folder (e.g. the scenario)
+    groups = {}
+    for f in files:
+        groups.setdefault(f.parent.relative_to(input_dir), []).append(f)
+    return [
+        (c_files, output_dir / (rel if rel != Path(".") else Path(input_dir.name)))
+        for rel, c_files in groups.items()
+    ]
+
+
+def convert_seglst_tree(input_dir, output_dir, fmt, combine=False, num_jobs=1):
+    """
+    Converts all the SegLST JSON files in input_dir to fmt, keeping the
+    folder structure. Files that fail to convert are reported and skipped.
+    :param input_dir: Pathlike, folder searched recursively for *.json files.
+    :param output_dir: Pathlike, output folder.
+    :param fmt: str, one of CONVERSION_FORMATS ('ctm', 'rttm', 'stm',
+        'seglst', 'lhotse').
+    :param combine: bool, if True the files in each folder are combined into
+        one file named after the folder, e.g. dev/chime6/S01.json,
+        dev/chime6/S02.json -> dev/chime6.rttm.
+    :param num_jobs: int, number of parallel workers.
+    :return: (list, list), written files and the input files that failed.
+    """
+    assert (
+        fmt in CONVERSION_FORMATS.keys()
+    ), f"Unknown format {fmt}, choose one of {list(CONVERSION_FORMATS.keys())}."
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    tasks = _conversion_tasks(input_dir, output_dir, combine)
+    written, failed = [], []
+
+    def handle(files, result):
+        c_written, error = result
+        if error is not None:
+            logger.warning(
+                f"Failed to convert {', '.join(str(x) for x in files)}. Ignore it.\n"
+                + textwrap.indent(error, " | ")
+            )
+            failed.extend(files)
+        written.extend(c_written)
+
+    with tqdm.tqdm(total=len(tasks), desc=f"Converting to {fmt}") as pbar:
+        if num_jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(num_jobs) as ex:
+                # keep a bounded number of tasks in flight
+                pending = {}
+                for files, out in tasks:
+                    pending[ex.submit(_convert, fmt, files, out)] = files
+                    if len(pending) < 2 * num_jobs:
+                        continue
+                    done, _ = wait(pending.keys(), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        handle(pending.pop(fut), fut.result())
+                        pbar.update()
+                for fut in list(pending.keys()):
+                    handle(pending.pop(fut), fut.result())
+                    pbar.update()
+        else:
+            for files, out in tasks:
+                handle(files, _convert(fmt, files, out))
+                pbar.update()
+
+    logger.info(
+        f"Wrote {len(written)} {fmt} files to {output_dir}"
+        + (f", {len(failed)} input files failed." if len(failed) else ".")
+    )
+    return sorted(written), failed
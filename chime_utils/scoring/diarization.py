@@ -0,0 +1,294 @@
+"""
+Diarization error rate (DER) and Jaccard error rate (JER) per session.
+All the reference, hypothesis, UEM and collar boundaries split the session
+into elementary segments, the activity of each speaker on them is obtained
+with an event sweep over its merged intervals, and the speaker overlaps
+come from a single matrix product instead of a frame-level grid.
+Speakers are mapped one-to-one with the Hungarian algorithm, maximizing the
+overlap for DER (as pyannote.metrics and md-eval) and minimizing the
+per-speaker Jaccard error for JER (as dscore).
+"""
+
+import collections
+import dataclasses
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from chime_utils.dprep.stats import merge_intervals
+from chime_utils.scoring.meeteval import _load_and_prepare, _print_table, _run_inline
+from chime_utils.scoring.results import write_results
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class DiarizationErrorRate:
+    """
+    Times are in seconds of the scored region.
+    jer is the mean Jaccard error over the num_ref_speakers reference speakers.
+    assignment holds the (reference, hypothesis) speaker pairs used for DER.
+    """
+
+    der: float
+    jer: float
+    scored: float
+    missed: float
+    falarm: float
+    confusion: float
+    num_ref_speakers: int
+    num_hyp_speakers: int
+    assignment: tuple = ()
+
+
+def _speaker_intervals(segments):
+    intervals = collections.defaultdict(lambda: ([], []))
+    for seg in segments:
+        intervals[seg["speaker"]][0].append(float(seg["start_time"]))
+        intervals[seg["speaker"]][1].append(float(seg["end_time"]))
+    return {
+        k: merge_intervals(np.array(v[0], dtype="f8"), np.array(v[1], dtype="f8"))
+        for k, v in sorted(intervals.items())
+    }
+
+
+def _activity(intervals, bounds):
+    # 0/1 activity on the elementary segments [bounds[i], bounds[i + 1])
+    out = np.zeros((len(intervals), len(bounds) - 1), dtype="f8")
+    for indx, (starts, ends) in enumerate(intervals):
+        delta = np.zeros(len(bounds), dtype="f8")
+        np.add.at(delta, np.searchsorted(bounds, starts), 1)
+        np.add.at(delta, np.searchsorted(bounds, ends), -1)
+        out[indx] = np.cumsum(delta)[:-1]
+    return out
+
+
+def diarization_error_rate(reference, hypothesis, uem=None, collar=0.0):
+    """
+    DER and JER of one session.
+    :param reference: iterable of segments with speaker, start_time and
+        end_time, e.g. a SegLST of one session.
+    :param hypothesis: iterable of segments, as reference.
+    :param uem: tuple, (start, end) of the scored region, if None
+        everything from the first to the last boundary is scored.
+    :param collar: float, seconds around each reference speaker boundary
+        that are not scored (half before, half after, as pyannote.metrics).
+    :return: DiarizationErrorRate
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    ref = _speaker_intervals(reference)
+    hyp = _speaker_intervals(hypothesis)
+    ref_bounds = np.concatenate([x for v in ref.values() for x in v] + [np.zeros(0)])
+    bounds = [ref_bounds] + [x for v in hyp.values() for x in v]
+    if collar > 0:
+        bounds += [ref_bounds - collar / 2, ref_bounds + collar / 2]
+    if uem is not None:
+        bounds.append(np.array([float(uem[0]), float(uem[1])]))
+    bounds = np.unique(np.concatenate(bounds + [np.zeros(0)]))
+    if len(bounds) < 2:
+        bounds = np.zeros(2)
+
+    durations = np.diff(bounds)
+    if uem is not None:
+        durations[(bounds[1:] <= float(uem[0])) | (bounds[:-1] >= float(uem[1]))] = 0
+    if collar > 0 and len(ref_bounds) > 0:
+        no_score = merge_intervals(ref_bounds - collar / 2, ref_bounds + collar / 2)
+        durations[_activity([no_score], bounds)[0] > 0] = 0
+
+    r = _activity(list(ref.values()), bounds)
+    h = _activity(list(hyp.values()), bounds)
+    n_ref, n_hyp = r.sum(0), h.sum(0)
+    overlap = (r * durations) @ h.T
+
+    # DER, speaker mapping maximizing the overlap
+    ref_indx, hyp_indx = linear_sum_assignment(overlap, maximize=True)
+    n_correct = (r[ref_indx] * h[hyp_indx]).sum(0)
+    scored = float((durations * n_ref).sum())
+    missed = float((durations * np.maximum(n_ref - n_hyp, 0)).sum())
+    falarm = float((durations * np.maximum(n_hyp - n_ref, 0)).sum())
+    confusion = float((durations * (np.minimum(n_ref, n_hyp) - n_correct)).sum())
+    errors = missed + falarm + confusion
+    der = errors / scored if scored > 0 else (1.0 if errors > 0 else 0.0)
+
+    # JER, mapping minimizing the per reference speaker Jaccard error,
+    # reference speakers left without a hypothesis speaker count as 1
+    ref_durs = (r * durations).sum(1)
+    hyp_durs = (h * durations).sum(1)
+    union = ref_durs[:, None] + hyp_durs[None, :] - overlap
+    jaccard_error = 1 - np.divide(
+        overlap, union, out=np.zeros_like(overlap), where=union > 0
+    )
+    speaker_jers = np.ones(len(ref))
+    jer_ref, jer_hyp = linear_sum_assignment(jaccard_error)
+    speaker_jers[jer_ref] = jaccard_error[jer_ref, jer_hyp]
+    jer = float(speaker_jers.mean()) if len(ref) > 0 else 0.0
+
+    ref_names, hyp_names = list(ref.keys()), list(hyp.keys())
+    return DiarizationErrorRate(
+        der=der,
+        jer=jer,
+        scored=scored,
+        missed=missed,
+        falarm=falarm,
+        confusion=confusion,
+        num_ref_speakers=len(ref),
+        num_hyp_speakers=len(hyp),
+        assignment=tuple(
+            (ref_names[x], hyp_names[y])
+            for x, y in zip(ref_indx, hyp_indx)
+            if overlap[x, y] > 0
+        ),
+    )
+
+
+def combine_diarization_error_rates(error_rates):
+    """
+    Time-weighted DER and reference-speaker-weighted JER of many sessions.
+    :param error_rates: dict or list of DiarizationErrorRate.
+    :return: DiarizationErrorRate
+    """
+    if isinstance(error_rates, dict):
+        error_rates = list(error_rates.values())
+    scored = sum(x.scored for x in error_rates)
+    missed = sum(x.missed for x in error_rates)
+    falarm = sum(x.falarm for x in error_rates)
+    confusion = sum(x.confusion for x in error_rates)
+    errors = missed + falarm + confusion
+    num_ref_speakers = sum(x.num_ref_speakers for x in error_rates)
+    return DiarizationErrorRate(
+        der=errors / scored if scored > 0 else (1.0 if errors > 0 else 0.0),
+        jer=sum(x.jer * x.num_ref_speakers for x in error_rates) / num_ref_speakers
+        if num_ref_speakers > 0
+        else 0.0,
+        scored=scored,
+        missed=missed,
+        falarm=falarm,
+        confusion=confusion,
+        num_ref_speakers=num_ref_speakers,
+        num_hyp_speakers=sum(x.num_hyp_speakers for x in error_rates),
+    )
+
+
+def _submit_der(executor, r, h, uem, collar):
+    """
+    Splits one scenario by session and submits each session to executor
+    (if None, sessions are scored right away). Hypothesis sessions without
+    reference are an error, reference sessions without hypothesis are scored
+    as missed speech.
+    :return: dict, session -> future, in reference order.
+    """
+    submit = executor.submit if executor is not None else _run_inline
+    uem = {} if uem is None else {x.filename: x for x in uem}
+    r = r.groupby("session_id")
+    h = h.groupby("session_id")
+    extra = sorted(set(h.keys()) - set(r.keys()))
+    if len(extra) > 0:
+        raise RuntimeError(
+            f"{len(extra)} session IDs are present in the hypothesis but missing "
+            f"in the reference: {extra[:5]}"
+        )
+    missing = sorted(set(r.keys()) - set(h.keys()))
+    if len(missing) > 0:
+        logger.warning(f"Sessions {missing[:5]} are missing in the hypothesis.")
+    return {
+        session: submit(
+            diarization_error_rate,
+            list(r[session]),
+            list(h[session]) if session in h.keys() else [],
+            (uem[session].begin_time, uem[session].end_time)
+            if session in uem.keys()
+            else None,
+            collar,
+        )
+        for session in r.keys()
+    }
+
+
+def _der(
+    hyp_folder,
+    dasr_root,
+    c_part,
+    output_folder,
+    ignore,
+    collar=0.0,
+    num_jobs=1,
+    use_cache=False,
+    cache_dir=None,
+    details_format="json",
+):
+    """
+    Scores DER and JER for all the scenarios of a split, as _wer does for
+    tcpWER. References and UEMs are loaded the same way, but the words
+    are not used and thus not normalized.
+    """
+    details = collections.defaultdict(dict)
+    data = _load_and_prepare(
+        hyp_folder,
+        dasr_root,
+        c_part,
+        text_norm=None,
+        ignore_missing=ignore,
+        use_cache=use_cache,
+        cache_dir=cache_dir,
+    )
+    executor = ProcessPoolExecutor(num_jobs) if num_jobs > 1 else None
+    try:
+        # submit the sessions of all scenarios before waiting for any
+        submitted = [
+            (deveval, scenario, _submit_der(executor, r, h, uem, collar))
+            for deveval, scenario, h, r, uem in data
+        ]
+        for deveval, scenario, futures in submitted:
+            details[deveval][scenario] = {k: v.result() for k, v in futures.items()}
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    result = collections.defaultdict(dict)
+    for deveval, scenarios in details.items():
+        for scenario, error_rates in scenarios.items():
+            result[deveval][scenario] = combine_diarization_error_rates(error_rates)
+            _print_table(
+                [
+                    {"session_id": k, **dataclasses.asdict(v)}
+                    for k, v in error_rates.items()
+                ],
+                f"DER/JER for {deveval} {scenario} Scenario (collar {collar})",
+            )
+    _print_table(
+        [
+            {"": k, "session_id": k2, **dataclasses.asdict(v2)}
+            for k, v in result.items()
+            for k2, v2 in v.items()
+        ],
+        "DER/JER for all Scenario",
+    )
+    _print_table(
+        [
+            {
+                "": k,
+                "der": np.mean([x.der for x in v.values()]),
+                "jer": np.mean([x.jer for x in v.values()]),
+            }
+            for k, v in result.items()
+        ],
+        "Macro-Averaged DER/JER for across all Scenario",
+    )
+
+    if output_folder is None:
+        logging.warning(
+            "Skip write of details to the disk, because --output_folder is not given"
+        )
+    else:
+        write_results(Path(output_folder), "DER", details, result, details_format)
+    return result
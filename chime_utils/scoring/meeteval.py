@@ -1,12 +1,22 @@
 import collections
 import dataclasses
+import functools
+import hashlib
 import logging
+import os
+import pickle
+import textwrap
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from decimal import Decimal
 from pathlib import Path
 
 import numpy as np
 import simplejson
 
-from chime_utils.text_norm import get_txt_norm
+from chime_utils.dprep.utils import DasrIndex
+from chime_utils.json_backend import iter_json_array
+from chime_utils.scoring.results import _to_dict, write_results
+from chime_utils.text_norm.fixed_point import FixedPointNormalizer
 
 logging.basicConfig(
     format=(
@@ -18,33 +28,183 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def _load_and_prepare(hyp_folder, dasr_root, dset_part, text_norm, ignore_missing):
+SCORING_SCENARIOS = ["chime6", "mixer6", "dipco", "notsofar1"]
+
+# bump when the prepared references change for the same sources
+_REF_CACHE_VERSION = 2
+# bump when the cached per-session error rates change for the same inputs
+_SESSION_CACHE_VERSION = 1
+# same default meeteval.wer.tcpwer uses
+TCPWER_COLLAR = 5
+
+
+def _default_ref_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return Path(cache_home, "chime_utils", "references")
+
+
+def _load_files(files, nodata_msg=""):
     import meeteval
 
-    text_norm_fn = get_txt_norm(text_norm)
+    seglst = []
+    for file in files:
+        try:
+            data = meeteval.io.load(file)
+        except ValueError:
+            print(f"Ignore {file}. It hasn't a valid CHiME-style JSON.")
+            continue
+        assert data, f"Could not load data from {file}."
+        seglst.extend(data)
+    if len(seglst) == 0:
+        raise FileNotFoundError(nodata_msg)
+    seglst = meeteval.io.SegLST(seglst)
+    return seglst
+
+
+# Issue in S21 for P45, where start is 3561.700 and end 3561.490
+def _fix_negative_duration(segment):
+    if segment["end_time"] < segment["start_time"]:
+        print(
+            f"WARNING: Fix negative duration in {segment['session_id']} "
+            f"for {segment['speaker']}, where start is "
+            f"{segment['start_time']} and end is "
+            f"{segment['end_time']} by swapping start and end."
+        )
+        segment["end_time"], segment["start_time"] = (
+            segment["start_time"],
+            segment["end_time"],
+        )
+    return segment
 
-    def load_files(files, nodata_msg="") -> meeteval.io.SegLST:
-        seglst = []
-        for file in files:
+
+def _get_word_normalizer(text_norm):
+    # applied until convergence to enforce idempotence,
+    # the fixed point of every unique string is computed once
+    text_norm_fn = FixedPointNormalizer(text_norm)
+
+    def word_normalizer(segment):
+        segment["words"] = text_norm_fn(segment["words"])
+        return segment
+
+    word_normalizer.text_norm_fn = text_norm_fn
+    return word_normalizer
+
+
+def _log_normalizer_stats(word_normalizer, what="hypothesis"):
+    if word_normalizer.text_norm_fn.normalizer is None:
+        return
+    stats = word_normalizer.text_norm_fn.stats()
+    logger.info(
+        f"Normalized the {what} words with {stats['cached']} unique strings "
+        f"cached and {stats['cache_hits']} cache hits, "
+        f"passes to the fixed point: {stats['pass_counts']}."
+    )
+
+
+def _source_hash(files):
+    sha = hashlib.sha1()
+    for file in sorted(str(x) for x in files):
+        sha.update(Path(file).name.encode("utf-8"))
+        sha.update(Path(file).read_bytes())
+    return sha.hexdigest()
+
+
+def _prepare_reference(ref_files, uem_file, text_norm, nodata_msg="", cache_file=None):
+    """
+    Loads, fixes and normalizes the reference segments and loads the UEM.
+    If cache_file is given, the result is stored there (pickled) and reused
+    as long as the hash of the reference and UEM files does not change.
+    :return: tuple, reference SegLST and UEM.
+    """
+    import meeteval
+
+    source_hash = None
+    if cache_file is not None:
+        source_hash = _source_hash(list(ref_files) + [uem_file])
+        if cache_file.exists():
             try:
-                data = meeteval.io.load(file)
-            except ValueError:
-                print(f"Ignore {file}. It hasn't a valid CHiME-style JSON.")
-                continue
-            assert data, f"Could not load data from {file}."
-            seglst.extend(data)
-        if len(seglst) == 0:
-            raise FileNotFoundError(nodata_msg)
-        seglst = meeteval.io.SegLST(seglst)
-        return seglst
-
-    for scenario in ["chime6", "mixer6", "dipco", "notsofar1"]:
+                with open(cache_file, "rb") as f:
+                    version, c_hash, segments, uem = pickle.load(f)
+                if version == _REF_CACHE_VERSION and c_hash == source_hash:
+                    return meeteval.io.SegLST(segments), uem
+            except Exception as e:
+                logger.warning(f"Could not read {cache_file}, preparing again: {e}")
+
+    r = _load_files(ref_files, nodata_msg)
+    r = r.map(_fix_negative_duration)
+    uem = meeteval.io.load(uem_file)
+    r = r.map(_get_word_normalizer(text_norm))
+
+    if cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.parent / f".{cache_file.name}.tmp"
+            with open(tmp_file, "wb") as f:
+                pickle.dump(
+                    (_REF_CACHE_VERSION, source_hash, r.segments, uem), f, protocol=4
+                )
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write the reference cache {cache_file}: {e}")
+    return r, uem
+
+
+def _ref_cache_file(cache_dir, dasr_root, deveval, scenario, text_norm):
+    key = hashlib.sha1(
+        str((str(Path(dasr_root).resolve()), deveval, scenario, str(text_norm))).encode(
+            "utf-8"
+        )
+    ).hexdigest()[:16]
+    return Path(cache_dir, f"{scenario}_{deveval}_{text_norm}_{key}.pkl")
+
+
+def _load_and_prepare(
+    hyp_folder,
+    dasr_root,
+    dset_part,
+    text_norm,
+    ignore_missing,
+    use_cache=False,
+    cache_dir=None,
+    stream=False,
+):
+    """
+    Yields (dset_part, scenario, hypothesis, reference, uem) for each
+    scenario, with normalized words.
+    If stream is True the hypothesis is the path of its JSON file instead,
+    to be parsed incrementally and normalized by _submit_stream.
+    """
+    word_normalizer = _get_word_normalizer(text_norm)
+    cache_dir = _default_ref_cache_dir() if cache_dir is None else cache_dir
+
+    index = DasrIndex.load(dasr_root)
+    for scenario in SCORING_SCENARIOS:
         scenario_dir = dasr_root / scenario
         for deveval in [dset_part]:
             folder = scenario_dir / "transcriptions_scoring" / deveval
 
             try:
-                r = load_files(folder.glob("*.json"))
+                ref_files = (
+                    list(
+                        index.transcription_files(
+                            deveval, scenario, scoring=True
+                        ).values()
+                    )
+                    if index.has_split(deveval, scenario)
+                    else []
+                )
+                if len(ref_files) == 0:
+                    raise FileNotFoundError()
+                r, uem = _prepare_reference(
+                    ref_files,
+                    index.uem_file(deveval, scenario),
+                    text_norm,
+                    cache_file=_ref_cache_file(
+                        cache_dir, dasr_root, deveval, scenario, text_norm
+                    )
+                    if use_cache
+                    else None,
+                )
             except FileNotFoundError:
                 if not ignore_missing:
                     logging.error(
@@ -59,28 +219,12 @@ def _load_and_prepare(hyp_folder, dasr_root, dset_part, text_norm, ignore_missin
                     )
                     continue
 
-            # Issue in S21 for P45, where start is 3561.700 and end 3561.490
-            def fix_negative_duration(segment):
-                if segment["end_time"] < segment["start_time"]:
-                    print(
-                        f"WARNING: Fix negative duration in {segment['session_id']} "
-                        f"for {segment['speaker']}, where start is "
-                        f"{segment['start_time']} and end is "
-                        f"{segment['end_time']} by swapping start and end."
-                    )
-                    segment["end_time"], segment["start_time"] = (
-                        segment["start_time"],
-                        segment["end_time"],
-                    )
-                return segment
-
-            r = r.map(fix_negative_duration)
-
-            uem = meeteval.io.load(scenario_dir / "uem" / deveval / "all.uem")
-
             file = hyp_folder / deveval / f"{scenario}.json"
-            if file.exists():
-                h = load_files(
+            if file.exists() and stream:
+                yield deveval, scenario, file, r, uem
+                continue
+            elif file.exists():
+                h = _load_files(
                     [file],
                 )
             else:
@@ -95,33 +239,14 @@ def _load_and_prepare(hyp_folder, dasr_root, dset_part, text_norm, ignore_missin
                     )
                     continue
 
-            def word_normalizer(segment):
-                words = segment["words"]
-                words = text_norm_fn(words)
-
-                for _ in range(5):
-                    # Enforce idempotence by multiple executions of the
-                    # text normalizer.
-                    words2 = text_norm_fn(words)
-                    if words == words:
-                        break
-                    words = words2
-                else:
-                    raise RuntimeError(
-                        "Text normalizer is not idempotent."
-                        "This should never happen, please open an issue on "
-                        "https://github.com/chimechallenge/chime-utils",
-                        segment["words"],
-                        text_norm,
-                    )
-                segment["words"] = words
-                return segment
-
-            r = r.map(word_normalizer)
             h = h.map(word_normalizer)
 
             yield deveval, scenario, h, r, uem
 
+    if not stream:
+        # with stream the hypotheses are normalized by _submit_stream
+        _log_normalizer_stats(word_normalizer)
+
 
 def _print_table(error_rates, header):
     import tabulate
@@ -148,52 +273,377 @@ def _print_table(error_rates, header):
 
 
 def _dump_json(obj, file):
-    def to_dict(obj):
-        if dataclasses.is_dataclass(obj):
-            return dataclasses.asdict(obj)
-        else:
-            return obj
+    Path(file).write_text(simplejson.dumps(obj, default=_to_dict))
 
-    Path(file).write_text(simplejson.dumps(obj, default=to_dict))
 
+def _session_error_rate(metric, reference, hypothesis):
+    from meeteval.wer.wer.cp import cp_word_error_rate
+    from meeteval.wer.wer.time_constrained import (
+        time_constrained_minimum_permutation_word_error_rate,
+    )
 
-def _wer(hyp_folder, dasr_root, c_part, output_folder, text_norm, ignore, metric):
-    import meeteval
+    # same defaults meeteval.wer.tcpwer and meeteval.wer.cpwer use
+    if metric == "tcpWER":
+        return time_constrained_minimum_permutation_word_error_rate(
+            reference, hypothesis, collar=TCPWER_COLLAR
+        )
+    elif metric == "cpWER":
+        return cp_word_error_rate(reference, hypothesis)
+    else:
+        raise ValueError(metric)
 
-    if output_folder is None:
-        print("Skip write of details to the disk, because --output_folder is not given")
 
-    result = collections.defaultdict(dict)
-    details = collections.defaultdict(dict)
+def _run_inline(fn, *args):
+    future = Future()
+    future.set_result(fn(*args))
+    return future
 
-    data = _load_and_prepare(
-        hyp_folder, dasr_root, c_part, text_norm=text_norm, ignore_missing=ignore
-    )
-    for deveval, scenario, h, r, uem in data:
-        if metric == "tcpWER":
-            error_rates = meeteval.wer.tcpwer(
-                reference=r, hypothesis=h, collar=5, uem=uem
+
+class _SessionCache:
+    """
+    Per-session error rates of a previous run, keyed by the hash of the
+    (normalized, UEM filtered) reference and hypothesis session, the metric
+    and the collar. Only the sessions of the current run are saved again.
+    :param cache_file: Pathlike, pickled index, e.g. in the output folder.
+    """
+
+    def __init__(self, cache_file):
+        import meeteval
+
+        self.cache_file = Path(cache_file)
+        self.version = (_SESSION_CACHE_VERSION, meeteval.__version__)
+        self.cached = {}
+        self.used = {}
+        self.hits = 0
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "rb") as f:
+                    version, cached = pickle.load(f)
+                if version == self.version:
+                    self.cached = cached
+            except Exception as e:
+                logger.warning(f"Could not read {self.cache_file}, ignoring it: {e}")
+
+    @staticmethod
+    def key(metric, reference, hypothesis):
+        sha = hashlib.sha1()
+        sha.update(
+            simplejson.dumps(
+                [
+                    metric,
+                    TCPWER_COLLAR if metric == "tcpWER" else None,
+                    list(reference),
+                    list(hypothesis),
+                ],
+                use_decimal=True,
+                sort_keys=True,
+            ).encode("utf-8")
+        )
+        return sha.hexdigest()
+
+    def submit(self, submit, metric, reference, hypothesis):
+        """
+        Same as submit(_session_error_rate, metric, reference, hypothesis)
+        but returns the cached error rate if the inputs did not change.
+        """
+        key = self.key(metric, reference, hypothesis)
+        if key in self.cached.keys():
+            self.hits += 1
+            self.used[key] = self.cached[key]
+            return _run_inline(lambda: self.cached[key])
+
+        def store(future):
+            if not future.cancelled() and future.exception() is None:
+                self.used[key] = future.result()
+
+        future = submit(_session_error_rate, metric, reference, hypothesis)
+        future.add_done_callback(store)
+        return future
+
+    def save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.parent / f".{self.cache_file.name}.tmp"
+            with open(tmp_file, "wb") as f:
+                pickle.dump((self.version, self.used), f, protocol=4)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write the session cache {self.cache_file}: {e}")
+
+
+def _session_submitter(executor, metric, session_cache=None):
+    """
+    :return: callable, (reference, hypothesis) -> future of the session
+        error rate, scored by executor or right away if executor is None.
+    """
+    submit = executor.submit if executor is not None else _run_inline
+    if session_cache is not None:
+        return functools.partial(session_cache.submit, submit, metric)
+    return functools.partial(submit, _session_error_rate, metric)
+
+
+def _check_sessions(r, h):
+    """
+    Runs the meeteval.wer.tcpwer/cpwer checks on the session ids of the
+    hypotheses: warns on a few missing sessions, raises on unknown or too many
+    missing ones.
+    :raises ValueError: if the hypotheses do not match the reference sessions.
+    """
+    from meeteval.io.seglst import apply_multi_file
+
+    try:
+        apply_multi_file(lambda x, y: None, r, h)
+    except RuntimeError as e:
+        # meeteval raises RuntimeError, but these are bad hypotheses
+        raise ValueError(str(e)) from e
+
+
+def _submit_sessions(executor, metric, r, h, uem, sessions=None, session_cache=None):
+    """
+    Splits one scenario by session and submits each session to executor
+    (if None, sessions are scored right away). Sessions are checked
+    (and filtered by UEM) as meeteval.wer.tcpwer/cpwer do and scored with
+    the same per-session functions and defaults, serial and parallel
+    scoring both go through here (or _submit_stream).
+    :param sessions: set, if given only these sessions are scored.
+    :param session_cache: _SessionCache, unchanged sessions are not scored again.
+    :return: dict, session -> future, in reference order.
+    """
+    from meeteval.io import SegLST
+
+    submit = _session_submitter(executor, metric, session_cache)
+    if uem is not None:
+        r = r.filter_by_uem(uem)
+        h = h.filter_by_uem(uem)
+    _check_sessions(r, h)
+    r = r.groupby("session_id")
+    h = h.groupby("session_id")
+    return {
+        session: submit(r[session], h.get(session, SegLST([])))
+        for session in r.keys()
+        if sessions is None or session in sessions
+    }
+
+
+class _NotGroupedBySession(Exception):
+    pass
+
+
+def _iter_hypothesis_sessions(file):
+    """
+    Parses a SegLST JSON file incrementally and yields (session_id, segments)
+    as soon as all the segments of a session are read. This needs the
+    segments of each session to be contiguous in the file,
+    _NotGroupedBySession is raised otherwise.
+    """
+    done = set()
+    session, segments = None, []
+    for seg in iter_json_array(file, parse_float=Decimal):
+        if not isinstance(seg, dict) or "session_id" not in seg:
+            raise ValueError(
+                f"Unknown JSON format: {file}. Only SegLST format is supported."
             )
-        elif metric == "cpWER":
-            error_rates = meeteval.wer.cpwer(reference=r, hypothesis=h, uem=uem)
-        else:
-            raise ValueError(metric)
-        details[deveval][scenario] = error_rates
-        result[deveval][scenario] = meeteval.wer.combine_error_rates(error_rates)
-
-        _print_table(
-            [
-                {"session_id": k, **dataclasses.asdict(v)}
-                for k, v in error_rates.items()
-            ],
-            f"{metric} for {deveval} {scenario} Scenario",
+        for k in ("start_time", "end_time"):
+            # as meeteval.io.SegLST.parse
+            if k in seg:
+                seg[k] = Decimal(seg[k])
+        if seg["session_id"] != session:
+            if session is not None:
+                yield session, segments
+                done.add(session)
+            if seg["session_id"] in done:
+                raise _NotGroupedBySession(seg["session_id"])
+            session, segments = seg["session_id"], []
+        segments.append(seg)
+    if session is not None:
+        yield session, segments
+
+
+class _SegLSTWriter:
+    """
+    Writes segments incrementally, the output is the same as SegLST.dump.
+    """
+
+    def __init__(self, file):
+        self.f = open(file, "w")
+        self.f.write("[")
+        self.empty = True
+
+    def write(self, segments):
+        for seg in segments:
+            self.f.write("\n" if self.empty else ",\n")
+            self.f.write(
+                textwrap.indent(
+                    simplejson.dumps(seg, use_decimal=True, indent="  "), "  "
+                )
+            )
+            self.empty = False
+
+    def close(self):
+        self.f.write("]" if self.empty else "\n]")
+        self.f.close()
+
+
+def _submit_stream(
+    executor,
+    metric,
+    hyp_file,
+    r,
+    uem,
+    word_normalizer,
+    dump_file=None,
+    max_pending=None,
+    sessions=None,
+    session_cache=None,
+):
+    """
+    Same as _submit_sessions, but the hypothesis is parsed incrementally from
+    hyp_file and each session is normalized and submitted as soon as it is
+    complete, so only few hypothesis sessions are in memory at a time.
+    Falls back to loading hyp_file at once if its sessions are not contiguous.
+    :param executor: Executor, if None sessions are scored right away.
+    :param word_normalizer: applied to every hypothesis segment.
+    :param dump_file: Pathlike, where the normalized hypothesis is written.
+    :param max_pending: int, parsing waits while this many sessions
+        are still waiting for the executor.
+    :param sessions: set, if given only these sessions are scored.
+    :param session_cache: _SessionCache, unchanged sessions are not scored again.
+    :return: dict, session -> future, in reference order.
+    """
+    from meeteval.io import SegLST
+
+    submit = _session_submitter(executor, metric, session_cache)
+    r_full = r
+    uem_lines = {}
+    if uem is not None:
+        r = r.filter_by_uem(uem)
+        uem_lines = {line.filename: line for line in uem}
+    r_sessions = r.groupby("session_id")
+
+    futures = {}
+    writer = _SegLSTWriter(dump_file) if dump_file is not None else None
+    try:
+        for session, segments in _iter_hypothesis_sessions(hyp_file):
+            h = SegLST(segments).map(word_normalizer)
+            if writer is not None:
+                writer.write(h)
+            if session in uem_lines.keys():
+                # as SegLST.filter_by_uem
+                line = uem_lines[session]
+                h = h.filter(
+                    lambda x: line.begin_time <= x["end_time"]
+                    and x["start_time"] <= line.end_time
+                )
+            if len(h) == 0:
+                continue
+            if session not in r_sessions.keys() or (
+                sessions is not None and session not in sessions
+            ):
+                # not scored, missing references are reported by the check below
+                futures[session] = None
+                continue
+            if max_pending is not None:
+                pending = [
+                    x for x in futures.values() if x is not None and not x.done()
+                ]
+                if len(pending) >= max_pending:
+                    wait(pending, return_when=FIRST_COMPLETED)
+            futures[session] = submit(r_sessions[session], h)
+    except _NotGroupedBySession as e:
+        for x in futures.values():
+            if x is not None:
+                x.cancel()
+        logger.warning(
+            f"The sessions in {hyp_file} are not contiguous (e.g. {e}), "
+            "loading it at once."
         )
+        if writer is not None:
+            writer.close()
+            writer = None
+        h = _load_files([hyp_file]).map(word_normalizer)
+        if dump_file is not None:
+            h.dump(dump_file)
+        return _submit_sessions(
+            executor, metric, r_full, h, uem, sessions, session_cache
+        )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    _check_sessions(r, SegLST([{"session_id": x} for x in futures.keys()]))
+    return {
+        session: futures[session]
+        if session in futures.keys()
+        else submit(r_sessions[session], SegLST([]))
+        for session in r_sessions.keys()
+        if sessions is None or session in sessions
+    }
+
+
+def _collect_sessions(metric, futures):
+    """
+    Waits for the futures returned by _submit_sessions.
+    :return: dict, session -> ErrorRate, in reference order.
+    """
+    import meeteval
+
+    error_rates = {k: v.result() for k, v in futures.items()}
+    average = meeteval.wer.combine_error_rates(error_rates)
+    if metric == "tcpWER" and average.hypothesis_self_overlap is not None:
+        average.hypothesis_self_overlap.warn("hypothesis")
+    if metric == "tcpWER" and average.reference_self_overlap is not None:
+        average.reference_self_overlap.warn("reference")
+    return error_rates
+
+
+def _shard_sessions(r, shard):
+    """
+    Deterministic subset of the reference sessions for shard (i, N),
+    1 <= i <= N: the i-th of every N sessions in sorted order.
+    """
+    index, num_shards = shard
+    sessions = sorted({x["session_id"] for x in r})
+    return set(sessions[index - 1 :: num_shards])
+
+
+def _shard_file(output_folder, metric, shard):
+    index, num_shards = shard
+    return (
+        Path(output_folder) / f"{metric}_per_session.shard-{index}-of-{num_shards}.json"
+    )
+
+
+def _session_cache_file(output_folder, metric, shard=None):
+    if shard is None:
+        return Path(output_folder) / f".{metric}_session_cache.pkl"
+    return (
+        Path(output_folder)
+        / f".{metric}_session_cache.shard-{shard[0]}-of-{shard[1]}.pkl"
+    )
+
+
+def _report(details, metric, output_folder=None, details_format="json"):
+    """
+    Prints the per-session, per-scenario and macro-averaged tables and
+    writes the details to output_folder.
+    :param details: dict, dset_part -> scenario -> session -> ErrorRate.
+    :param metric: str, 'tcpWER' or 'cpWER'.
+    :param output_folder: Pathlike, where the details are written.
+    :param details_format: str, 'json' or 'jsonl.gz', see write_results.
+    """
+    import meeteval
 
-        if output_folder is not None:
-            (output_folder / "hyp" / deveval).mkdir(parents=True, exist_ok=True)
-            (output_folder / "ref" / deveval).mkdir(parents=True, exist_ok=True)
-            h.dump(output_folder / "hyp" / deveval / f"{scenario}.json")
-            r.dump(output_folder / "ref" / deveval / f"{scenario}.json")
+    result = collections.defaultdict(dict)
+    for deveval, scenarios in details.items():
+        for scenario, error_rates in scenarios.items():
+            result[deveval][scenario] = meeteval.wer.combine_error_rates(error_rates)
+            _print_table(
+                [
+                    {"session_id": k, **dataclasses.asdict(v)}
+                    for k, v in error_rates.items()
+                ],
+                f"{metric} for {deveval} {scenario} Scenario",
+            )
 
     _print_table(
         [
@@ -219,7 +669,166 @@ def _wer(hyp_folder, dasr_root, c_part, output_folder, text_norm, ignore, metric
             "Skip write of details to the disk, because --output_folder is not given"
         )
     else:
-        output_folder = Path(output_folder)
-        output_folder.mkdir(parents=True, exist_ok=True)
-        _dump_json(details, str(output_folder / f"{metric}_per_session.json"))
-        _dump_json(details, str(output_folder / f"{metric}_per_scenario.json"))
+        write_results(output_folder, metric, details, result, details_format)
+
+
+def _wer(
+    hyp_folder,
+    dasr_root,
+    c_part,
+    output_folder,
+    text_norm,
+    ignore,
+    metric,
+    num_jobs=1,
+    use_cache=False,
+    cache_dir=None,
+    shard=None,
+    use_session_cache=False,
+    details_format="json",
+):
+    if output_folder is None:
+        print("Skip write of details to the disk, because --output_folder is not given")
+    if shard is not None:
+        assert output_folder is not None, "Sharded scoring needs an output folder."
+        assert 1 <= shard[0] <= shard[1], f"Invalid shard {shard[0]}/{shard[1]}."
+
+    details = collections.defaultdict(dict)
+
+    data = _load_and_prepare(
+        hyp_folder,
+        dasr_root,
+        c_part,
+        text_norm=text_norm,
+        ignore_missing=ignore,
+        use_cache=use_cache,
+        cache_dir=cache_dir,
+        stream=True,
+    )
+    word_normalizer = _get_word_normalizer(text_norm)
+    session_cache = None
+    if use_session_cache and output_folder is not None:
+        # sessions with unchanged inputs are taken from the previous run
+        session_cache = _SessionCache(_session_cache_file(output_folder, metric, shard))
+    executor = ProcessPoolExecutor(num_jobs) if num_jobs > 1 else None
+    try:
+        # hypotheses are streamed session by session, with an executor the
+        # (scenario, session) pairs of all scenarios go through the same pool
+        submitted = []
+        for deveval, scenario, hyp_file, r, uem in data:
+            dump_file = None
+            if output_folder is not None and shard is None:
+                # with shards, nobody writes the (shared) full dumps
+                (output_folder / "hyp" / deveval).mkdir(parents=True, exist_ok=True)
+                (output_folder / "ref" / deveval).mkdir(parents=True, exist_ok=True)
+                dump_file = output_folder / "hyp" / deveval / f"{scenario}.json"
+                r.dump(output_folder / "ref" / deveval / f"{scenario}.json")
+            futures = _submit_stream(
+                executor,
+                metric,
+                hyp_file,
+                r,
+                uem,
+                word_normalizer,
+                dump_file,
+                max_pending=2 * num_jobs if executor is not None else None,
+                sessions=_shard_sessions(r, shard) if shard is not None else None,
+                session_cache=session_cache,
+            )
+            submitted.append((deveval, scenario, futures))
+
+        for deveval, scenario, futures in submitted:
+            details[deveval][scenario] = _collect_sessions(metric, futures)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    _log_normalizer_stats(word_normalizer)
+    if session_cache is not None:
+        num_sessions = sum(len(v) for x in details.values() for v in x.values())
+        logger.info(
+            f"Reused {session_cache.hits} of {num_sessions} sessions "
+            f"from {session_cache.cache_file}."
+        )
+        session_cache.save()
+
+    if shard is None:
+        _report(details, metric, output_folder, details_format)
+        return
+
+    for deveval, scenarios in details.items():
+        for scenario, error_rates in scenarios.items():
+            _print_table(
+                [
+                    {"session_id": k, **dataclasses.asdict(v)}
+                    for k, v in error_rates.items()
+                ],
+                f"{metric} for {deveval} {scenario} Scenario "
+                f"(shard {shard[0]}/{shard[1]})",
+            )
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    shard_file = _shard_file(output_folder, metric, shard)
+    _dump_json(
+        {
+            "metric": metric,
+            "dset_part": c_part,
+            "shard": shard[0],
+            "num_shards": shard[1],
+            "details": details,
+        },
+        str(shard_file),
+    )
+    logger.info(
+        f"Wrote shard {shard[0]}/{shard[1]} to {shard_file}, "
+        "combine all the shards with `chime-utils score merge`."
+    )
+
+
+def _merge_shards(shard_files):
+    """
+    Combines the partial details written by sharded scoring.
+    :param shard_files: list of Pathlike, one file for each shard.
+    :return: (str, dict), metric and details as used by _report.
+    """
+    from meeteval.wer import ErrorRate
+
+    # decimals as written by _dump_json, e.g. for the self-overlap times
+    shards = [
+        simplejson.loads(Path(f).read_text(), use_decimal=True)
+        for f in sorted(shard_files)
+    ]
+    if len(shards) == 0:
+        raise FileNotFoundError("No shards to merge.")
+    metrics = {x["metric"] for x in shards}
+    dset_parts = {x["dset_part"] for x in shards}
+    num_shards = {x["num_shards"] for x in shards}
+    assert len(metrics) == 1, f"Cannot merge shards of different metrics {metrics}."
+    assert (
+        len(dset_parts) == 1
+    ), f"Cannot merge shards of different splits {sorted(dset_parts)}."
+    assert (
+        len(num_shards) == 1
+    ), f"Cannot merge shards with different numbers of shards {sorted(num_shards)}."
+    num_shards = num_shards.pop()
+    found = collections.Counter(x["shard"] for x in shards)
+    missing = sorted(set(range(1, num_shards + 1)) - set(found.keys()))
+    assert len(missing) == 0, f"Shards {missing} of {num_shards} are missing."
+    duplicated = sorted(k for k, v in found.items() if v > 1)
+    assert len(duplicated) == 0, f"Shards {duplicated} are given more than once."
+
+    details = collections.defaultdict(dict)
+    for shard in shards:
+        for deveval, scenarios in shard["details"].items():
+            for scenario, error_rates in scenarios.items():
+                details[deveval].setdefault(scenario, {}).update(
+                    {k: ErrorRate.from_dict(v) for k, v in error_rates.items()}
+                )
+    # same order as unsharded scoring
+    return metrics.pop(), {
+        deveval: {
+            scenario: dict(sorted(scenarios[scenario].items()))
+            for scenario in sorted(scenarios.keys(), key=SCORING_SCENARIOS.index)
+        }
+        for deveval, scenarios in details.items()
+    }
@@ -0,0 +1,162 @@
+"""
+Writing and (lazy) reading of the scoring results:
+<metric>_per_scenario.json holds the error rate of each scenario and
+<metric>_per_session.json the error rate of each session.
+With details_format="jsonl.gz" the per-session JSON only keeps the counts
+and the full details (e.g. the speaker assignments) go to a gzip'd JSON-lines
+<metric>_details.jsonl.gz, one line per session, that is read on demand.
+"""
+
+import dataclasses
+import gzip
+from pathlib import Path
+
+import simplejson
+
+DETAILS_FORMATS = ["json", "jsonl.gz"]
+# large fields only kept in the compressed details
+_DETAILS_ONLY_FIELDS = ["assignment"]
+
+
+def _to_dict(obj):
+    # shallow, nested dataclasses (e.g. SelfOverlap) go through
+    # default again, faster than dataclasses.asdict for big assignments
+    if dataclasses.is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    else:
+        return obj
+
+
+def _dumps(obj, compact=False):
+    if compact:
+        return simplejson.dumps(obj, default=_to_dict, separators=(",", ":"))
+    return simplejson.dumps(obj, default=_to_dict)
+
+
+def _details_file(output_folder, metric):
+    return Path(output_folder) / f"{metric}_details.jsonl.gz"
+
+
+def write_results(output_folder, metric, details, result, details_format="json"):
+    """
+    :param output_folder: Pathlike, where the results are written.
+    :param metric: str, e.g. 'tcpWER'.
+    :param details: dict, dset_part -> scenario -> session -> ErrorRate.
+    :param result: dict, dset_part -> scenario -> ErrorRate.
+    :param details_format: str, 'json' (everything in the per-session JSON)
+        or 'jsonl.gz' (full details in gzip'd JSON lines).
+    :return: list, written files.
+    """
+    assert (
+        details_format in DETAILS_FORMATS
+    ), f"details_format must be one of {DETAILS_FORMATS}"
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    written = [
+        output_folder / f"{metric}_per_session.json",
+        output_folder / f"{metric}_per_scenario.json",
+    ]
+    written[1].write_text(_dumps(result))
+    if details_format == "json":
+        written[0].write_text(_dumps(details))
+        # stale details of a previous run would shadow the new ones
+        _details_file(output_folder, metric).unlink(missing_ok=True)
+        return written
+
+    summary = {}
+    written.append(_details_file(output_folder, metric))
+    with gzip.open(written[-1], "wt", encoding="utf-8") as f:
+        for dset_part, scenarios in details.items():
+            for scenario, sessions in scenarios.items():
+                for session, error_rate in sessions.items():
+                    c_dict = _to_dict(error_rate)
+                    summary.setdefault(dset_part, {}).setdefault(scenario, {})[
+                        session
+                    ] = {
+                        k: v for k, v in c_dict.items() if k not in _DETAILS_ONLY_FIELDS
+                    }
+                    line = {
+                        "dset_part": dset_part,
+                        "scenario": scenario,
+                        "session": session,
+                        "details": c_dict,
+                    }
+                    f.write(_dumps(line, compact=True) + "\n")
+    written[0].write_text(_dumps(summary))
+    return written
+
+
+class ScoringResults:
+    """
+    Lazy view on the results written by write_results,
+    files are only read when needed.
+    :param output_folder: Pathlike, the output folder of `score tcpwer/cpwer`.
+    :param metric: str, e.g. 'tcpWER'.
+
+    e.g. ScoringResults("out", "tcpWER").error_rate("dev", "chime6", "S02")
+    """
+
+    def __init__(self, output_folder, metric="tcpWER"):
+        self.output_folder = Path(output_folder)
+        self.metric = metric
+        self._per_scenario = None
+        self._per_session = None
+        self._details = None
+
+    @property
+    def details_file(self):
+        return _details_file(self.output_folder, self.metric)
+
+    @property
+    def per_scenario(self):
+        """
+        dict, dset_part -> scenario -> error rate (as dict).
+        """
+        if self._per_scenario is None:
+            self._per_scenario = simplejson.loads(
+                (self.output_folder / f"{self.metric}_per_scenario.json").read_text()
+            )
+        return self._per_scenario
+
+    @property
+    def per_session(self):
+        """
+        dict, dset_part -> scenario -> session -> error rate (as dict),
+        without the assignments if the details are in the jsonl.gz.
+        """
+        if self._per_session is None:
+            self._per_session = simplejson.loads(
+                (self.output_folder / f"{self.metric}_per_session.json").read_text()
+            )
+        return self._per_session
+
+    def sessions(self, dset_part, scenario):
+        return list(self.per_session[dset_part][scenario].keys())
+
+    def details(self, dset_part, scenario, session):
+        """
+        :return: dict, all the fields of the ErrorRate of a session.
+        """
+        if not self.details_file.exists():
+            return self.per_session[dset_part][scenario][session]
+        if self._details is None:
+            # the file is only read when the details are needed
+            self._details = {}
+            with gzip.open(self.details_file, "rt", encoding="utf-8") as f:
+                for line in f:
+                    c_line = simplejson.loads(line)
+                    self._details[
+                        c_line["dset_part"], c_line["scenario"], c_line["session"]
+                    ] = c_line["details"]
+        return self._details[dset_part, scenario, session]
+
+    def error_rate(self, dset_part, scenario, session):
+        """
+        :return: meeteval ErrorRate of a session.
+        """
+        from meeteval.wer import ErrorRate
+
+        return ErrorRate.from_dict(self.details(dset_part, scenario, session))
+
+    def close(self):
+        self._details = None
@@ -0,0 +1,243 @@
+"""
+Long-running scoring service: references, UEMs and text normalizers are
+prepared once and kept in memory, hypotheses are posted over HTTP and
+scored with tcpWER or cpWER.
+"""
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+import simplejson
+
+from chime_utils.dprep.utils import DasrIndex
+from chime_utils.scoring.meeteval import (
+    SCORING_SCENARIOS,
+    _collect_sessions,
+    _default_ref_cache_dir,
+    _get_word_normalizer,
+    _load_files,
+    _log_normalizer_stats,
+    _prepare_reference,
+    _ref_cache_file,
+    _submit_sessions,
+    _to_dict,
+)
+
+logging.basicConfig(
+    format=(
+        "%(asctime)s,%(msecs)d %(levelname)-8s [%(filename)s:%(lineno)d] %(message)s"
+    ),
+    datefmt="%Y-%m-%d:%H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+SCORING_METRICS = ["tcpWER", "cpWER"]
+
+
+class ScoringService:
+    """
+    Keeps the prepared references of a DASR root in memory and scores
+    hypotheses against them.
+    :param dasr_root: Pathlike, DASR root with the scoring references.
+    :param dset_parts: list, splits to load e.g. ['dev', 'eval'].
+    :param text_norm: str, text normalization, see get_txt_norm.
+    :param num_jobs: int, number of sessions scored in parallel.
+    :param cache_dir: Pathlike, reference cache folder (see score tcpwer).
+    :param use_cache: bool, whether to use the reference cache at startup.
+    """
+
+    def __init__(
+        self,
+        dasr_root,
+        dset_parts=("dev",),
+        text_norm="chime8",
+        num_jobs=1,
+        cache_dir=None,
+        use_cache=True,
+    ):
+        self.dasr_root = Path(dasr_root)
+        self.text_norm = text_norm
+        cache_dir = _default_ref_cache_dir() if cache_dir is None else cache_dir
+        index = DasrIndex.load(self.dasr_root)
+        self.references = {}
+        for deveval in dset_parts:
+            for scenario in SCORING_SCENARIOS:
+                if not index.has_split(deveval, scenario):
+                    continue
+                ref_files = list(
+                    index.transcription_files(deveval, scenario, scoring=True).values()
+                )
+                if len(ref_files) == 0:
+                    continue
+                self.references[(deveval, scenario)] = _prepare_reference(
+                    ref_files,
+                    index.uem_file(deveval, scenario),
+                    text_norm,
+                    cache_file=_ref_cache_file(
+                        cache_dir, self.dasr_root, deveval, scenario, text_norm
+                    )
+                    if use_cache
+                    else None,
+                )
+                logger.info(f"Loaded {deveval} {scenario} references.")
+        self.executor = ProcessPoolExecutor(num_jobs) if num_jobs > 1 else None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def load_hypotheses(self, hyp_folder, dset_part):
+        """
+        Loads hyp_folder/<dset_part>/<scenario>.json for every scenario.
+        :return: dict, scenario -> hypothesis SegLST.
+        """
+        hyps = {}
+        for scenario in SCORING_SCENARIOS:
+            file = Path(hyp_folder) / dset_part / f"{scenario}.json"
+            if file.exists():
+                hyps[scenario] = _load_files([file])
+        return hyps
+
+    def score(self, hypotheses, dset_part="dev", metric="tcpWER"):
+        """
+        Scores the hypotheses of one split, scenarios missing in hypotheses
+        are skipped.
+        :param hypotheses: dict, scenario -> SegLST or list of CHiME-style
+            segments (with session_id, speaker, start_time, end_time and words).
+        :param dset_part: str, which split the hypotheses are for.
+        :param metric: str, 'tcpWER' or 'cpWER'.
+        :return: dict, per-session and per-scenario error rates for each
+            scenario, the macro-averaged error rate and the elapsed time.
+        """
+        import meeteval
+
+        assert metric in SCORING_METRICS, f"metric must be one of {SCORING_METRICS}"
+        start = time.perf_counter()
+        # a normalizer per request, its cache would otherwise keep the
+        # words of every hypothesis ever posted
+        word_normalizer = _get_word_normalizer(self.text_norm)
+        to_score = {}
+        for scenario, h in hypotheses.items():
+            if (dset_part, scenario) not in self.references.keys():
+                raise KeyError(f"No {dset_part} references for {scenario}.")
+            if not isinstance(h, meeteval.io.SegLST):
+                # parsed as if it was loaded from a JSON file
+                h = meeteval.io.SegLST.parse(simplejson.dumps(list(h)))
+            h = h.map(word_normalizer)
+            to_score[scenario] = (h, *self.references[(dset_part, scenario)])
+        _log_normalizer_stats(word_normalizer)
+
+        # submit the sessions of all scenarios before waiting for any
+        futures = {
+            scenario: _submit_sessions(self.executor, metric, r, h, uem)
+            for scenario, (h, r, uem) in to_score.items()
+        }
+        per_session = {
+            scenario: _collect_sessions(metric, x) for scenario, x in futures.items()
+        }
+
+        out = {"metric": metric, "dset_part": dset_part, "scenarios": {}}
+        for scenario, error_rates in per_session.items():
+            out["scenarios"][scenario] = {
+                "error_rate": meeteval.wer.combine_error_rates(error_rates),
+                "sessions": error_rates,
+            }
+        out["macro_error_rate"] = (
+            float(
+                np.mean([x["error_rate"].error_rate for x in out["scenarios"].values()])
+            )
+            if len(per_session) > 0
+            else None
+        )
+        out["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return out
+
+
+def _make_handler(service):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        """
+        GET /health: loaded references.
+        POST /score: JSON body with "metric" ('tcpWER' or 'cpWER'),
+            "dset_part" and either "hyp_folder" (folder as for `score tcpwer`)
+            or "hypotheses" (scenario -> list of CHiME-style segments).
+        """
+
+        def _reply(self, code, obj):
+            body = simplejson.dumps(obj, default=_to_dict).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path != "/health":
+                return self._reply(404, {"error": f"Unknown endpoint {self.path}"})
+            self._reply(
+                200,
+                {
+                    "status": "ok",
+                    "text_norm": service.text_norm,
+                    "references": [
+                        {"dset_part": x, "scenario": y}
+                        for x, y in service.references.keys()
+                    ],
+                },
+            )
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/score":
+                return self._reply(404, {"error": f"Unknown endpoint {self.path}"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = simplejson.loads(self.rfile.read(length) or b"{}")
+                dset_part = request.get("dset_part", "dev")
+                if "hypotheses" in request.keys():
+                    hypotheses = request["hypotheses"]
+                elif "hyp_folder" in request.keys():
+                    hypotheses = service.load_hypotheses(
+                        request["hyp_folder"], dset_part
+                    )
+                else:
+                    raise ValueError("Either hypotheses or hyp_folder must be given.")
+                result = service.score(
+                    hypotheses, dset_part, request.get("metric", "tcpWER")
+                )
+            except (AssertionError, KeyError, ValueError, FileNotFoundError) as e:
+                return self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+            except Exception as e:
+                logger.exception("Scoring failed.")
+                return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            logger.info(
+                f"Scored {', '.join(result['scenarios'].keys())} ({dset_part}) "
+                f"in {result['elapsed_ms']:.0f} ms, "
+                f"macro {result['metric']}: {result['macro_error_rate']}."
+            )
+            self._reply(200, result)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ScoringHandler
+
+
+def serve(service, host="127.0.0.1", port=8000):
+    """
+    Serves service over HTTP until interrupted,
+    requests are handled one at a time.
+    """
+    server = HTTPServer((host, port), _make_handler(service))
+    logger.info(f"Scoring server listening on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
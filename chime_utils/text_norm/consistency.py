@@ -0,0 +1,116 @@
+"""
+Idempotence check for the text normalizers: normalizing an already
+normalized utterance should not change it.
+Each unique string is normalized only once, in parallel.
+"""
+
+import difflib
+from concurrent.futures import ProcessPoolExecutor
+
+from chime_utils.text_norm import get_txt_norm
+
+_worker_normalizer = None
+
+
+def _init_worker(text_norm):
+    global _worker_normalizer
+    _worker_normalizer = get_txt_norm(text_norm)
+
+
+def _normalize_chunk(texts):
+    return [_worker_normalizer(x) for x in texts]
+
+
+def normalize_unique(
+    texts, text_norm="chime8", cache=None, num_jobs=1, chunk_size=1000
+):
+    """
+    Normalizes each unique string in texts once.
+    :param texts: iterable of str.
+    :param text_norm: str, which normalization, see get_txt_norm.
+    :param cache: dict, str -> normalized str, strings already in it are not
+        normalized again and new results are added to it.
+    :param num_jobs: int, number of parallel workers.
+    :param chunk_size: int, number of strings sent to a worker at a time.
+    :return: dict, the cache.
+    """
+    cache = {} if cache is None else cache
+    todo = [x for x in dict.fromkeys(texts) if x not in cache]
+    chunks = [todo[i : i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    if num_jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(
+            num_jobs, initializer=_init_worker, initargs=(text_norm,)
+        ) as ex:
+            results = ex.map(_normalize_chunk, chunks)
+            for chunk, normalized in zip(chunks, results):
+                cache.update(zip(chunk, normalized))
+    else:
+        _init_worker(text_norm)
+        for chunk in chunks:
+            cache.update(zip(chunk, _normalize_chunk(chunk)))
+    return cache
+
+
+def word_diff(a, b, context=2):
+    """
+    Minimized word-level diff between two strings, only the changed words
+    and some context around them are kept, e.g. "... i [-will-] {+shall+} go".
+    """
+    a_words, b_words = a.split(), b.split()
+    tokens = []
+    changed = []
+    matcher = difflib.SequenceMatcher(a=a_words, b=b_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            tokens.extend(a_words[i1:i2])
+            continue
+        if i2 > i1:
+            changed.append(len(tokens))
+            tokens.append("[-" + " ".join(a_words[i1:i2]) + "-]")
+        if j2 > j1:
+            changed.append(len(tokens))
+            tokens.append("{+" + " ".join(b_words[j1:j2]) + "+}")
+
+    keep = [False] * len(tokens)
+    for indx in changed:
+        for k in range(max(0, indx - context), min(len(tokens), indx + context + 1)):
+            keep[k] = True
+    out = []
+    for token, c_keep in zip(tokens, keep):
+        if c_keep:
+            out.append(token)
+        elif len(out) == 0 or out[-1] != "...":
+            out.append("...")
+    return " ".join(out)
+
+
+def check_norm_consistency(texts, text_norm="chime8", num_jobs=1):
+    """
+    Applies the normalization two times to every unique string and collects
+    all the strings for which the second application changes the result.
+    :param texts: iterable of str, e.g. all the utterances of a dataset.
+    :param text_norm: str, which normalization, see get_txt_norm.
+    :param num_jobs: int, number of parallel workers.
+    :return: list of dicts with original, first and second application and
+        a minimized diff between the two applications.
+    """
+    texts = list(dict.fromkeys(texts))
+    cache = normalize_unique(texts, text_norm, num_jobs=num_jobs)
+    # second round, only strings the first round produced for the first time
+    cache = normalize_unique(
+        [cache[x] for x in texts], text_norm, cache=cache, num_jobs=num_jobs
+    )
+    inconsistent = []
+    for text in texts:
+        first = cache[text]
+        second = cache[first]
+        if first != second:
+            inconsistent.append(
+                {
+                    "original": text,
+                    "first": first,
+                    "second": second,
+                    "diff": word_diff(first, second),
+                }
+            )
+    return inconsistent
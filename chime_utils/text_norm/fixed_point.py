@@ -0,0 +1,78 @@
+"""
+Fixed-point text normalization: the normalizer is applied until the output
+does not change anymore, so that the result is idempotent even if a single
+pass of the underlying normalizer is not.
+"""
+
+from collections import Counter
+
+from chime_utils.text_norm import get_txt_norm
+
+
+class FixedPointNormalizer:
+    """
+    Applies a text normalizer until convergence, caching the fixed point of
+    every unique string (and of the intermediate results on the way to it).
+    Strings that are already stable cost a single pass,
+    strings seen before cost none.
+    :param txt_norm: str or callable, normalization (see get_txt_norm)
+        or the normalizer itself. None means no normalization.
+    :param max_passes: int, maximum number of applications of the normalizer
+        before giving up with a RuntimeError.
+    """
+
+    def __init__(self, txt_norm="chime8", max_passes=6):
+        if callable(txt_norm):
+            self.txt_norm = getattr(txt_norm, "__name__", type(txt_norm).__name__)
+            self.normalizer = txt_norm
+        else:
+            self.txt_norm = txt_norm
+            self.normalizer = get_txt_norm(txt_norm)
+        self.max_passes = max_passes
+        self.cache = {}
+        # number of normalizer applications needed -> number of unique strings
+        self.pass_counts = Counter()
+        self.cache_hits = 0
+
+    def __call__(self, text):
+        if self.normalizer is None:
+            return text
+        if text in self.cache:
+            self.cache_hits += 1
+            return self.cache[text]
+
+        chain = [text]
+        current = text
+        for n_pass in range(1, self.max_passes + 1):
+            normalized = self.normalizer(current)
+            if normalized == current:
+                fixed_point = current
+                break
+            if normalized in self.cache:
+                fixed_point = self.cache[normalized]
+                break
+            chain.append(normalized)
+            current = normalized
+        else:
+            raise RuntimeError(
+                f"Text normalizer {self.txt_norm} did not converge after "
+                f"{self.max_passes} passes. This should never happen, please open "
+                "an issue on https://github.com/chimechallenge/chime-utils",
+                text,
+                chain,
+            )
+        for x in chain:
+            self.cache[x] = fixed_point
+        self.pass_counts[n_pass] += 1
+        return fixed_point
+
+    def stats(self):
+        """
+        :return: dict, number of cached strings, cache hits and the
+            histogram of passes needed to reach the fixed point.
+        """
+        return {
+            "cached": len(self.cache),
+            "cache_hits": self.cache_hits,
+            "pass_counts": dict(sorted(self.pass_counts.items())),
+        }
@@ -36,5 +36,8 @@ setup(
         ]
     },
     include_package_data=True,
-    extras_require={"dev": ["pytest", "scipy", "black", "flake8", "isort"]},
+    extras_require={
+        "dev": ["pytest", "black", "flake8", "isort"],
+        "columnar": ["pyarrow"],
+    },
 )
@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+WORDS = ["hello", "world", "okay", "so", "um", "yes", "[noise]", "Right,", "no"]
+
+
+def make_dasr_root(
+    root, scenarios=("chime6", "dipco"), sessions=("S01", "S02", "S03"), duration=6
+):
+    """
+    Tiny DASR root with the dev split of scenarios: 2 arrays with 2 channels
+    and 2 close-talk microphones per session, plus the annotations.
+    """
+    rng = np.random.default_rng(0)
+    for scenario in scenarios:
+        c_dir = root / scenario
+        for folder in [
+            "audio",
+            "devices",
+            "transcriptions",
+            "transcriptions_scoring",
+            "uem",
+        ]:
+            (c_dir / folder / "dev").mkdir(parents=True)
+        uem = []
+        for session in sessions:
+            devices = {}
+            for array in ["U01", "U02"]:
+                for channel in [1, 2]:
+                    devices[f"{session}_{array}.CH{channel}"] = {
+                        "is_close_talk": False,
+                        "speaker": None,
+                        "channel": channel,
+                        "tot_channels": 4,
+                        "device_type": "array",
+                    }
+            for spk in ["P01", "P02"]:
+                devices[f"{session}_{spk}"] = {
+                    "is_close_talk": True,
+                    "speaker": spk,
+                    "channel": 1,
+                    "tot_channels": 2,
+                    "device_type": "close-talk",
+                }
+            for device in devices.keys():
+                sf.write(
+                    c_dir / "audio" / "dev" / f"{device}.wav",
+                    rng.uniform(-0.1, 0.1, size=16000 * duration),
+                    16000,
+                )
+            segments = []
+            for start in np.arange(0, duration - 1, 0.75):
+                segments.append(
+                    {
+                        "speaker": str(rng.choice(["P01", "P02"])),
+                        "start_time": f"{start:.2f}",
+                        "end_time": f"{start + rng.uniform(0.5, 1.0):.2f}",
+                        "words": " ".join(rng.choice(WORDS, size=rng.integers(1, 5))),
+                        "session_id": session,
+                    }
+                )
+            for ann in ["transcriptions", "transcriptions_scoring"]:
+                with open(c_dir / ann / "dev" / f"{session}.json", "w") as f:
+                    json.dump(segments, f)
+            with open(c_dir / "devices" / "dev" / f"{session}.json", "w") as f:
+                json.dump(devices, f)
+            uem.append(f"{session} 1 0.000 {duration:.3f}")
+        (c_dir / "uem" / "dev" / "all.uem").write_text("\n".join(uem) + "\n")
+    return root
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory, monkeypatch):
+    # index and reference caches of the tests stay out of the user cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+
+
+@pytest.fixture
+def fake_dasr(tmp_path):
+    return make_dasr_root(tmp_path / "dasr")
+
+
+@pytest.fixture
+def fake_hyp(tmp_path, fake_dasr):
+    """
+    Hypotheses for the dev split of fake_dasr: the references with
+    other speaker labels, shifted times and some words changed.
+    """
+    rng = np.random.default_rng(1)
+    hyp_folder = tmp_path / "hyp"
+    (hyp_folder / "dev").mkdir(parents=True)
+    for scenario in ["chime6", "dipco"]:
+        hyp = []
+        for file in sorted(
+            (fake_dasr / scenario / "transcriptions_scoring").rglob("*.json")
+        ):
+            with open(file) as f:
+                for seg in json.load(f):
+                    words = seg["words"].split()
+                    if rng.uniform() < 0.3:
+                        words[rng.integers(len(words))] = "uh"
+                    shift = rng.uniform(-0.2, 0.2)
+                    hyp.append(
+                        {
+                            "session_id": seg["session_id"],
+                            "speaker": {"P01": "spk1", "P02": "spk0"}[seg["speaker"]],
+                            "start_time": max(0, float(seg["start_time"]) + shift),
+                            "end_time": float(seg["end_time"]) + shift,
+                            "words": " ".join(words),
+                        }
+                    )
+        with open(hyp_folder / "dev" / f"{scenario}.json", "w") as f:
+            json.dump(hyp, f)
+    return hyp_folder
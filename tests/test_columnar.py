@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from chime_utils.dgen.columnar import export_columnar, load_columnar
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_export_columnar(tmp_path):
+    for scenario, split in [("chime6", "train"), ("dipco", "dev")]:
+        for folder in ["uem", "transcriptions"]:
+            (tmp_path / "dasr" / scenario / folder / split).mkdir(parents=True)
+        (tmp_path / "dasr" / scenario / "uem" / split / "all.uem").write_text(
+            "S02 1 0.000 10.000\n"
+        )
+        segments = [
+            {"speaker": "P06", "start_time": "4.5", "end_time": "6.0", "words": "Hi."},
+            {"speaker": "P05", "start_time": "1.0", "end_time": "2.0", "words": "OK"},
+        ]
+        with open(
+            tmp_path / "dasr" / scenario / "transcriptions" / split / "S02.json", "w"
+        ) as f:
+            json.dump(segments, f)
+
+    written = export_columnar(tmp_path / "dasr", tmp_path / "columnar")
+    assert len(written) == 2
+
+    table = load_columnar(tmp_path / "columnar")
+    assert table.num_rows == 4
+    table = load_columnar(
+        tmp_path / "columnar", filter=pa.compute.field("corpus") == "chime6"
+    ).to_pylist()
+    assert [x["start"] for x in table] == [1.0, 4.5]
+    assert [x["speaker"] for x in table] == ["P05", "P06"]
+    assert table[1]["words"] == "Hi."
+    assert table[1]["words_norm"] == "hi"
+    assert table[0]["split"] == "train"
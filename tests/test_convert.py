@@ -0,0 +1,45 @@
+import json
+
+from chime_utils.scoring.convert import convert_seglst_tree
+
+
+def test_convert_seglst_tree(tmp_path):
+    for sess in ["S01", "S02"]:
+        (tmp_path / "hyp" / "chime6").mkdir(parents=True, exist_ok=True)
+        with open(tmp_path / "hyp" / "chime6" / f"{sess}.json", "w") as f:
+            json.dump(
+                [
+                    {
+                        "session_id": sess,
+                        "speaker": "P01",
+                        "start_time": "0.5",
+                        "end_time": "1.5",
+                        "words": "hello world",
+                    }
+                ],
+                f,
+            )
+    (tmp_path / "hyp" / "broken.json").write_text("[{")
+
+    written, failed = convert_seglst_tree(tmp_path / "hyp", tmp_path / "stm", "stm")
+    assert failed == [tmp_path / "hyp" / "broken.json"]
+    assert written == [
+        tmp_path / "stm" / "chime6" / "S01.stm",
+        tmp_path / "stm" / "chime6" / "S02.stm",
+    ]
+    assert (tmp_path / "stm" / "chime6" / "S01.stm").read_text().split() == [
+        "S01",
+        "1",
+        "P01",
+        "0.5",
+        "1.5",
+        "hello",
+        "world",
+    ]
+
+    written, _ = convert_seglst_tree(
+        tmp_path / "hyp", tmp_path / "rttm", "rttm", combine=True, num_jobs=2
+    )
+    assert tmp_path / "rttm" / "chime6.rttm" in written
+    lines = (tmp_path / "rttm" / "chime6.rttm").read_text().splitlines()
+    assert [x.split()[1] for x in lines] == ["S01", "S02"]
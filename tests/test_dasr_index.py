@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from chime_utils.dprep.utils import DasrIndex, _default_index_cache_file
+
+
+@pytest.fixture
+def dasr_root(tmp_path):
+    scenario_dir = tmp_path / "chime6"
+    for folder in ["uem", "devices", "transcriptions", "transcriptions_scoring"]:
+        (scenario_dir / folder / "dev").mkdir(parents=True)
+    (scenario_dir / "uem" / "dev" / "all.uem").write_text(
+        "S02 1 0.000 10.000\nS09 1 5.000 20.000\n"
+    )
+    for sess in ["S02", "S09"]:
+        segments = [
+            {"speaker": "P05", "start_time": "1.0", "end_time": "2.5", "words": "hi"},
+            {"speaker": "P06", "start_time": "2.0", "end_time": "3.0", "words": "yo"},
+        ]
+        for ann in ["transcriptions", "transcriptions_scoring"]:
+            with open(scenario_dir / ann / "dev" / f"{sess}.json", "w") as f:
+                json.dump(segments, f)
+        with open(scenario_dir / "devices" / "dev" / f"{sess}.json", "w") as f:
+            json.dump({"U01.CH1": {"is_close_talk": False}}, f)
+    return tmp_path
+
+
+def test_dasr_index(dasr_root):
+    index = DasrIndex.load(dasr_root)
+    # the cache goes to the user cache, not to the dataset root
+    assert _default_index_cache_file(dasr_root).exists()
+    assert sorted(x.name for x in dasr_root.iterdir()) == ["chime6"]
+    index = DasrIndex.load(dasr_root)
+    assert list(index.scenarios.keys()) == ["chime6"]
+    assert index.sessions("dev", "chime6") == ["S02", "S09"]
+    assert index.uem("dev", "chime6")["S09"] == (5.0, 20.0)
+    assert not index.has_split("eval", "chime6")
+    assert not index.has_split("dev", "dipco")
+    segments = index.segments("dev", "S02", "chime6")
+    assert segments["speaker"].tolist() == ["P05", "P06"]
+    assert segments["end"].tolist() == [2.5, 3.0]
+
+    # a single scenario folder works too
+    index = DasrIndex.load(dasr_root / "chime6", use_cache=False)
+    assert index.devices("dev", "S09") == {"U01.CH1": {"is_close_talk": False}}
+
+
+def test_dasr_index_cache_invalidation(dasr_root):
+    index = DasrIndex.load(dasr_root)
+    assert DasrIndex.load(dasr_root).is_valid()
+
+    sess_file = dasr_root / "chime6" / "transcriptions" / "dev" / "S09.json"
+    with open(sess_file, "w") as f:
+        json.dump([{"speaker": "P07", "start_time": 0, "end_time": 1}], f)
+    stat = os.stat(sess_file)
+    os.utime(sess_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not index.is_valid()
+
+    index = DasrIndex.load(dasr_root)
+    assert index.segments("dev", "S09", "chime6")["speaker"].tolist() == ["P07"]
+
+
+def test_dasr_index_unwritable_cache(dasr_root, tmp_path_factory):
+    # the cache can't be written (its folder is a file), the index is still built
+    not_a_dir = tmp_path_factory.mktemp("cache") / "not_a_dir"
+    not_a_dir.write_text("")
+    index = DasrIndex.load(dasr_root, cache_file=not_a_dir / "index.json")
+    assert index.sessions("dev", "chime6") == ["S02", "S09"]
@@ -0,0 +1,114 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from chime_utils.scoring.diarization import (
+    combine_diarization_error_rates,
+    diarization_error_rate,
+)
+
+
+def _seg(speaker, start, end):
+    return {"speaker": speaker, "start_time": start, "end_time": end}
+
+
+def _frame_der(reference, hypothesis, uem, step=0.01):
+    # brute force: frame-level activity and all the speaker mappings
+    frames = np.arange(uem[0], uem[1], step) + step / 2
+
+    def activity(segments):
+        speakers = sorted({x["speaker"] for x in segments})
+        return np.array(
+            [
+                np.any(
+                    [
+                        (frames >= x["start_time"]) & (frames < x["end_time"])
+                        for x in segments
+                        if x["speaker"] == spk
+                    ],
+                    axis=0,
+                )
+                for spk in speakers
+            ]
+        )
+
+    r, h = activity(reference), activity(hypothesis)
+    n_ref, n_hyp = r.sum(0), h.sum(0)
+    best = 0
+    for perm in itertools.permutations(range(max(len(r), len(h)))):
+        best = max(
+            best,
+            sum(
+                (r[i] & h[j]).sum()
+                for i, j in enumerate(perm)
+                if i < len(r) and j < len(h)
+            ),
+        )
+    errors = np.maximum(n_ref, n_hyp).sum() - best
+    return errors / n_ref.sum()
+
+
+def test_diarization_error_rate():
+    ref = [_seg("A", 0, 4), _seg("B", 3, 6)]
+    hyp = [_seg("x", 0, 3), _seg("y", 3, 6), _seg("y", 5, 8)]
+    er = diarization_error_rate(ref, hyp, uem=(0, 10))
+    # A: 1 s missed (3-4, overlap), falarm 2 s (6-8)
+    assert er.scored == 7
+    assert er.missed == 1 and er.falarm == 2 and er.confusion == 0
+    assert er.der == pytest.approx(3 / 7)
+    # A-x: 3 / 4, B-y: 3 / 5
+    assert er.jer == pytest.approx(1 - (3 / 4 + 3 / 5) / 2)
+    assert er.assignment == (("A", "x"), ("B", "y"))
+
+    # speaker confusion and the uem
+    er = diarization_error_rate(ref, [_seg("x", 0, 6)], uem=(1, 5))
+    assert er.scored == 5 and er.missed == 1 and er.confusion == 1
+    # collar, 0.5 s on each side of 0, 3, 4, 6
+    er = diarization_error_rate(ref, hyp, uem=(0, 10), collar=1.0)
+    assert er.scored == 3 and er.missed == 0 and er.falarm == 1.5
+
+    total = combine_diarization_error_rates(
+        [diarization_error_rate(ref, hyp), diarization_error_rate(ref, ref)]
+    )
+    assert total.der == pytest.approx(3 / 14)
+    assert total.num_ref_speakers == 4
+
+
+def test_diarization_error_rate_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        segments = []
+        for name in ["A", "B", "C", "D"]:
+            for start in rng.uniform(0, 20, size=4).round(2):
+                segments.append(
+                    _seg(name, start, start + round(rng.uniform(0.1, 3), 2))
+                )
+        ref = segments[:12]
+        hyp = [
+            dict(x, speaker=x["speaker"].lower()) for x in segments[12:] + segments[:3]
+        ]
+        er = diarization_error_rate(ref, hyp, uem=(1, 20))
+        assert er.der == pytest.approx(_frame_der(ref, hyp, (1, 20)), abs=1e-2)
+
+
+def test_der_scoring(tmp_path, fake_hyp, fake_dasr):
+    import json
+
+    from chime_utils.scoring.diarization import _der
+
+    result = _der(fake_hyp, fake_dasr, "dev", tmp_path / "out", True)
+    per_session = json.loads((tmp_path / "out" / "DER_per_session.json").read_text())
+    ref = json.loads(
+        (
+            fake_dasr / "dipco" / "transcriptions_scoring" / "dev" / "S02.json"
+        ).read_text()
+    )
+    hyp = [
+        x
+        for x in json.loads((fake_hyp / "dev" / "dipco.json").read_text())
+        if x["session_id"] == "S02"
+    ]
+    expected = diarization_error_rate(ref, hyp, uem=(0, 6))
+    assert per_session["dev"]["dipco"]["S02"]["der"] == pytest.approx(expected.der)
+    assert result["dev"]["dipco"].scored > 0
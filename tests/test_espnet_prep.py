@@ -0,0 +1,42 @@
+import pytest
+from lhotse import Recording, RecordingSet, SupervisionSegment, SupervisionSet
+from lhotse.kaldi import export_to_kaldi
+
+from chime_utils.dprep.espnet import KALDI_FILES, write_kaldi_dir
+from chime_utils.dprep.lhotse import iter_lhotse_sessions
+
+
+def _assert_same_kaldi_dir(sessions, tmp_path):
+    write_kaldi_dir(sessions, tmp_path / "new")
+    export_to_kaldi(
+        RecordingSet.from_recordings(r for rec_set, _ in sessions for r in rec_set),
+        SupervisionSet.from_segments(s for _, sup_set in sessions for s in sup_set),
+        tmp_path / "lhotse",
+        map_underscores_to="-",
+    )
+    for name in KALDI_FILES:
+        assert (tmp_path / "new" / name).read_text() == (
+            tmp_path / "lhotse" / name
+        ).read_text(), name
+    assert sorted(x.name for x in (tmp_path / "new").iterdir()) == sorted(KALDI_FILES)
+
+
+@pytest.mark.parametrize("mic", ["mdm", "ihm"])
+def test_write_kaldi_dir(tmp_path, fake_dasr, mic):
+    sessions = list(iter_lhotse_sessions(fake_dasr / "chime6", "dev", mic, "chime6"))
+    _assert_same_kaldi_dir(sessions, tmp_path)
+
+
+def test_write_kaldi_dir_single_channel(tmp_path, fake_dasr):
+    sessions = []
+    for session in ["S03", "S01"]:
+        rec = Recording.from_file(
+            fake_dasr / "dipco" / "audio" / "dev" / f"{session}_U01.CH1.wav"
+        )
+        sup = SupervisionSegment(
+            f"P01_{session}", rec.id, 0.5, 1.25, speaker="P01", text="hi there"
+        )
+        sessions.append(
+            (RecordingSet.from_recordings([rec]), SupervisionSet.from_segments([sup]))
+        )
+    _assert_same_kaldi_dir(sessions, tmp_path)
@@ -0,0 +1,64 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from chime_utils.json_backend import dump_json, dumps_json, iter_json_array, load_json
+
+ANNOTATION = [
+    {
+        "end_time": "43.170",
+        "start_time": "40.600",
+        "words": "[laughs] Ça va, it's 3 o'clock",
+        "speaker": "P05",
+        "session_id": "S02",
+        "word_timing": [[0.1, 0.25], [0.3, 0.5]],
+    }
+]
+
+
+def test_canonical_json(tmp_path):
+    dump_json(ANNOTATION, tmp_path / "canonical.json")
+    with open(tmp_path / "stdlib.json", "w") as f:
+        json.dump(ANNOTATION, f, indent=4)
+    assert (tmp_path / "canonical.json").read_bytes() == (
+        tmp_path / "stdlib.json"
+    ).read_bytes()
+    assert load_json(tmp_path / "canonical.json") == ANNOTATION
+
+
+def test_compact_json(tmp_path):
+    with open(tmp_path / "compact.json", "w") as f:
+        dump_json(ANNOTATION, f, compact=True)
+    assert "\n" not in (tmp_path / "compact.json").read_text()
+    assert len(dumps_json(ANNOTATION, compact=True)) < len(dumps_json(ANNOTATION))
+    with open(tmp_path / "compact.json", "r") as f:
+        assert load_json(f) == ANNOTATION
+
+
+def test_iter_json_array(tmp_path):
+    data = ANNOTATION * 3 + [[1, 22, 333], "x, ]", 12345678901234567890]
+    dump_json(data, tmp_path / "array.json")
+    for chunk_size in [1, 7, 1 << 20]:
+        assert (
+            list(iter_json_array(tmp_path / "array.json", chunk_size=chunk_size))
+            == data
+        )
+    assert list(iter_json_array(io.StringIO("[ ]"))) == []
+    assert list(iter_json_array(io.StringIO("[0.1]"), parse_float=Decimal)) == [
+        Decimal("0.1")
+    ]
+    for chunk_size in [1, 2, 3]:
+        for text, expected in [
+            ("[0.5, 12.25]", [0.5, 12.25]),
+            ("[1e-07]", [1e-07]),
+            ("[ -3.75 , 100 , true ]", [-3.75, 100, True]),
+        ]:
+            assert (
+                list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+                == expected
+            )
+    for bad in ['{"a": 1}', "[1, 2", "[1 2]"]:
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(bad), chunk_size=2))
@@ -0,0 +1,38 @@
+import pytest
+from lhotse import load_manifest
+
+from chime_utils.dprep.lhotse import prepare_chime6, prepare_dipco
+
+
+@pytest.mark.parametrize("mic", ["mdm", "ihm"])
+def test_prep_lhotse_parallel_streaming(tmp_path, fake_dasr, mic):
+    outputs = {}
+    for num_jobs, streaming in [(1, False), (2, False), (2, True)]:
+        output_dir = tmp_path / f"{num_jobs}_{streaming}"
+        manifests = prepare_chime6(
+            fake_dasr / "chime6",
+            output_dir,
+            mic=mic,
+            num_jobs=num_jobs,
+            streaming=streaming,
+        )
+        assert len(list(manifests["dev"]["supervisions"])) == 21
+        outputs[num_jobs, streaming] = [
+            list(
+                load_manifest(output_dir / f"chime6-{mic}_{x}_dev.jsonl.gz").to_dicts()
+            )
+            for x in ["recordings", "supervisions"]
+        ]
+    # parallel and streaming give the same manifests as the serial prep
+    assert outputs[2, False] == outputs[1, False]
+    assert outputs[2, True] == outputs[1, False]
+    recordings, supervisions = outputs[1, False]
+    assert [r["id"] for r in recordings][:2] == (
+        ["S01", "S02"] if mic == "mdm" else ["S01-P01", "S01-P02"]
+    )
+    assert len(supervisions) == 21
+
+
+def test_prep_lhotse_streaming_needs_output_dir(fake_dasr):
+    with pytest.raises(ValueError):
+        prepare_dipco(fake_dasr / "dipco", None, streaming=True)
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from chime_utils.dgen.utils import LINK_MODES, link_file, link_files
+
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / "orig" / "S02_U01.CH1.wav"
+    src.parent.mkdir()
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    return src
+
+
+@pytest.mark.parametrize("link_mode", LINK_MODES)
+def test_link_file(tmp_path, source, link_mode):
+    dest = tmp_path / "audio" / "S02_U01.CH1.wav"
+    dest.parent.mkdir()
+    link_file(source, dest, link_mode)
+    assert dest.read_bytes() == source.read_bytes()
+    assert dest.is_symlink() == (link_mode == "symlink")
+    # running twice is fine
+    link_file(source, dest, link_mode)
+    assert not (dest.parent / f".{dest.name}.tmp").exists()
+
+
+def test_link_file_replaces_symlink(tmp_path, source):
+    dest = tmp_path / "S02_U01.CH1.wav"
+    link_file(source, dest, "symlink")
+    link_file(source, dest, "copy")
+    assert not dest.is_symlink()
+    assert dest.read_bytes() == source.read_bytes()
+
+
+def test_link_file_exists(tmp_path, source):
+    dest = tmp_path / "S02_U01.CH1.wav"
+    dest.write_bytes(b"something else")
+    for link_mode in LINK_MODES:
+        with pytest.raises(FileExistsError):
+            link_file(source, dest, link_mode)
+
+
+@pytest.mark.parametrize("link_mode", ["hardlink", "reflink", "copy"])
+def test_link_file_same_size(tmp_path, source, link_mode):
+    # a different file of the same size is not taken for a previous copy
+    dest = tmp_path / "S02_U01.CH1.wav"
+    dest.write_bytes(os.urandom(source.stat().st_size))
+    with pytest.raises(FileExistsError):
+        link_file(source, dest, link_mode)
+
+
+@pytest.mark.parametrize("link_mode", LINK_MODES)
+def test_link_files(tmp_path, source, link_mode):
+    pairs = [(source, tmp_path / "audio" / f"{i}.wav") for i in range(5)]
+    link_files(pairs, link_mode, num_workers=2)
+    for _, dest in pairs:
+        assert dest.read_bytes() == source.read_bytes()
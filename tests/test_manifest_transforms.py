@@ -0,0 +1,26 @@
+from lhotse import SupervisionSegment, SupervisionSet, load_manifest
+
+from chime_utils.dprep.manifest_transforms import transform_manifest
+
+
+def test_transform_manifest(tmp_path):
+    sups = SupervisionSet.from_segments(
+        [
+            SupervisionSegment("a", "S01", 0.0, 0.5, speaker="P01", text="Hi!"),
+            SupervisionSegment(
+                "b", "S01", 1.0, 2.0, speaker="P01", text="Hello, World"
+            ),
+            SupervisionSegment("c", "S01", 3.0, 2.0, speaker="P02", text="Bye"),
+        ]
+    )
+    sups.to_file(tmp_path / "sups.jsonl.gz")
+    n_in, n_out = transform_manifest(
+        tmp_path / "sups.jsonl.gz",
+        tmp_path / "out.jsonl.gz",
+        txt_norm="chime8",
+        min_len=1.0,
+        speakers=["P01"],
+    )
+    out = load_manifest(tmp_path / "out.jsonl.gz")
+    assert (n_in, n_out) == (3, 1)
+    assert [s.id for s in out] == ["b"] and out[0].text == "hello world"
@@ -0,0 +1,40 @@
+import numpy as np
+import soundfile as sf
+from lhotse import Recording
+from lhotse.audio import AudioSource
+
+from chime_utils.dprep.mmap_store import (
+    read_mmap_header,
+    register_mmap_backend,
+    write_mmap_store,
+)
+
+
+def test_mmap_store_roundtrip(tmp_path):
+    fs = 16000
+    audio = (np.random.randn(3, fs * 2) * 3000).astype(np.int16)
+    sources = []
+    for idx, ch in enumerate(audio):
+        sf.write(tmp_path / f"S01_U01.CH{idx + 1}.wav", ch, fs, subtype="PCM_16")
+        sources.append(
+            AudioSource(
+                type="file",
+                channels=[idx],
+                source=str(tmp_path / f"S01_U01.CH{idx + 1}.wav"),
+            )
+        )
+    rec = Recording(
+        id="S01", sources=sources, sampling_rate=fs, num_samples=fs * 2, duration=2.0
+    )
+    packed = write_mmap_store(rec, tmp_path / "S01.c8mm")
+    header = read_mmap_header(tmp_path / "S01.c8mm")
+    assert header["num_channels"] == 3 and header["data_offset"] % 4096 == 0
+
+    register_mmap_backend()
+    np.testing.assert_array_equal(
+        packed.load_audio(offset=0.5, duration=1.0),
+        rec.load_audio(offset=0.5, duration=1.0),
+    )
+    np.testing.assert_array_equal(
+        packed.load_audio(channels=[0, 2]), rec.load_audio(channels=[0, 2])
+    )
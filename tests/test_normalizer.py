@@ -1,5 +1,7 @@
 import pytest
 
+from chime_utils.text_norm.consistency import check_norm_consistency, word_diff
+from chime_utils.text_norm.fixed_point import FixedPointNormalizer
 from chime_utils.text_norm.whisper_like import EnglishTextNormalizer
 
 
@@ -56,3 +58,31 @@ def test_text_normalizer(std):
         std("hmmm this is not as bad [unintelligible] ummm probably thirty" " minutes")
         == "this is not as bad probably thirty minutes"
     )
+
+
+def test_norm_consistency():
+    texts = ["Mr. Park visited Assoc. Prof. Kim Jr.", "uhhh", "Let's go"] * 3
+    assert check_norm_consistency(texts, "chime8") == []
+    assert check_norm_consistency(texts, "chime8", num_jobs=2) == []
+    assert word_diff("a b c d e f g", "a b c x e f g") == "... b c [-d-] {+x+} e f ..."
+
+
+def test_fixed_point_normalizer():
+    # not idempotent: strips one trailing "!" per pass
+    fp = FixedPointNormalizer(lambda x: x[:-1] if x.endswith("!") else x)
+    assert fp("wow!!!") == "wow"
+    assert fp.stats()["pass_counts"] == {4: 1}
+    # intermediate results are cached as well
+    assert fp("wow!!") == "wow"
+    assert fp("wow") == "wow"
+    assert fp.stats()["cache_hits"] == 2
+    # stable strings cost a single pass
+    assert fp("ok") == "ok"
+    assert fp.stats()["pass_counts"] == {1: 1, 4: 1}
+    with pytest.raises(RuntimeError):
+        FixedPointNormalizer(lambda x: x + "a")("b")
+    assert FixedPointNormalizer(None)("Hello.") == "Hello."
+    chime8 = FixedPointNormalizer("chime8")
+    assert chime8("Mr. Park visited Assoc. Prof. Kim Jr.") == chime8(
+        chime8("Mr. Park visited Assoc. Prof. Kim Jr.")
+    )
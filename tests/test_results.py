@@ -0,0 +1,33 @@
+import pytest
+
+from chime_utils.scoring.results import ScoringResults, write_results
+
+
+@pytest.mark.parametrize("details_format", ["json", "jsonl.gz"])
+def test_write_results(tmp_path, details_format):
+    from meeteval.wer import combine_error_rates
+    from meeteval.wer.wer.cp import CPErrorRate
+
+    details = {
+        "dev": {
+            "chime6": {
+                "S01": CPErrorRate(1, 4, 0, 0, 1, None, None, 0, 1, 2, (("A", "B"),)),
+                "S02": CPErrorRate(3, 4, 1, 1, 1, None, None, 1, 0, 1, ((None, "A"),)),
+            }
+        }
+    }
+    result = {"dev": {"chime6": combine_error_rates(details["dev"]["chime6"])}}
+    write_results(tmp_path, "cpWER", details, result, details_format)
+
+    results = ScoringResults(tmp_path, "cpWER")
+    assert results.details_file.exists() == (details_format == "jsonl.gz")
+    assert results.per_scenario["dev"]["chime6"]["errors"] == 4
+    assert results.sessions("dev", "chime6") == ["S01", "S02"]
+    assert results.per_session["dev"]["chime6"]["S02"]["errors"] == 3
+    assert ("assignment" in results.per_session["dev"]["chime6"]["S02"]) == (
+        details_format == "json"
+    )
+    er = results.error_rate("dev", "chime6", "S02")
+    assert er.error_rate == 0.75
+    assert [tuple(x) for x in er.assignment] == [(None, "A")]
+    results.close()
@@ -0,0 +1,159 @@
+import json
+
+import meeteval
+import pytest
+
+from chime_utils.scoring.meeteval import (
+    _get_word_normalizer,
+    _load_files,
+    _merge_shards,
+    _report,
+    _wer,
+)
+
+
+def _score(fake_hyp, fake_dasr, output_folder, metric="tcpWER", **kwargs):
+    _wer(
+        fake_hyp,
+        fake_dasr,
+        "dev",
+        output_folder,
+        "chime8",
+        True,
+        metric,
+        **kwargs,
+    )
+    return [
+        (output_folder / f"{metric}_per_{x}.json").read_text()
+        for x in ["session", "scenario"]
+    ]
+
+
+@pytest.mark.parametrize("metric", ["tcpWER", "cpWER"])
+def test_wer_serial(tmp_path, fake_hyp, fake_dasr, metric, caplog):
+    with caplog.at_level("INFO"):
+        _score(fake_hyp, fake_dasr, tmp_path / "serial", metric)
+    assert "Normalized the hypothesis words with" in caplog.text
+    per_session = json.loads(
+        (tmp_path / "serial" / f"{metric}_per_session.json").read_text()
+    )
+    # same as the meeteval functions on the whole scenario
+    for scenario in ["chime6", "dipco"]:
+        r = _load_files([tmp_path / "serial" / "ref" / "dev" / f"{scenario}.json"])
+        h = _load_files([fake_hyp / "dev" / f"{scenario}.json"]).map(
+            _get_word_normalizer("chime8")
+        )
+        if metric == "tcpWER":
+            expected = meeteval.wer.tcpwer(reference=r, hypothesis=h, collar=5)
+        else:
+            expected = meeteval.wer.cpwer(reference=r, hypothesis=h)
+        assert list(per_session["dev"][scenario].keys()) == ["S01", "S02", "S03"]
+        for session, error_rate in expected.items():
+            assert per_session["dev"][scenario][session]["errors"] == error_rate.errors
+            assert per_session["dev"][scenario][session]["length"] == error_rate.length
+
+
+def test_wer_equivalence(tmp_path, fake_hyp, fake_dasr):
+    serial = _score(fake_hyp, fake_dasr, tmp_path / "serial")
+    # the session cache is opt-in
+    assert list((tmp_path / "serial").glob(".*")) == []
+    assert _score(fake_hyp, fake_dasr, tmp_path / "jobs", num_jobs=2) == serial
+
+    # reference cache, written by the first run and read by the second
+    for _ in range(2):
+        assert (
+            _score(
+                fake_hyp,
+                fake_dasr,
+                tmp_path / "ref_cache",
+                use_cache=True,
+                cache_dir=tmp_path / "cache",
+            )
+            == serial
+        )
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    # session cache, the second run scores nothing again
+    for _ in range(2):
+        assert (
+            _score(
+                fake_hyp,
+                fake_dasr,
+                tmp_path / "session_cache",
+                use_session_cache=True,
+            )
+            == serial
+        )
+    assert len(list((tmp_path / "session_cache").glob(".*"))) == 1
+
+    # shards and merge
+    for indx in [1, 2]:
+        _wer(
+            fake_hyp,
+            fake_dasr,
+            "dev",
+            tmp_path / "shards",
+            "chime8",
+            True,
+            "tcpWER",
+            shard=(indx, 2),
+        )
+    metric, details = _merge_shards(
+        sorted((tmp_path / "shards").glob("tcpWER_per_session.shard-*.json"))
+    )
+    _report(details, metric, tmp_path / "merged")
+    assert [
+        (tmp_path / "merged" / f"tcpWER_per_{x}.json").read_text()
+        for x in ["session", "scenario"]
+    ] == serial
+
+
+def test_wer_not_contiguous(tmp_path, fake_hyp, fake_dasr):
+    serial = _score(fake_hyp, fake_dasr, tmp_path / "serial")
+    # sessions interleaved, the hypothesis is loaded at once
+    hyp_file = fake_hyp / "dev" / "chime6.json"
+    hyp = json.loads(hyp_file.read_text())
+    hyp_file.write_text(json.dumps(hyp[1::2] + hyp[::2]))
+    for num_jobs in [1, 2]:
+        assert (
+            _score(fake_hyp, fake_dasr, tmp_path / f"{num_jobs}", num_jobs=num_jobs)
+            == serial
+        )
+
+
+def test_merge_shards_mismatch(tmp_path):
+    def write_shards(name, **kwargs):
+        files = []
+        for indx in [1, 2]:
+            shard = {
+                "metric": "tcpWER",
+                "dset_part": "dev",
+                "shard": indx,
+                "num_shards": 2,
+                "details": {},
+            }
+            shard.update({k: v[indx - 1] for k, v in kwargs.items()})
+            files.append(tmp_path / f"{name}-{indx}.json")
+            files[-1].write_text(json.dumps(shard))
+        return files
+
+    assert _merge_shards(write_shards("ok")) == ("tcpWER", {})
+    with pytest.raises(AssertionError, match="different metrics"):
+        _merge_shards(write_shards("metric", metric=["tcpWER", "cpWER"]))
+    with pytest.raises(AssertionError, match="different splits"):
+        _merge_shards(write_shards("split", dset_part=["dev", "eval"]))
+    with pytest.raises(AssertionError, match="different numbers of shards"):
+        _merge_shards(write_shards("num", num_shards=[2, 3]))
+    with pytest.raises(AssertionError, match=r"Shards \[2\] of 2 are missing"):
+        _merge_shards(write_shards("missing", shard=[1, 1]))
+
+
+@pytest.mark.parametrize("command", ["tcpwer", "cpwer", "der", "serve", "merge"])
+def test_score_help(command):
+    from click.testing import CliRunner
+
+    import chime_utils.bin  # noqa: F401, registers the commands
+    from chime_utils.bin.base import cli
+
+    result = CliRunner().invoke(cli, ["score", command, "--help"])
+    assert result.exit_code == 0, result.output
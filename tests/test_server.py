@@ -0,0 +1,101 @@
+import json
+import threading
+import urllib.request
+from http.server import HTTPServer
+
+import pytest
+import simplejson
+
+from chime_utils.scoring.meeteval import _wer
+from chime_utils.scoring.results import _dumps
+from chime_utils.scoring.server import ScoringService, _make_handler
+
+
+@pytest.fixture(params=[1, 2])
+def server(fake_dasr, request):
+    service = ScoringService(fake_dasr, num_jobs=request.param, use_cache=False)
+    httpd = HTTPServer(("127.0.0.1", 0), _make_handler(service))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield service, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def _post(url, request):
+    with urllib.request.urlopen(
+        urllib.request.Request(url, data=json.dumps(request).encode("utf-8"))
+    ) as f:
+        return simplejson.loads(f.read(), use_decimal=True)
+
+
+@pytest.mark.parametrize("metric", ["tcpWER", "cpWER"])
+def test_scoring_service(tmp_path, fake_hyp, fake_dasr, server, metric):
+    service, url = server
+    output_folder = tmp_path / "out"
+    _wer(fake_hyp, fake_dasr, "dev", output_folder, "chime8", True, metric)
+    per_session = simplejson.loads(
+        (output_folder / f"{metric}_per_session.json").read_text(), use_decimal=True
+    )
+    per_scenario = simplejson.loads(
+        (output_folder / f"{metric}_per_scenario.json").read_text(), use_decimal=True
+    )
+
+    result = service.score(service.load_hypotheses(fake_hyp, "dev"), metric=metric)
+    # as JSON, the same way _wer writes the results
+    result = simplejson.loads(_dumps(result), use_decimal=True)
+    for reply in [
+        result,
+        _post(f"{url}/score", {"metric": metric, "hyp_folder": str(fake_hyp)}),
+        _post(
+            f"{url}/score",
+            {
+                "metric": metric,
+                "hypotheses": {
+                    x: json.loads((fake_hyp / "dev" / f"{x}.json").read_text())
+                    for x in ["chime6", "dipco"]
+                },
+            },
+        ),
+    ]:
+        assert list(reply["scenarios"].keys()) == ["chime6", "dipco"]
+        for scenario, c_result in reply["scenarios"].items():
+            assert c_result["sessions"] == per_session["dev"][scenario]
+            assert c_result["error_rate"] == per_scenario["dev"][scenario]
+
+
+def test_scoring_service_errors(server):
+    _, url = server
+    with urllib.request.urlopen(f"{url}/health") as f:
+        health = json.loads(f.read())
+    assert health["references"] == [
+        {"dset_part": "dev", "scenario": "chime6"},
+        {"dset_part": "dev", "scenario": "dipco"},
+    ]
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _post(f"{url}/score", {"dset_part": "eval", "hypotheses": {"chime6": []}})
+    assert e.value.code == 400
+    # meeteval rejects hypotheses of unknown sessions
+    unknown = {
+        "session_id": "S99",
+        "speaker": "spk0",
+        "start_time": 0,
+        "end_time": 1,
+        "words": "hello",
+    }
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _post(f"{url}/score", {"hypotheses": {"chime6": [unknown]}})
+    assert e.value.code == 400
+    assert "S99" in json.loads(e.value.read())["error"]
+
+
+def test_scoring_service_normalizer_per_request(fake_hyp, fake_dasr, caplog):
+    service = ScoringService(fake_dasr, use_cache=False)
+    with caplog.at_level("INFO"):
+        for _ in range(2):
+            service.score(service.load_hypotheses(fake_hyp, "dev"))
+    stats = [x.message for x in caplog.records if "unique strings" in x.message]
+    # the cache does not grow across requests
+    assert len(stats) == 2 and stats[0] == stats[1]
+    service.close()
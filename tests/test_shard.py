@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from lhotse import CutSet, Recording, RecordingSet, SupervisionSegment, SupervisionSet
+
+from chime_utils.dgen.shard import shard_lhotse_manifests
+
+# lhotse writes the Shar audio with torchaudio
+pytest.importorskip("torchaudio")
+
+
+def test_shard_lhotse_manifests(tmp_path):
+    rng = np.random.default_rng(0)
+    recordings, supervisions = [], []
+    for session in ["S02", "S01"]:
+        audio = rng.uniform(-0.5, 0.5, size=(2, 3 * 16000)).astype("f4")
+        sf.write(tmp_path / f"{session}.wav", audio.T, 16000, subtype="FLOAT")
+        recordings.append(Recording.from_file(tmp_path / f"{session}.wav"))
+        for indx, start in enumerate([0.0, 1.5]):
+            supervisions.append(
+                SupervisionSegment(
+                    f"{session}-{indx}",
+                    recordings[-1].id,
+                    start,
+                    1.0,
+                    channel=[0, 1],
+                    speaker=f"P0{indx}",
+                    text=f"{session} {indx}",
+                )
+            )
+    # supervisions not in the recordings order
+    RecordingSet.from_recordings(recordings).to_file(
+        tmp_path / "chime6-mdm_recordings_train.jsonl.gz"
+    )
+    SupervisionSet.from_segments(supervisions[::-1]).to_file(
+        tmp_path / "chime6-mdm_supervisions_train.jsonl.gz"
+    )
+
+    index = shard_lhotse_manifests(
+        tmp_path, tmp_path / "shards", "chime6", shard_size=3, audio_format="wav"
+    )
+    assert index["num_cuts"] == 4 and index["duration"] == 4.0
+    assert len(index["shards"]["cuts"]) == 2
+
+    cuts = CutSet.from_shar(in_dir=tmp_path / "shards")
+    assert [c.supervisions[0].id for c in cuts] == [
+        "S02-0",
+        "S02-1",
+        "S01-0",
+        "S01-1",
+    ]
+    for cut in cuts:
+        sup = cut.supervisions[0]
+        expected = recordings[sup.id.startswith("S01")].load_audio(
+            offset=sup.start, duration=sup.duration
+        )
+        np.testing.assert_allclose(cut.load_audio(), expected, atol=1e-4)
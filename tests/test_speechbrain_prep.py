@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from chime_utils.dprep.speechbrain import get_sess_examples, prepare_chime6
+from chime_utils.text_norm import get_txt_norm
+
+
+@pytest.mark.parametrize("mic", ["mdm", "ihm"])
+def test_prep_speechbrain(tmp_path, fake_dasr, mic):
+    corpus_dir = fake_dasr / "chime6"
+    sess_file = corpus_dir / "transcriptions_scoring" / "dev" / "S02.json"
+    segments = json.loads(sess_file.read_text())
+    # a repeated segment gives a duplicate id, the last one is kept
+    segments.append(dict(segments[0], words="repeated"))
+    sess_file.write_text(json.dumps(segments))
+
+    output_file = prepare_chime6(corpus_dir, tmp_path, "dev", mic)
+
+    # baseline writer, a dict of the whole partition dumped at once
+    manifest = {}
+    for session in ["S01", "S02", "S03"]:
+        with open(
+            corpus_dir / "transcriptions_scoring" / "dev" / f"{session}.json"
+        ) as f:
+            transcript = json.load(f)
+        with open(corpus_dir / "devices" / "dev" / f"{session}.json") as f:
+            devices = json.load(f)
+        for ex_id, example in get_sess_examples(
+            corpus_dir,
+            "chime6",
+            "dev",
+            session,
+            mic,
+            transcript,
+            get_txt_norm("chime8"),
+            device_info=devices,
+        ):
+            manifest[ex_id] = example
+    with open(output_file) as f:
+        assert f.read() == json.dumps(manifest, indent=4)
+    assert sum(x["words"] == "repeated" for x in manifest.values()) == 1
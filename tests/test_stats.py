@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pytest
+
+from chime_utils.dprep.stats import (
+    session_stats,
+    sessions_activity_stats,
+    speech_activity_stats,
+    summarize_sessions,
+)
+
+
+def dense_activity_stats(segments, resolution=1000):
+    # reference implementation with a (speakers x time steps) activity matrix
+    speakers = sorted(set(x[0] for x in segments))
+    first = min(x[1] for x in segments)
+    last = max(x[2] for x in segments)
+    activations = np.zeros(
+        (len(speakers), int(np.ceil((last - first) * resolution))), dtype="uint8"
+    )
+    for spk, start, end in segments:
+        activations[
+            speakers.index(spk),
+            int((start - first) * resolution) : int((end - first) * resolution),
+        ] = True
+    flattened = np.sum(activations, 0)
+    return [np.sum(flattened == k) / resolution for k in range(len(speakers) + 1)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_speech_activity_stats(seed):
+    rng = np.random.default_rng(seed)
+    segments = []
+    for _ in range(200):
+        start = round(float(rng.uniform(3.0, 600.0)), 3)
+        segments.append(
+            [f"P{rng.integers(1, 6):02d}", start, start + float(rng.uniform(0.2, 15))]
+        )
+    # same speaker overlapping itself and zero length segments
+    segments.append(["P01", segments[0][1] + 0.1, segments[0][2] + 2.0])
+    segments.append(["P02", 100.0, 100.0])
+
+    speech_stats, speakers, last = speech_activity_stats(segments)
+    assert sorted(speakers) == sorted(set(x[0] for x in segments))
+    assert last == max(x[2] for x in segments)
+    np.testing.assert_allclose(speech_stats, dense_activity_stats(segments))
+
+
+def test_sessions_activity_stats():
+    sessions = [
+        [["P01", 0.0, 2.0], ["P02", 1.0, 3.0]],
+        [["P01", 10.0, 12.0], ["P01", 13.0, 14.0]],
+    ]
+    expected = [
+        ([0.0, 2.0, 1.0], ["P01", "P02"], 3.0),
+        ([1.0, 3.0], ["P01"], 14.0),
+    ]
+    assert sessions_activity_stats(sessions) == expected
+    assert sessions_activity_stats(sessions, num_jobs=2) == expected
+
+
+def test_session_stats(tmp_path):
+    segments = [
+        {"speaker": "P01", "start_time": "1.0", "end_time": "4.0", "words": "a b c"},
+        {"speaker": "P02", "start_time": "3.0", "end_time": "5.0", "words": "d e"},
+        {"speaker": "P01", "start_time": "9.0", "end_time": "11.0", "words": "f"},
+    ]
+    with open(tmp_path / "S01.json", "w") as f:
+        json.dump(segments, f)
+    devices = {
+        "S01_U01.CH1": {"is_close_talk": False, "speaker": None},
+        "S01_U01.CH2": {"is_close_talk": False, "speaker": None},
+        "S01_P02": {"is_close_talk": True, "speaker": "P02"},
+    }
+    c_stats = session_stats(tmp_path / "S01.json", uem=(0.0, 10.0), devices=devices)
+    assert c_stats["overlap_degrees"] == [5.0, 4.0, 1.0]
+    assert c_stats["speech"] == 5.0
+    assert c_stats["uem_coverage"] == 0.5
+    assert c_stats["outside_uem"] == 1.0
+    assert c_stats["segment_length_hist"] == [0, 0, 0, 3, 0, 0, 0, 0]
+    assert c_stats["speakers"]["P01"]["speaking_time"] == 4.0
+    assert c_stats["speakers"]["P01"]["words_per_second"] == 4 / 5
+    assert c_stats["devices"]["S01_U01"]["channels"] == 2
+    assert c_stats["devices"]["S01_U01"]["speaking_time"] == 5.0
+    assert c_stats["devices"]["S01_P02"]["speaking_time"] == 2.0
+
+    summary = summarize_sessions({"S01": c_stats, "S02": c_stats})
+    assert summary["n_sessions"] == 2
+    assert summary["overlap_degrees"] == [10.0, 8.0, 2.0]
+    assert summary["speakers"]["P02"]["n_words"] == 4
+
+
+def test_compute_stats_split_without_transcriptions(fake_dasr):
+    from click.testing import CliRunner
+
+    import chime_utils.bin  # noqa: F401, registers the commands
+    from chime_utils.bin.base import cli
+
+    # eval has a UEM but no transcriptions yet
+    uem_dir = fake_dasr / "chime6" / "uem" / "eval"
+    uem_dir.mkdir()
+    (uem_dir / "all.uem").write_text("S21 1 0.000 10.000\n")
+    result = CliRunner().invoke(
+        cli, ["org-tools", "compute-stats", str(fake_dasr), "-c", "chime6"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "SPLIT dev. SESSIONS 3" in result.output
+    assert "SPLIT eval" not in result.output